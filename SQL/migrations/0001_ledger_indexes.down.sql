@@ -0,0 +1,116 @@
+-- MySQL drops the implicit foreign key index once a composite index can
+-- enforce the constraint, so put a single-column one back before dropping.
+
+ALTER TABLE InventoryTransaction
+    ADD INDEX fk_tx_food (FoodItemID),
+    DROP INDEX idx_tx_food_type;
+
+ALTER TABLE InventoryTransaction
+    ADD INDEX fk_tx_location (LocationID),
+    DROP INDEX idx_tx_location_expiration;
+
+ALTER TABLE InventoryTransaction
+    ADD INDEX fk_tx_user (UserID),
+    DROP INDEX idx_tx_user_created;
+
+ALTER TABLE ShoppingList
+    ADD INDEX fk_sl_household (HouseholdID),
+    DROP INDEX idx_sl_household_status;
+
+ALTER TABLE PriceLog
+    ADD INDEX fk_pricelog_package (PackageID),
+    DROP INDEX idx_pricelog_package_created;
+
+ALTER TABLE ShoppingListItem
+    ADD INDEX fk_sli_list (ShoppingListID),
+    DROP INDEX idx_sli_list_food_location;
+
+DROP FUNCTION IF EXISTS GetCurrentStock;
+
+DELIMITER $$
+CREATE FUNCTION GetCurrentStock(p_food_id INT)
+RETURNS DECIMAL(9,2)
+READS SQL DATA
+BEGIN
+  DECLARE current_qty DECIMAL(9,2);
+
+  SET current_qty = (
+    SELECT SUM(
+      CASE
+        WHEN TransactionType IN ('add','purchase','transfer_in') THEN QtyInBaseUnits
+        WHEN TransactionType IN ('remove','expire','transfer_out') THEN -QtyInBaseUnits
+        ELSE 0
+      END
+    )
+    FROM InventoryTransaction
+    WHERE FoodItemID = p_food_id
+  );
+
+  IF current_qty IS NULL THEN
+    SET current_qty = 0;
+  END IF;
+
+  RETURN current_qty;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS GetInventoryByLocation;
+
+DELIMITER $$
+CREATE PROCEDURE GetInventoryByLocation(IN p_HouseholdID INT, IN p_LocationID INT, IN p_SearchQuery VARCHAR(255))
+BEGIN
+    SELECT 
+        f.FoodItemID,
+        f.Name AS FoodName,
+        f.Type,
+        f.Category,
+        p.Label AS PackageLabel,
+        p.BaseUnitAmt AS QtyPerPackage,
+        SUM(
+            CASE 
+                WHEN i.TransactionType IN ('add', 'purchase', 'transfer_in') THEN i.QtyInBaseUnits
+                WHEN i.TransactionType IN ('remove', 'expire', 'transfer_out') THEN -i.QtyInBaseUnits
+                ELSE 0
+            END
+        ) AS TotalQtyInBaseUnits,
+        bu.Abbreviation AS BaseUnitAbbr,
+        FLOOR(
+            SUM(
+                CASE 
+                    WHEN i.TransactionType IN ('add', 'purchase', 'transfer_in') THEN i.QtyInBaseUnits
+                    WHEN i.TransactionType IN ('remove', 'expire', 'transfer_out') THEN -i.QtyInBaseUnits
+                    ELSE 0
+                END
+            ) / p.BaseUnitAmt
+        ) AS WholePackages,
+        MOD(
+            SUM(
+                CASE 
+                    WHEN i.TransactionType IN ('add', 'purchase', 'transfer_in') THEN i.QtyInBaseUnits
+                    WHEN i.TransactionType IN ('remove', 'expire', 'transfer_out') THEN -i.QtyInBaseUnits
+                    ELSE 0
+                END
+            ), 
+            p.BaseUnitAmt
+        ) AS Remainder,
+        p_LocationID AS LocationID
+    FROM FoodItem f
+    JOIN Package p ON f.PreferredPackageID = p.PackageID
+        AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
+    JOIN BaseUnit bu ON f.BaseUnitID = bu.UnitID
+    JOIN InventoryTransaction i ON f.FoodItemID = i.FoodItemID
+    JOIN Location l ON i.LocationID = l.LocationID
+    WHERE f.HouseholdID = p_HouseholdID
+      AND f.IsArchived = 0
+      AND l.LocationID = p_LocationID
+      AND (p_SearchQuery IS NULL OR p_SearchQuery = '' OR LOWER(f.Name) LIKE CONCAT('%', LOWER(p_SearchQuery), '%'))
+    GROUP BY f.FoodItemID, f.Name, f.Type, f.Category, p.Label, p.BaseUnitAmt, bu.Abbreviation
+    HAVING TotalQtyInBaseUnits > 0
+    ORDER BY f.FoodItemID DESC;
+END$$
+DELIMITER ;
+
+GRANT EXECUTE ON FUNCTION GetCurrentStock TO 'stocker_app'@'localhost';
+GRANT EXECUTE ON PROCEDURE GetInventoryByLocation TO 'stocker_app'@'localhost';
+
+DROP TABLE IF EXISTS StockBalance;
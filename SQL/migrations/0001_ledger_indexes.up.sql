@@ -0,0 +1,106 @@
+-- StockBalance, the per item/location projection of the ledger that every
+-- later migration builds on, plus secondary indexes for the ledger and
+-- shopping-list hot paths.
+
+-- Filled the same way as `flask --app app stock rebuild`; at this point the
+-- ledger holds every row, so there is no StockCheckpoint to add in.
+CREATE TABLE IF NOT EXISTS StockBalance (
+    FoodItemID INT NOT NULL,
+    LocationID INT NOT NULL,
+    Qty DECIMAL(11,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (FoodItemID, LocationID),
+    FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
+    FOREIGN KEY (LocationID) REFERENCES Location(LocationID)
+);
+
+DELETE FROM StockBalance;
+
+INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+SELECT FoodItemID, LocationID, SUM(
+    CASE
+        WHEN TransactionType IN ('add','purchase','transfer_in') THEN QtyInBaseUnits
+        WHEN TransactionType IN ('remove','expire','transfer_out') THEN -QtyInBaseUnits
+        ELSE 0
+    END
+) AS Qty
+FROM InventoryTransaction
+GROUP BY FoodItemID, LocationID;
+
+GRANT INSERT, UPDATE, DELETE ON StockBalance TO 'stocker_app'@'localhost';
+
+-- Stock reads that no later migration replaces
+DROP FUNCTION IF EXISTS GetCurrentStock;
+
+DELIMITER $$
+CREATE FUNCTION GetCurrentStock(p_food_id INT)
+RETURNS DECIMAL(9,2)
+READS SQL DATA
+BEGIN
+  DECLARE current_qty DECIMAL(9,2);
+
+  SET current_qty = (
+    SELECT SUM(Qty)
+    FROM StockBalance
+    WHERE FoodItemID = p_food_id
+  );
+
+  IF current_qty IS NULL THEN
+    SET current_qty = 0;
+  END IF;
+
+  RETURN current_qty;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS GetInventoryByLocation;
+
+DELIMITER $$
+CREATE PROCEDURE GetInventoryByLocation(IN p_HouseholdID INT, IN p_LocationID INT, IN p_SearchQuery VARCHAR(255))
+BEGIN
+    SELECT 
+        f.FoodItemID,
+        f.Name AS FoodName,
+        f.Type,
+        f.Category,
+        p.Label AS PackageLabel,
+        p.BaseUnitAmt AS QtyPerPackage,
+        sb.Qty AS TotalQtyInBaseUnits,
+        bu.Abbreviation AS BaseUnitAbbr,
+        FLOOR(sb.Qty / p.BaseUnitAmt) AS WholePackages,
+        MOD(sb.Qty, p.BaseUnitAmt) AS Remainder,
+        p_LocationID AS LocationID
+    FROM FoodItem f
+    JOIN Package p ON f.PreferredPackageID = p.PackageID
+        AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
+    JOIN BaseUnit bu ON f.BaseUnitID = bu.UnitID
+    JOIN StockBalance sb ON sb.FoodItemID = f.FoodItemID
+        AND sb.LocationID = p_LocationID
+    WHERE f.HouseholdID = p_HouseholdID
+      AND f.IsArchived = 0
+      AND sb.Qty > 0
+      AND (p_SearchQuery IS NULL OR p_SearchQuery = '' OR LOWER(f.Name) LIKE CONCAT('%', LOWER(p_SearchQuery), '%'))
+    ORDER BY f.FoodItemID DESC;
+END$$
+DELIMITER ;
+
+GRANT EXECUTE ON FUNCTION GetCurrentStock TO 'stocker_app'@'localhost';
+GRANT EXECUTE ON PROCEDURE GetInventoryByLocation TO 'stocker_app'@'localhost';
+
+
+-- AddRemoveExistingFoodItem / expiring lookups by item and type
+CREATE INDEX idx_tx_food_type ON InventoryTransaction (FoodItemID, TransactionType);
+
+-- Location-scoped expiring queries
+CREATE INDEX idx_tx_location_expiration ON InventoryTransaction (LocationID, ExpirationDate);
+
+-- Household history joins through Users and sorts by CreatedAt
+CREATE INDEX idx_tx_user_created ON InventoryTransaction (UserID, CreatedAt);
+
+-- Active list lookups (routes and update_shoppinglist_event)
+CREATE INDEX idx_sl_household_status ON ShoppingList (HouseholdID, Status);
+
+-- Latest price per package
+CREATE INDEX idx_pricelog_package_created ON PriceLog (PackageID, CreatedAt);
+
+-- Trigger upsert/delete of a list row by item and location
+CREATE INDEX idx_sli_list_food_location ON ShoppingListItem (ShoppingListID, FoodItemID, LocationID);
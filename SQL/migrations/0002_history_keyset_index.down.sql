@@ -0,0 +1 @@
+DROP INDEX idx_tx_created_id ON InventoryTransaction;
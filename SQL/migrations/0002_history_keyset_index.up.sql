@@ -0,0 +1,2 @@
+-- Keyset pagination of household history walks this index newest-first.
+CREATE INDEX idx_tx_created_id ON InventoryTransaction (CreatedAt, TransactionID);
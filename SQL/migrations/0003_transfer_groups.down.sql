@@ -0,0 +1,5 @@
+DROP PROCEDURE IF EXISTS TransferFoodItem;
+
+ALTER TABLE InventoryTransaction
+    DROP INDEX idx_tx_transfer_group,
+    DROP COLUMN TransferGroupID;
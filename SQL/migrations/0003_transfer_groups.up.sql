@@ -0,0 +1,85 @@
+-- Transfers get an explicit group instead of being paired by user, item,
+-- quantity and a 5 second CreatedAt window.
+
+ALTER TABLE InventoryTransaction
+    ADD COLUMN TransferGroupID INT NULL,
+    ADD INDEX idx_tx_transfer_group (TransferGroupID);
+
+-- Backfill existing pairs with the heuristic the history query used to run.
+UPDATE InventoryTransaction tx_out
+JOIN InventoryTransaction tx_in
+    ON tx_in.TransactionType = 'transfer_in'
+    AND tx_in.UserID = tx_out.UserID
+    AND tx_in.FoodItemID = tx_out.FoodItemID
+    AND tx_in.QtyInBaseUnits = tx_out.QtyInBaseUnits
+    AND tx_in.CreatedAt BETWEEN tx_out.CreatedAt AND DATE_ADD(tx_out.CreatedAt, INTERVAL 5 SECOND)
+    AND tx_in.TransferGroupID IS NULL
+SET tx_out.TransferGroupID = tx_out.TransactionID,
+    tx_in.TransferGroupID = tx_out.TransactionID
+WHERE tx_out.TransactionType = 'transfer_out';
+
+DROP PROCEDURE IF EXISTS TransferFoodItem;
+
+DELIMITER $$
+CREATE PROCEDURE TransferFoodItem(
+    IN f_FoodItemID INT,
+    IN l_FromLocationID INT,
+    IN l_ToLocationID INT,
+    IN u_UserID INT,
+    IN quantity DECIMAL(9,2),
+    IN i_ExpirationDate DATE
+)
+BEGIN
+    DECLARE current_qty DECIMAL(9,2);
+    DECLARE group_id INT;
+
+    SELECT SUM(Qty)
+    INTO current_qty
+    FROM StockBalance
+    WHERE FoodItemID = f_FoodItemID
+    FOR UPDATE;
+
+    IF current_qty IS NULL THEN
+        SET current_qty = 0;
+    END IF;
+
+    IF current_qty < quantity THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Insufficient stock for this transfer';
+    END IF;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (f_FoodItemID, l_FromLocationID, -quantity)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
+    )
+    VALUES (
+        f_FoodItemID, l_FromLocationID, u_UserID, quantity, 'transfer_out', NULL
+    );
+
+    -- The outgoing leg's ID names the group
+    SET group_id = LAST_INSERT_ID();
+
+    UPDATE InventoryTransaction
+    SET TransferGroupID = group_id
+    WHERE TransactionID = group_id;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (f_FoodItemID, l_ToLocationID, quantity)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate, TransferGroupID
+    )
+    VALUES (
+        f_FoodItemID, l_ToLocationID, u_UserID, quantity, 'transfer_in',
+        IFNULL(i_ExpirationDate, CURDATE() + INTERVAL 14 DAY), group_id
+    );
+
+    SELECT group_id AS TransferGroupID;
+END$$
+DELIMITER ;
+
+GRANT EXECUTE ON PROCEDURE TransferFoodItem TO 'stocker_app'@'localhost';
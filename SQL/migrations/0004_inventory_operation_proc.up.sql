@@ -0,0 +1,102 @@
+-- Split the body of AddRemoveExistingFoodItem into ApplyInventoryOperation,
+-- which does not manage its own transaction, for the batch endpoint.
+
+DROP PROCEDURE IF EXISTS ApplyInventoryOperation;
+
+DELIMITER $$
+-- Same checks and writes as AddRemoveExistingFoodItem, but it leaves the
+-- transaction to the caller so a batch can share one transaction.
+CREATE PROCEDURE ApplyInventoryOperation(
+    IN f_FoodItemID INT,
+    IN l_LocationID INT,
+    IN u_UserID INT,
+    IN i_TransactionType VARCHAR(20),
+    IN quantity DECIMAL(9,2),
+    IN i_ExpirationDate DATE
+)
+BEGIN
+    DECLARE current_qty DECIMAL(9,2);
+    DECLARE exp_date DATE;
+
+    SELECT SUM(Qty)
+    INTO current_qty
+    FROM StockBalance
+    WHERE FoodItemID = f_FoodItemID
+    FOR UPDATE;
+
+    IF current_qty IS NULL THEN
+        SET current_qty = 0;
+    END IF;
+
+    IF i_TransactionType IN ('remove','expire','transfer_out') AND current_qty < quantity THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Insufficient stock for this removal';
+    END IF;
+
+    IF i_TransactionType = 'expire' THEN
+        UPDATE InventoryTransaction
+        SET ExpirationDate = CURDATE()
+        WHERE FoodItemID = f_FoodItemID
+          AND ExpirationDate IS NOT NULL
+          AND ExpirationDate > CURDATE();
+    END IF;
+
+    IF i_ExpirationDate IS NOT NULL THEN
+        SET exp_date = i_ExpirationDate;
+    ELSEIF i_TransactionType IN ('add','purchase','transfer_in') THEN
+        SET exp_date = CURDATE() + INTERVAL 14 DAY;
+    ELSE
+        SET exp_date = NULL;
+    END IF;
+
+    -- Balance first so the AFTER INSERT trigger sees the new quantity
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (
+        f_FoodItemID,
+        l_LocationID,
+        CASE
+            WHEN i_TransactionType IN ('add','purchase','transfer_in') THEN quantity
+            WHEN i_TransactionType IN ('remove','expire','transfer_out') THEN -quantity
+            ELSE 0
+        END
+    )
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
+    )
+    VALUES (
+        f_FoodItemID, l_LocationID, u_UserID, quantity, i_TransactionType, exp_date
+    );
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS AddRemoveExistingFoodItem;
+
+DELIMITER $$
+CREATE PROCEDURE AddRemoveExistingFoodItem(
+    IN f_FoodItemID INT,
+    IN l_LocationID INT,
+    IN u_UserID INT,
+    IN i_TransactionType VARCHAR(20),
+    IN quantity DECIMAL(9,2),
+    IN i_ExpirationDate DATE
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    CALL ApplyInventoryOperation(
+        f_FoodItemID, l_LocationID, u_UserID, i_TransactionType, quantity, i_ExpirationDate
+    );
+
+    COMMIT;
+END$$
+DELIMITER ;
+
+GRANT EXECUTE ON PROCEDURE ApplyInventoryOperation TO 'stocker_app'@'localhost';
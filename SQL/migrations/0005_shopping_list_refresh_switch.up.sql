@@ -0,0 +1,139 @@
+-- Let a session skip the per-row shopping list refresh so bulk writers can
+-- do it once, set-based, after inserting their ledger rows.
+
+DROP TRIGGER IF EXISTS update_shoppinglist_event;
+
+DELIMITER $$
+CREATE TRIGGER update_shoppinglist_event
+AFTER INSERT ON InventoryTransaction
+FOR EACH ROW
+list_refresh: BEGIN
+  DECLARE household_id        INT;
+  DECLARE shopping_list_id    INT;
+  DECLARE target_level        DECIMAL(10,2);
+  DECLARE needed_qty          DECIMAL(10,2);
+  DECLARE calculated_qty      DECIMAL(10,2);
+  DECLARE p_package_id        INT;
+  DECLARE shopping_item_count INT;
+
+  -- Bulk writers (shopping list completion) refresh the list themselves in
+  -- one set-based pass and turn the per-row refresh off for their session.
+  IF @skip_shopping_list_refresh = 1 THEN
+    LEAVE list_refresh;
+  END IF;
+
+  SET household_id = (
+    SELECT l.HouseholdID
+    FROM Location l
+    WHERE l.LocationID = NEW.LocationID
+    LIMIT 1
+  );
+
+  SET shopping_list_id = (
+    SELECT sl.ShoppingListID
+    FROM ShoppingList sl
+    WHERE sl.HouseholdID = household_id
+      AND sl.Status = 'active'
+    ORDER BY sl.ShoppingListID DESC
+    LIMIT 1
+  );
+
+  IF shopping_list_id IS NULL THEN
+    INSERT INTO ShoppingList (HouseholdID, Status, LastUpdated)
+    VALUES (household_id, 'active', NOW());
+  
+    SET shopping_list_id = (
+      SELECT ShoppingListID
+      FROM ShoppingList
+      WHERE HouseholdID = household_id
+        AND Status = 'active'
+      ORDER BY ShoppingListID DESC
+      LIMIT 1
+    );
+  END IF;
+
+  SET target_level = (
+    SELECT st.TargetLevel
+    FROM StockLevel st
+    WHERE st.FoodItemID = NEW.FoodItemID
+    LIMIT 1
+  );
+
+  IF target_level IS NOT NULL THEN
+    SET calculated_qty = (
+      SELECT sb.Qty
+      FROM StockBalance sb
+      WHERE sb.FoodItemID = NEW.FoodItemID
+        AND sb.LocationID = NEW.LocationID
+    );
+
+    IF calculated_qty IS NULL THEN
+      SET calculated_qty = 0;
+    END IF;
+
+    IF target_level - calculated_qty > 0 THEN
+      SET needed_qty = target_level - calculated_qty;
+    ELSE
+      SET needed_qty = 0;
+    END IF;
+
+    IF needed_qty > 0 THEN
+      SET p_package_id = (
+        SELECT PreferredPackageID
+        FROM FoodItem
+        WHERE FoodItemID = NEW.FoodItemID
+        LIMIT 1
+      );
+
+      IF p_package_id IS NULL THEN
+        SET p_package_id = (
+          SELECT p.PackageID
+          FROM Package p
+          WHERE p.FoodItemID = NEW.FoodItemID
+          ORDER BY p.PackageID DESC
+          LIMIT 1
+        );
+      END IF;
+
+      SET shopping_item_count = (
+        SELECT COUNT(*)
+        FROM ShoppingListItem s
+        WHERE s.ShoppingListID = shopping_list_id
+          AND s.FoodItemID     = NEW.FoodItemID
+          AND s.LocationID     = NEW.LocationID
+      );
+
+      IF shopping_item_count > 0 THEN
+        IF p_package_id IS NOT NULL THEN
+          UPDATE ShoppingListItem s
+          SET s.NeededQty = needed_qty,
+              s.Status    = 'active',
+              s.PackageID = p_package_id
+          WHERE s.ShoppingListID = shopping_list_id
+            AND s.FoodItemID     = NEW.FoodItemID
+            AND s.LocationID     = NEW.LocationID;
+        ELSE
+          UPDATE ShoppingListItem s
+          SET s.NeededQty = needed_qty,
+              s.Status    = 'active'
+          WHERE s.ShoppingListID = shopping_list_id
+            AND s.FoodItemID     = NEW.FoodItemID
+            AND s.LocationID     = NEW.LocationID;
+        END IF;
+      ELSE
+        INSERT INTO ShoppingListItem
+          (ShoppingListID,  FoodItemID,      LocationID,     PackageID,    NeededQty, Status)
+        VALUES
+          (shopping_list_id, NEW.FoodItemID, NEW.LocationID, p_package_id, needed_qty, 'active');
+      END IF;
+
+    ELSE
+      DELETE FROM ShoppingListItem
+      WHERE ShoppingListID = shopping_list_id
+        AND FoodItemID     = NEW.FoodItemID
+        AND LocationID     = NEW.LocationID
+        AND Status         = 'active';
+    END IF;
+  END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,219 @@
+DROP PROCEDURE IF EXISTS AddNewFoodItem;
+
+DELIMITER $$
+CREATE PROCEDURE AddNewFoodItem(
+    IN f_food_name VARCHAR(100),
+    IN f_type VARCHAR(100),
+    IN f_category VARCHAR(100),
+    IN f_base_unit_id INT,
+    IN h_household_id INT,
+    IN p_label VARCHAR(100),
+    IN p_base_unit_amt DECIMAL(9,2),
+    IN l_location_id INT,
+    IN s_target_level DECIMAL(9,2),
+    IN quantity INT,
+    IN u_user_id INT,
+    IN expiration_date DATE,
+    IN p_price_per_item DECIMAL(10,2),
+    IN p_store VARCHAR(100)
+)
+BEGIN
+    DECLARE food_item_id INT;
+    DECLARE package_id INT;
+    DECLARE total_base_qty DECIMAL(9,2);
+
+    INSERT INTO FoodItem (BaseUnitId, HouseholdID, Name, Type, Category, PreferredPackageID, IsArchived)
+    VALUES (f_base_unit_id, h_household_id, f_food_name, f_type, f_category, NULL, FALSE);
+
+    SET food_item_id = (SELECT FoodItemId
+                        FROM FoodItem
+                        WHERE Name = f_food_name
+                        AND HouseholdID = h_household_id
+                        ORDER BY FoodItemId DESC
+                        LIMIT 1);
+
+    INSERT INTO Package (FoodItemID, Label, BaseUnitAmt)
+    VALUES (food_item_id, p_label, p_base_unit_amt);
+
+    SET package_id = (SELECT PackageID
+                      FROM Package
+                      WHERE FoodItemID = food_item_id
+                      AND Label = p_label
+                      AND BaseUnitAmt = p_base_unit_amt
+                      ORDER BY PackageID DESC
+                      LIMIT 1);
+
+    UPDATE FoodItem
+    SET PreferredPackageID = package_id
+    WHERE FoodItemId = food_item_id;
+
+    IF EXISTS (
+        SELECT 1 FROM StockLevel
+        WHERE FoodItemId = food_item_id
+    ) THEN
+        UPDATE StockLevel
+        SET TargetLevel = s_target_level
+        WHERE FoodItemId = food_item_id;
+    ELSE 
+        INSERT INTO StockLevel(FoodItemId, TargetLevel)
+        VALUES (food_item_id, s_target_level);
+    END IF;
+
+    /* Calculation: total_base_qty = package_base_unit_amt × quantity */
+    SET total_base_qty = p_base_unit_amt * quantity;
+
+    IF p_price_per_item IS NOT NULL THEN
+        INSERT INTO PriceLog (PackageID, PriceTotal, Store)
+        VALUES (package_id, p_price_per_item, p_store);
+    END IF;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (food_item_id, l_location_id, total_base_qty)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction(FoodItemID,
+                                     LocationID,
+                                     UserID,
+                                     QtyInBaseUnits,
+                                     TransactionType,
+                                     ExpirationDate)
+    VALUES (food_item_id, l_location_id, u_user_id, total_base_qty, 'add', expiration_date);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS update_shoppinglist_event;
+
+DELIMITER $$
+CREATE TRIGGER update_shoppinglist_event
+AFTER INSERT ON InventoryTransaction
+FOR EACH ROW
+list_refresh: BEGIN
+  DECLARE household_id        INT;
+  DECLARE shopping_list_id    INT;
+  DECLARE target_level        DECIMAL(10,2);
+  DECLARE needed_qty          DECIMAL(10,2);
+  DECLARE calculated_qty      DECIMAL(10,2);
+  DECLARE p_package_id        INT;
+  DECLARE shopping_item_count INT;
+
+  -- Bulk writers (shopping list completion) refresh the list themselves in
+  -- one set-based pass and turn the per-row refresh off for their session.
+  IF @skip_shopping_list_refresh = 1 THEN
+    LEAVE list_refresh;
+  END IF;
+
+  SET household_id = (
+    SELECT l.HouseholdID
+    FROM Location l
+    WHERE l.LocationID = NEW.LocationID
+    LIMIT 1
+  );
+
+  SET shopping_list_id = (
+    SELECT sl.ShoppingListID
+    FROM ShoppingList sl
+    WHERE sl.HouseholdID = household_id
+      AND sl.Status = 'active'
+    ORDER BY sl.ShoppingListID DESC
+    LIMIT 1
+  );
+
+  IF shopping_list_id IS NULL THEN
+    INSERT INTO ShoppingList (HouseholdID, Status, LastUpdated)
+    VALUES (household_id, 'active', NOW());
+  
+    SET shopping_list_id = (
+      SELECT ShoppingListID
+      FROM ShoppingList
+      WHERE HouseholdID = household_id
+        AND Status = 'active'
+      ORDER BY ShoppingListID DESC
+      LIMIT 1
+    );
+  END IF;
+
+  SET target_level = (
+    SELECT st.TargetLevel
+    FROM StockLevel st
+    WHERE st.FoodItemID = NEW.FoodItemID
+    LIMIT 1
+  );
+
+  IF target_level IS NOT NULL THEN
+    SET calculated_qty = (
+      SELECT sb.Qty
+      FROM StockBalance sb
+      WHERE sb.FoodItemID = NEW.FoodItemID
+        AND sb.LocationID = NEW.LocationID
+    );
+
+    IF calculated_qty IS NULL THEN
+      SET calculated_qty = 0;
+    END IF;
+
+    IF target_level - calculated_qty > 0 THEN
+      SET needed_qty = target_level - calculated_qty;
+    ELSE
+      SET needed_qty = 0;
+    END IF;
+
+    IF needed_qty > 0 THEN
+      SET p_package_id = (
+        SELECT PreferredPackageID
+        FROM FoodItem
+        WHERE FoodItemID = NEW.FoodItemID
+        LIMIT 1
+      );
+
+      IF p_package_id IS NULL THEN
+        SET p_package_id = (
+          SELECT p.PackageID
+          FROM Package p
+          WHERE p.FoodItemID = NEW.FoodItemID
+          ORDER BY p.PackageID DESC
+          LIMIT 1
+        );
+      END IF;
+
+      SET shopping_item_count = (
+        SELECT COUNT(*)
+        FROM ShoppingListItem s
+        WHERE s.ShoppingListID = shopping_list_id
+          AND s.FoodItemID     = NEW.FoodItemID
+          AND s.LocationID     = NEW.LocationID
+      );
+
+      IF shopping_item_count > 0 THEN
+        IF p_package_id IS NOT NULL THEN
+          UPDATE ShoppingListItem s
+          SET s.NeededQty = needed_qty,
+              s.Status    = 'active',
+              s.PackageID = p_package_id
+          WHERE s.ShoppingListID = shopping_list_id
+            AND s.FoodItemID     = NEW.FoodItemID
+            AND s.LocationID     = NEW.LocationID;
+        ELSE
+          UPDATE ShoppingListItem s
+          SET s.NeededQty = needed_qty,
+              s.Status    = 'active'
+          WHERE s.ShoppingListID = shopping_list_id
+            AND s.FoodItemID     = NEW.FoodItemID
+            AND s.LocationID     = NEW.LocationID;
+        END IF;
+      ELSE
+        INSERT INTO ShoppingListItem
+          (ShoppingListID,  FoodItemID,      LocationID,     PackageID,    NeededQty, Status)
+        VALUES
+          (shopping_list_id, NEW.FoodItemID, NEW.LocationID, p_package_id, needed_qty, 'active');
+      END IF;
+
+    ELSE
+      DELETE FROM ShoppingListItem
+      WHERE ShoppingListID = shopping_list_id
+        AND FoodItemID     = NEW.FoodItemID
+        AND LocationID     = NEW.LocationID
+        AND Status         = 'active';
+    END IF;
+  END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,91 @@
+-- The shopping list refresh moves into the application (see
+-- backend/shopping_list_refresh.py), which reconciles every touched
+-- item/location pair once per request instead of once per ledger row.
+-- AddNewFoodItem now returns the new FoodItemID so its caller can queue it.
+
+DROP TRIGGER IF EXISTS update_shoppinglist_event;
+
+DROP PROCEDURE IF EXISTS AddNewFoodItem;
+
+DELIMITER $$
+CREATE PROCEDURE AddNewFoodItem(
+    IN f_food_name VARCHAR(100),
+    IN f_type VARCHAR(100),
+    IN f_category VARCHAR(100),
+    IN f_base_unit_id INT,
+    IN h_household_id INT,
+    IN p_label VARCHAR(100),
+    IN p_base_unit_amt DECIMAL(9,2),
+    IN l_location_id INT,
+    IN s_target_level DECIMAL(9,2),
+    IN quantity INT,
+    IN u_user_id INT,
+    IN expiration_date DATE,
+    IN p_price_per_item DECIMAL(10,2),
+    IN p_store VARCHAR(100)
+)
+BEGIN
+    DECLARE food_item_id INT;
+    DECLARE package_id INT;
+    DECLARE total_base_qty DECIMAL(9,2);
+
+    INSERT INTO FoodItem (BaseUnitId, HouseholdID, Name, Type, Category, PreferredPackageID, IsArchived)
+    VALUES (f_base_unit_id, h_household_id, f_food_name, f_type, f_category, NULL, FALSE);
+
+    SET food_item_id = (SELECT FoodItemId
+                        FROM FoodItem
+                        WHERE Name = f_food_name
+                        AND HouseholdID = h_household_id
+                        ORDER BY FoodItemId DESC
+                        LIMIT 1);
+
+    INSERT INTO Package (FoodItemID, Label, BaseUnitAmt)
+    VALUES (food_item_id, p_label, p_base_unit_amt);
+
+    SET package_id = (SELECT PackageID
+                      FROM Package
+                      WHERE FoodItemID = food_item_id
+                      AND Label = p_label
+                      AND BaseUnitAmt = p_base_unit_amt
+                      ORDER BY PackageID DESC
+                      LIMIT 1);
+
+    UPDATE FoodItem
+    SET PreferredPackageID = package_id
+    WHERE FoodItemId = food_item_id;
+
+    IF EXISTS (
+        SELECT 1 FROM StockLevel
+        WHERE FoodItemId = food_item_id
+    ) THEN
+        UPDATE StockLevel
+        SET TargetLevel = s_target_level
+        WHERE FoodItemId = food_item_id;
+    ELSE 
+        INSERT INTO StockLevel(FoodItemId, TargetLevel)
+        VALUES (food_item_id, s_target_level);
+    END IF;
+
+    /* Calculation: total_base_qty = package_base_unit_amt × quantity */
+    SET total_base_qty = p_base_unit_amt * quantity;
+
+    IF p_price_per_item IS NOT NULL THEN
+        INSERT INTO PriceLog (PackageID, PriceTotal, Store)
+        VALUES (package_id, p_price_per_item, p_store);
+    END IF;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (food_item_id, l_location_id, total_base_qty)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction(FoodItemID,
+                                     LocationID,
+                                     UserID,
+                                     QtyInBaseUnits,
+                                     TransactionType,
+                                     ExpirationDate)
+    VALUES (food_item_id, l_location_id, u_user_id, total_base_qty, 'add', expiration_date);
+
+    SELECT food_item_id AS FoodItemID;
+END$$
+DELIMITER ;
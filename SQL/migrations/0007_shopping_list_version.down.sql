@@ -0,0 +1,2 @@
+ALTER TABLE ShoppingList
+    DROP COLUMN Version;
@@ -0,0 +1,4 @@
+-- Optimistic concurrency for diff-based shopping list item updates.
+
+ALTER TABLE ShoppingList
+    ADD COLUMN Version INT NOT NULL DEFAULT 0;
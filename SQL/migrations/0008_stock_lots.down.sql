@@ -0,0 +1,222 @@
+DROP PROCEDURE IF EXISTS ApplyInventoryOperation;
+
+DELIMITER $$
+-- Same checks and writes as AddRemoveExistingFoodItem, but it leaves the
+-- transaction to the caller so a batch can share one transaction.
+CREATE PROCEDURE ApplyInventoryOperation(
+    IN f_FoodItemID INT,
+    IN l_LocationID INT,
+    IN u_UserID INT,
+    IN i_TransactionType VARCHAR(20),
+    IN quantity DECIMAL(9,2),
+    IN i_ExpirationDate DATE
+)
+BEGIN
+    DECLARE current_qty DECIMAL(9,2);
+    DECLARE exp_date DATE;
+
+    SELECT SUM(Qty)
+    INTO current_qty
+    FROM StockBalance
+    WHERE FoodItemID = f_FoodItemID
+    FOR UPDATE;
+
+    IF current_qty IS NULL THEN
+        SET current_qty = 0;
+    END IF;
+
+    IF i_TransactionType IN ('remove','expire','transfer_out') AND current_qty < quantity THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Insufficient stock for this removal';
+    END IF;
+
+    IF i_TransactionType = 'expire' THEN
+        UPDATE InventoryTransaction
+        SET ExpirationDate = CURDATE()
+        WHERE FoodItemID = f_FoodItemID
+          AND ExpirationDate IS NOT NULL
+          AND ExpirationDate > CURDATE();
+    END IF;
+
+    IF i_ExpirationDate IS NOT NULL THEN
+        SET exp_date = i_ExpirationDate;
+    ELSEIF i_TransactionType IN ('add','purchase','transfer_in') THEN
+        SET exp_date = CURDATE() + INTERVAL 14 DAY;
+    ELSE
+        SET exp_date = NULL;
+    END IF;
+
+    -- Balance first, then the ledger row
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (
+        f_FoodItemID,
+        l_LocationID,
+        CASE
+            WHEN i_TransactionType IN ('add','purchase','transfer_in') THEN quantity
+            WHEN i_TransactionType IN ('remove','expire','transfer_out') THEN -quantity
+            ELSE 0
+        END
+    )
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
+    )
+    VALUES (
+        f_FoodItemID, l_LocationID, u_UserID, quantity, i_TransactionType, exp_date
+    );
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS TransferFoodItem;
+
+DELIMITER $$
+CREATE PROCEDURE TransferFoodItem(
+    IN f_FoodItemID INT,
+    IN l_FromLocationID INT,
+    IN l_ToLocationID INT,
+    IN u_UserID INT,
+    IN quantity DECIMAL(9,2),
+    IN i_ExpirationDate DATE
+)
+BEGIN
+    DECLARE current_qty DECIMAL(9,2);
+    DECLARE group_id INT;
+
+    SELECT SUM(Qty)
+    INTO current_qty
+    FROM StockBalance
+    WHERE FoodItemID = f_FoodItemID
+    FOR UPDATE;
+
+    IF current_qty IS NULL THEN
+        SET current_qty = 0;
+    END IF;
+
+    IF current_qty < quantity THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Insufficient stock for this transfer';
+    END IF;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (f_FoodItemID, l_FromLocationID, -quantity)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
+    )
+    VALUES (
+        f_FoodItemID, l_FromLocationID, u_UserID, quantity, 'transfer_out', NULL
+    );
+
+    -- The outgoing leg's ID names the group
+    SET group_id = LAST_INSERT_ID();
+
+    UPDATE InventoryTransaction
+    SET TransferGroupID = group_id
+    WHERE TransactionID = group_id;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (f_FoodItemID, l_ToLocationID, quantity)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate, TransferGroupID
+    )
+    VALUES (
+        f_FoodItemID, l_ToLocationID, u_UserID, quantity, 'transfer_in',
+        IFNULL(i_ExpirationDate, CURDATE() + INTERVAL 14 DAY), group_id
+    );
+
+    SELECT group_id AS TransferGroupID;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS AddNewFoodItem;
+
+DELIMITER $$
+CREATE PROCEDURE AddNewFoodItem(
+    IN f_food_name VARCHAR(100),
+    IN f_type VARCHAR(100),
+    IN f_category VARCHAR(100),
+    IN f_base_unit_id INT,
+    IN h_household_id INT,
+    IN p_label VARCHAR(100),
+    IN p_base_unit_amt DECIMAL(9,2),
+    IN l_location_id INT,
+    IN s_target_level DECIMAL(9,2),
+    IN quantity INT,
+    IN u_user_id INT,
+    IN expiration_date DATE,
+    IN p_price_per_item DECIMAL(10,2),
+    IN p_store VARCHAR(100)
+)
+BEGIN
+    DECLARE food_item_id INT;
+    DECLARE package_id INT;
+    DECLARE total_base_qty DECIMAL(9,2);
+
+    INSERT INTO FoodItem (BaseUnitId, HouseholdID, Name, Type, Category, PreferredPackageID, IsArchived)
+    VALUES (f_base_unit_id, h_household_id, f_food_name, f_type, f_category, NULL, FALSE);
+
+    SET food_item_id = (SELECT FoodItemId
+                        FROM FoodItem
+                        WHERE Name = f_food_name
+                        AND HouseholdID = h_household_id
+                        ORDER BY FoodItemId DESC
+                        LIMIT 1);
+
+    INSERT INTO Package (FoodItemID, Label, BaseUnitAmt)
+    VALUES (food_item_id, p_label, p_base_unit_amt);
+
+    SET package_id = (SELECT PackageID
+                      FROM Package
+                      WHERE FoodItemID = food_item_id
+                      AND Label = p_label
+                      AND BaseUnitAmt = p_base_unit_amt
+                      ORDER BY PackageID DESC
+                      LIMIT 1);
+
+    UPDATE FoodItem
+    SET PreferredPackageID = package_id
+    WHERE FoodItemId = food_item_id;
+
+    IF EXISTS (
+        SELECT 1 FROM StockLevel
+        WHERE FoodItemId = food_item_id
+    ) THEN
+        UPDATE StockLevel
+        SET TargetLevel = s_target_level
+        WHERE FoodItemId = food_item_id;
+    ELSE 
+        INSERT INTO StockLevel(FoodItemId, TargetLevel)
+        VALUES (food_item_id, s_target_level);
+    END IF;
+
+    /* Calculation: total_base_qty = package_base_unit_amt × quantity */
+    SET total_base_qty = p_base_unit_amt * quantity;
+
+    IF p_price_per_item IS NOT NULL THEN
+        INSERT INTO PriceLog (PackageID, PriceTotal, Store)
+        VALUES (package_id, p_price_per_item, p_store);
+    END IF;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (food_item_id, l_location_id, total_base_qty)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction(FoodItemID,
+                                     LocationID,
+                                     UserID,
+                                     QtyInBaseUnits,
+                                     TransactionType,
+                                     ExpirationDate)
+    VALUES (food_item_id, l_location_id, u_user_id, total_base_qty, 'add', expiration_date);
+
+    SELECT food_item_id AS FoodItemID;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ConsumeStockLots;
+
+DROP TABLE IF EXISTS StockLot;
@@ -0,0 +1,2 @@
+ALTER TABLE Household
+    DROP COLUMN CacheGeneration;
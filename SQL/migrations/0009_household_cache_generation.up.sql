@@ -0,0 +1,4 @@
+-- Bumped by every write to a household so cached reads keyed on it go stale.
+
+ALTER TABLE Household
+    ADD COLUMN CacheGeneration BIGINT NOT NULL DEFAULT 0;
@@ -0,0 +1,55 @@
+-- Archived rows are moved back into the ledger first so no history or
+-- stock is lost; StockCheckpoint is then redundant.
+
+INSERT INTO InventoryTransaction
+    (TransactionID, FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits,
+     TransactionType, CreatedAt, ExpirationDate, TransferGroupID)
+SELECT TransactionID, FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits,
+       TransactionType, CreatedAt, ExpirationDate, TransferGroupID
+FROM InventoryTransactionArchive;
+
+DROP PROCEDURE IF EXISTS GetHouseholdInventory;
+
+DELIMITER $$
+CREATE PROCEDURE GetHouseholdInventory(IN p_HouseholdID INT, IN p_SearchQuery VARCHAR(255))
+BEGIN
+    SELECT 
+        f.FoodItemID,
+        f.Name AS FoodName,
+        f.Type,
+        f.Category,
+        p.Label AS PackageLabel,
+        p.BaseUnitAmt AS QtyPerPackage,
+        IFNULL(stock.Qty, 0) AS TotalQtyInBaseUnits,
+        bu.Abbreviation AS BaseUnitAbbr,
+        FLOOR(IFNULL(stock.Qty, 0) / p.BaseUnitAmt) AS WholePackages,
+        MOD(IFNULL(stock.Qty, 0), p.BaseUnitAmt) AS Remainder,
+        (SELECT i.LocationID 
+         FROM InventoryTransaction i 
+         WHERE i.FoodItemID = f.FoodItemID 
+         ORDER BY i.CreatedAt DESC 
+         LIMIT 1) AS LocationID
+    FROM FoodItem f
+    JOIN Package p 
+        ON f.PreferredPackageID = p.PackageID
+        AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
+    JOIN BaseUnit bu 
+        ON f.BaseUnitID = bu.UnitID
+    LEFT JOIN (
+        SELECT sb.FoodItemID, SUM(sb.Qty) AS Qty
+        FROM StockBalance sb
+        JOIN FoodItem fi ON sb.FoodItemID = fi.FoodItemID
+        WHERE fi.HouseholdID = p_HouseholdID
+        GROUP BY sb.FoodItemID
+    ) stock ON stock.FoodItemID = f.FoodItemID
+    WHERE f.HouseholdID = p_HouseholdID
+      AND f.IsArchived = 0
+      AND (p_SearchQuery IS NULL OR p_SearchQuery = '' OR LOWER(f.Name) LIKE CONCAT('%', LOWER(p_SearchQuery), '%'))
+    ORDER BY f.FoodItemID DESC;
+END$$
+DELIMITER ;
+
+REVOKE UPDATE ON InventoryTransactionArchive FROM 'stocker_app'@'localhost';
+
+DROP TABLE IF EXISTS StockCheckpoint;
+DROP TABLE IF EXISTS InventoryTransactionArchive;
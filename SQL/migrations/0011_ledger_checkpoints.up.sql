@@ -0,0 +1,90 @@
+-- Lets `flask --app app stock checkpoint` move old ledger rows out of
+-- InventoryTransaction. Their net quantity per item and location is folded
+-- into StockCheckpoint, and the rows themselves are kept in
+-- InventoryTransactionArchive so household history still shows them.
+
+CREATE TABLE InventoryTransactionArchive (
+    TransactionID INT PRIMARY KEY,
+    FoodItemID INT NOT NULL,
+    LocationID INT NOT NULL,
+    HouseholdID INT NOT NULL,
+    UserID INT NOT NULL,
+    QtyInBaseUnits DECIMAL(9,2),
+    TransactionType VARCHAR(20) NOT NULL,
+    CreatedAt DATETIME NOT NULL,
+    ExpirationDate DATE,
+    TransferGroupID INT NULL,
+    ArchivedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
+    FOREIGN KEY (LocationID) REFERENCES Location(LocationID),
+    FOREIGN KEY (HouseholdID) REFERENCES Household(HouseholdID),
+    FOREIGN KEY (UserID) REFERENCES Users(UserID)
+);
+
+-- Net quantity of every archived row per item and location, so ledger
+-- totals are StockCheckpoint.Qty plus the rows still in InventoryTransaction.
+CREATE TABLE StockCheckpoint (
+    FoodItemID INT NOT NULL,
+    LocationID INT NOT NULL,
+    Qty DECIMAL(11,2) NOT NULL DEFAULT 0,
+    ThroughTransactionID INT NOT NULL,
+    CheckpointedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (FoodItemID, LocationID),
+    FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
+    FOREIGN KEY (LocationID) REFERENCES Location(LocationID)
+);
+
+CREATE INDEX idx_txa_household_created ON InventoryTransactionArchive (HouseholdID, CreatedAt, TransactionID);
+CREATE INDEX idx_txa_transfer_group ON InventoryTransactionArchive (TransferGroupID);
+
+-- Account deletion reassigns archived rows to the placeholder user
+GRANT UPDATE ON InventoryTransactionArchive TO 'stocker_app'@'localhost';
+
+DROP PROCEDURE IF EXISTS GetHouseholdInventory;
+
+DELIMITER $$
+CREATE PROCEDURE GetHouseholdInventory(IN p_HouseholdID INT, IN p_SearchQuery VARCHAR(255))
+BEGIN
+    SELECT 
+        f.FoodItemID,
+        f.Name AS FoodName,
+        f.Type,
+        f.Category,
+        p.Label AS PackageLabel,
+        p.BaseUnitAmt AS QtyPerPackage,
+        IFNULL(stock.Qty, 0) AS TotalQtyInBaseUnits,
+        bu.Abbreviation AS BaseUnitAbbr,
+        FLOOR(IFNULL(stock.Qty, 0) / p.BaseUnitAmt) AS WholePackages,
+        MOD(IFNULL(stock.Qty, 0), p.BaseUnitAmt) AS Remainder,
+        COALESCE(
+            (SELECT i.LocationID 
+             FROM InventoryTransaction i 
+             WHERE i.FoodItemID = f.FoodItemID 
+             ORDER BY i.CreatedAt DESC 
+             LIMIT 1),
+            -- Every ledger row for this item has been checkpointed
+            (SELECT sc.LocationID
+             FROM StockCheckpoint sc
+             WHERE sc.FoodItemID = f.FoodItemID
+             ORDER BY sc.ThroughTransactionID DESC
+             LIMIT 1)
+        ) AS LocationID
+    FROM FoodItem f
+    JOIN Package p 
+        ON f.PreferredPackageID = p.PackageID
+        AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
+    JOIN BaseUnit bu 
+        ON f.BaseUnitID = bu.UnitID
+    LEFT JOIN (
+        SELECT sb.FoodItemID, SUM(sb.Qty) AS Qty
+        FROM StockBalance sb
+        JOIN FoodItem fi ON sb.FoodItemID = fi.FoodItemID
+        WHERE fi.HouseholdID = p_HouseholdID
+        GROUP BY sb.FoodItemID
+    ) stock ON stock.FoodItemID = f.FoodItemID
+    WHERE f.HouseholdID = p_HouseholdID
+      AND f.IsArchived = 0
+      AND (p_SearchQuery IS NULL OR p_SearchQuery = '' OR LOWER(f.Name) LIKE CONCAT('%', LOWER(p_SearchQuery), '%'))
+    ORDER BY f.FoodItemID DESC;
+END$$
+DELIMITER ;
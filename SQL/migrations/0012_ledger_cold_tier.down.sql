@@ -0,0 +1,5 @@
+ALTER TABLE Household
+    DROP COLUMN ArchivedHistoryRows,
+    DROP COLUMN ArchivedThrough;
+
+ALTER TABLE InventoryTransactionArchive ROW_FORMAT=DYNAMIC KEY_BLOCK_SIZE=0;
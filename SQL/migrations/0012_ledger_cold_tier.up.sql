@@ -0,0 +1,20 @@
+-- Archived ledger rows are rarely read, so store them compressed, and keep
+-- each household's archive horizon on Household so history pages that stay
+-- newer than it never read InventoryTransactionArchive.
+
+ALTER TABLE InventoryTransactionArchive ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8;
+
+ALTER TABLE Household
+    ADD COLUMN ArchivedThrough DATETIME NULL,
+    ADD COLUMN ArchivedHistoryRows INT NOT NULL DEFAULT 0;
+
+UPDATE Household h
+JOIN (
+    SELECT HouseholdID,
+           MAX(CreatedAt) AS ArchivedThrough,
+           SUM(TransactionType != 'transfer_in') AS ArchivedHistoryRows
+    FROM InventoryTransactionArchive
+    GROUP BY HouseholdID
+) a ON a.HouseholdID = h.HouseholdID
+SET h.ArchivedThrough = a.ArchivedThrough,
+    h.ArchivedHistoryRows = a.ArchivedHistoryRows;
@@ -0,0 +1,62 @@
+DROP PROCEDURE IF EXISTS getShoppingListByParam;
+
+DELIMITER $$
+CREATE PROCEDURE getShoppingListByParam(
+  IN param INT,
+  IN orderbool BOOL  
+)
+BEGIN
+  DECLARE offset_val INT;
+-- sort by id
+    IF param = 0 THEN
+        IF orderbool THEN
+            SELECT *
+            FROM ShoppingList
+            ORDER BY ShoppingListID ASC;
+        ELSE
+            SELECT *
+            FROM ShoppingList
+            ORDER BY ShoppingListID DESC;
+        END IF;
+-- sort by last updated date
+    ELSEIF param = 1 THEN
+        IF orderbool THEN
+            SELECT *
+            FROM ShoppingList
+            ORDER BY LastUpdated ASC;
+        ELSE
+            SELECT *
+            FROM ShoppingList
+            ORDER BY LastUpdated DESC;
+        END IF;
+-- sort by status
+    ELSEIF param = 2 THEN
+        IF orderbool THEN
+            SELECT *
+            FROM ShoppingList
+            ORDER BY Status ASC;
+        ELSE
+            SELECT *
+            FROM ShoppingList
+            ORDER BY Status DESC;
+        END IF;
+-- sort by total price
+    ELSE
+        IF orderbool THEN
+            SELECT *
+            FROM ShoppingList
+            ORDER BY TotalCost ASC;
+        ELSE
+            SELECT *
+            FROM ShoppingList
+            ORDER BY TotalCost DESC;
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
+
+GRANT EXECUTE ON PROCEDURE getShoppingListByParam TO 'stocker_app'@'localhost';
+
+DROP INDEX idx_sl_household_total ON ShoppingList;
+DROP INDEX idx_sl_household_updated ON ShoppingList;
+DROP INDEX idx_sl_household_id ON ShoppingList;
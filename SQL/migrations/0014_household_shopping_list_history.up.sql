@@ -0,0 +1,9 @@
+-- List history is read per household with keyset paging on each sort key.
+-- getShoppingListByParam sorted every household's lists and is replaced by
+-- queries in backend/routes/shopping_lists.py.
+
+CREATE INDEX idx_sl_household_id ON ShoppingList (HouseholdID, ShoppingListID);
+CREATE INDEX idx_sl_household_updated ON ShoppingList (HouseholdID, LastUpdated);
+CREATE INDEX idx_sl_household_total ON ShoppingList (HouseholdID, TotalCost);
+
+DROP PROCEDURE IF EXISTS getShoppingListByParam;
@@ -0,0 +1,21 @@
+-- Household export and import run on a background thread; this row is how
+-- the requesting client (on any worker) follows their progress.
+
+CREATE TABLE HouseholdArchiveJob (
+    JobID INT AUTO_INCREMENT PRIMARY KEY,
+    Kind VARCHAR(10) NOT NULL,
+    -- Exported household, or the one an import created once it finishes
+    HouseholdID INT NULL,
+    UserID INT NOT NULL,
+    Status VARCHAR(10) NOT NULL DEFAULT 'queued',
+    CurrentTable VARCHAR(50) NULL,
+    RowsDone INT NOT NULL DEFAULT 0,
+    RowsTotal INT NULL,
+    Error VARCHAR(255) NULL,
+    CreatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UpdatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (HouseholdID) REFERENCES Household(HouseholdID),
+    FOREIGN KEY (UserID) REFERENCES Users(UserID)
+);
+
+GRANT INSERT, UPDATE ON HouseholdArchiveJob TO 'stocker_app'@'localhost';
@@ -0,0 +1,59 @@
+-- Transfers took lots from the item's other locations once the source ran
+-- out, moving stock whose StockBalance the transfer never debited. Moves now
+-- only take lots at the source location.
+
+DROP PROCEDURE IF EXISTS ConsumeStockLots;
+
+DELIMITER $$
+-- Takes quantity out of an item's open lots, earliest expiration first,
+-- starting at l_LocationID and falling back to the item's other locations.
+-- Empty lots are deleted. With l_MoveToLocationID set, only lots at
+-- l_LocationID are taken, since that's the only balance a transfer debits,
+-- and every consumed part is re-created at l_MoveToLocationID with its
+-- expiration date.
+CREATE PROCEDURE ConsumeStockLots(
+    IN f_FoodItemID INT,
+    IN l_LocationID INT,
+    IN quantity DECIMAL(11,2),
+    IN l_MoveToLocationID INT
+)
+BEGIN
+    DECLARE remaining DECIMAL(11,2) DEFAULT quantity;
+    DECLARE lot_id INT;
+    DECLARE lot_qty DECIMAL(11,2);
+    DECLARE lot_exp DATE;
+    DECLARE take_qty DECIMAL(11,2);
+
+    consume: WHILE remaining > 0 DO
+        SET lot_id = NULL;
+
+        SELECT LotID, RemainingQty, ExpirationDate
+        INTO lot_id, lot_qty, lot_exp
+        FROM StockLot
+        WHERE FoodItemID = f_FoodItemID
+          AND (l_MoveToLocationID IS NULL OR LocationID = l_LocationID)
+        ORDER BY LocationID = l_LocationID DESC, ExpirationDate IS NULL, ExpirationDate, LotID
+        LIMIT 1
+        FOR UPDATE;
+
+        IF lot_id IS NULL THEN
+            LEAVE consume;
+        END IF;
+
+        SET take_qty = LEAST(lot_qty, remaining);
+
+        IF take_qty = lot_qty THEN
+            DELETE FROM StockLot WHERE LotID = lot_id;
+        ELSE
+            UPDATE StockLot SET RemainingQty = RemainingQty - take_qty WHERE LotID = lot_id;
+        END IF;
+
+        IF l_MoveToLocationID IS NOT NULL THEN
+            INSERT INTO StockLot (FoodItemID, LocationID, ExpirationDate, RemainingQty)
+            VALUES (f_FoodItemID, l_MoveToLocationID, lot_exp, take_qty);
+        END IF;
+
+        SET remaining = remaining - take_qty;
+    END WHILE;
+END$$
+DELIMITER ;
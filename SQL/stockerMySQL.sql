@@ -3,7 +3,12 @@ USE stocker;
 CREATE TABLE Household (
     HouseholdID INT AUTO_INCREMENT PRIMARY KEY,
     HouseholdName VARCHAR(100) NOT NULL,
-    JoinCode VARCHAR(10) NOT NULL UNIQUE
+    JoinCode VARCHAR(10) NOT NULL UNIQUE,
+    CacheGeneration BIGINT NOT NULL DEFAULT 0,
+    -- Newest CreatedAt and history row count (transfer_in legs excluded)
+    -- of this household's rows in InventoryTransactionArchive
+    ArchivedThrough DATETIME NULL,
+    ArchivedHistoryRows INT NOT NULL DEFAULT 0
 );
 
 CREATE TABLE Users (
@@ -67,6 +72,8 @@ CREATE TABLE ShoppingList (
     Status VARCHAR(20) DEFAULT 'active',
     LastUpdated DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     TotalCost DECIMAL(10, 2),
+    -- Bumped on every item edit; diff updates must send the version they read
+    Version INT NOT NULL DEFAULT 0,
     FOREIGN KEY (HouseholdID) REFERENCES Household(HouseholdID)
 );
 
@@ -94,157 +101,156 @@ CREATE TABLE PriceLog (
     CreatedAt DATETIME DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (PackageID) REFERENCES Package(PackageID)
 );
+
+-- Newest PriceLog row per package, written next to every PriceLog insert so
+-- readers look a price up by primary key instead of aggregating PriceLog.
+CREATE TABLE LatestPrice (
+    PackageID INT PRIMARY KEY,
+    PriceTotal DECIMAL(10, 2),
+    Store VARCHAR(100),
+    CreatedAt DATETIME,
+    FOREIGN KEY (PackageID) REFERENCES Package(PackageID)
+);
+
 CREATE TABLE InventoryTransaction (
     TransactionID INT AUTO_INCREMENT PRIMARY KEY,
     FoodItemID INT NOT NULL,
     LocationID INT NOT NULL,
+    -- Owner of LocationID at insert time, so household scans skip Users/Location
+    HouseholdID INT NOT NULL,
     UserID INT NOT NULL,
     QtyInBaseUnits DECIMAL(9,2),
     TransactionType VARCHAR(20) NOT NULL,
     CreatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
     ExpirationDate DATE,
+    -- Both legs of a transfer share the transfer_out row's TransactionID
+    TransferGroupID INT NULL,
     FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
     FOREIGN KEY (LocationID) REFERENCES Location(LocationID),
-    FOREIGN KEY (UserID) REFERENCES Users(UserID)
+    FOREIGN KEY (UserID) REFERENCES Users(UserID),
+    CONSTRAINT fk_tx_household FOREIGN KEY (HouseholdID) REFERENCES Household(HouseholdID)
 );
 
+-- Running on-hand quantity per item and location. Maintained in the same
+-- transaction as every InventoryTransaction insert so stock reads never have
+-- to re-sum the ledger. Rebuild with `flask --app app stock rebuild`.
+CREATE TABLE StockBalance (
+    FoodItemID INT NOT NULL,
+    LocationID INT NOT NULL,
+    Qty DECIMAL(11,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (FoodItemID, LocationID),
+    FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
+    FOREIGN KEY (LocationID) REFERENCES Location(LocationID)
+);
 
-DROP TRIGGER IF EXISTS update_shoppinglist_event;
-
-DELIMITER $$
-CREATE TRIGGER update_shoppinglist_event
-AFTER INSERT ON InventoryTransaction
-FOR EACH ROW
-BEGIN
-  DECLARE household_id        INT;
-  DECLARE shopping_list_id    INT;
-  DECLARE target_level        DECIMAL(10,2);
-  DECLARE needed_qty          DECIMAL(10,2);
-  DECLARE calculated_qty      DECIMAL(10,2);
-  DECLARE p_package_id        INT;
-  DECLARE shopping_item_count INT;
-
-  SET household_id = (
-    SELECT l.HouseholdID
-    FROM Location l
-    WHERE l.LocationID = NEW.LocationID
-    LIMIT 1
-  );
-
-  SET shopping_list_id = (
-    SELECT sl.ShoppingListID
-    FROM ShoppingList sl
-    WHERE sl.HouseholdID = household_id
-      AND sl.Status = 'active'
-    ORDER BY sl.ShoppingListID DESC
-    LIMIT 1
-  );
-
-  IF shopping_list_id IS NULL THEN
-    INSERT INTO ShoppingList (HouseholdID, Status, LastUpdated)
-    VALUES (household_id, 'active', NOW());
-  
-    SET shopping_list_id = (
-      SELECT ShoppingListID
-      FROM ShoppingList
-      WHERE HouseholdID = household_id
-        AND Status = 'active'
-      ORDER BY ShoppingListID DESC
-      LIMIT 1
-    );
-  END IF;
-
-  SET target_level = (
-    SELECT st.TargetLevel
-    FROM StockLevel st
-    WHERE st.FoodItemID = NEW.FoodItemID
-    LIMIT 1
-  );
+-- Open stock lots: what is left of each inflow and when it expires. Removals
+-- consume lots FIFO by expiration and empty lots are deleted, so expiring-soon
+-- queries and expiration edits only ever touch stock that still exists.
+CREATE TABLE StockLot (
+    LotID INT AUTO_INCREMENT PRIMARY KEY,
+    FoodItemID INT NOT NULL,
+    LocationID INT NOT NULL,
+    ExpirationDate DATE NULL,
+    RemainingQty DECIMAL(11,2) NOT NULL,
+    CreatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
+    FOREIGN KEY (LocationID) REFERENCES Location(LocationID)
+);
 
-  IF target_level IS NOT NULL THEN
-    SET calculated_qty = (
-      SELECT SUM(
-        CASE
-          WHEN TransactionType IN ('add','purchase','transfer_in') THEN QtyInBaseUnits
-          WHEN TransactionType IN ('remove','expire','transfer_out') THEN -QtyInBaseUnits
-          ELSE 0
-        END
-      )
-      FROM InventoryTransaction
-      WHERE FoodItemID = NEW.FoodItemID
-        AND LocationID = NEW.LocationID
-    );
+-- Ledger rows folded by `flask --app app stock checkpoint`, kept for history.
+-- Rarely read, so stored compressed.
+CREATE TABLE InventoryTransactionArchive (
+    TransactionID INT PRIMARY KEY,
+    FoodItemID INT NOT NULL,
+    LocationID INT NOT NULL,
+    HouseholdID INT NOT NULL,
+    UserID INT NOT NULL,
+    QtyInBaseUnits DECIMAL(9,2),
+    TransactionType VARCHAR(20) NOT NULL,
+    CreatedAt DATETIME NOT NULL,
+    ExpirationDate DATE,
+    TransferGroupID INT NULL,
+    ArchivedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
+    FOREIGN KEY (LocationID) REFERENCES Location(LocationID),
+    FOREIGN KEY (HouseholdID) REFERENCES Household(HouseholdID),
+    FOREIGN KEY (UserID) REFERENCES Users(UserID)
+) ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8;
 
-    IF calculated_qty IS NULL THEN
-      SET calculated_qty = 0;
-    END IF;
+-- Net quantity of every archived row per item and location, so ledger
+-- totals are StockCheckpoint.Qty plus the rows still in InventoryTransaction.
+CREATE TABLE StockCheckpoint (
+    FoodItemID INT NOT NULL,
+    LocationID INT NOT NULL,
+    Qty DECIMAL(11,2) NOT NULL DEFAULT 0,
+    ThroughTransactionID INT NOT NULL,
+    CheckpointedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (FoodItemID, LocationID),
+    FOREIGN KEY (FoodItemID) REFERENCES FoodItem(FoodItemID),
+    FOREIGN KEY (LocationID) REFERENCES Location(LocationID)
+);
 
-    IF target_level - calculated_qty > 0 THEN
-      SET needed_qty = target_level - calculated_qty;
-    ELSE
-      SET needed_qty = 0;
-    END IF;
+-- Background household exports and imports and their progress
+CREATE TABLE HouseholdArchiveJob (
+    JobID INT AUTO_INCREMENT PRIMARY KEY,
+    Kind VARCHAR(10) NOT NULL,
+    -- Exported household, or the one an import created once it finishes
+    HouseholdID INT NULL,
+    UserID INT NOT NULL,
+    Status VARCHAR(10) NOT NULL DEFAULT 'queued',
+    CurrentTable VARCHAR(50) NULL,
+    RowsDone INT NOT NULL DEFAULT 0,
+    RowsTotal INT NULL,
+    Error VARCHAR(255) NULL,
+    CreatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UpdatedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    FOREIGN KEY (HouseholdID) REFERENCES Household(HouseholdID),
+    FOREIGN KEY (UserID) REFERENCES Users(UserID)
+);
 
-    IF needed_qty > 0 THEN
-      SET p_package_id = (
-        SELECT PreferredPackageID
-        FROM FoodItem
-        WHERE FoodItemID = NEW.FoodItemID
-        LIMIT 1
-      );
-
-      IF p_package_id IS NULL THEN
-        SET p_package_id = (
-          SELECT p.PackageID
-          FROM Package p
-          WHERE p.FoodItemID = NEW.FoodItemID
-          ORDER BY p.PackageID DESC
-          LIMIT 1
-        );
-      END IF;
-
-      SET shopping_item_count = (
-        SELECT COUNT(*)
-        FROM ShoppingListItem s
-        WHERE s.ShoppingListID = shopping_list_id
-          AND s.FoodItemID     = NEW.FoodItemID
-          AND s.LocationID     = NEW.LocationID
-      );
-
-      IF shopping_item_count > 0 THEN
-        IF p_package_id IS NOT NULL THEN
-          UPDATE ShoppingListItem s
-          SET s.NeededQty = needed_qty,
-              s.Status    = 'active',
-              s.PackageID = p_package_id
-          WHERE s.ShoppingListID = shopping_list_id
-            AND s.FoodItemID     = NEW.FoodItemID
-            AND s.LocationID     = NEW.LocationID;
-        ELSE
-          UPDATE ShoppingListItem s
-          SET s.NeededQty = needed_qty,
-              s.Status    = 'active'
-          WHERE s.ShoppingListID = shopping_list_id
-            AND s.FoodItemID     = NEW.FoodItemID
-            AND s.LocationID     = NEW.LocationID;
-        END IF;
-      ELSE
-        INSERT INTO ShoppingListItem
-          (ShoppingListID,  FoodItemID,      LocationID,     PackageID,    NeededQty, Status)
-        VALUES
-          (shopping_list_id, NEW.FoodItemID, NEW.LocationID, p_package_id, needed_qty, 'active');
-      END IF;
+CREATE INDEX idx_tx_food_type ON InventoryTransaction (FoodItemID, TransactionType);
+CREATE INDEX idx_tx_location_expiration ON InventoryTransaction (LocationID, ExpirationDate);
+CREATE INDEX idx_tx_user_created ON InventoryTransaction (UserID, CreatedAt);
+CREATE INDEX idx_tx_household_created ON InventoryTransaction (HouseholdID, CreatedAt, TransactionID);
+CREATE INDEX idx_tx_transfer_group ON InventoryTransaction (TransferGroupID);
+CREATE INDEX idx_txa_household_created ON InventoryTransactionArchive (HouseholdID, CreatedAt, TransactionID);
+CREATE INDEX idx_txa_transfer_group ON InventoryTransactionArchive (TransferGroupID);
+CREATE INDEX idx_sl_household_status ON ShoppingList (HouseholdID, Status);
+CREATE INDEX idx_sl_household_id ON ShoppingList (HouseholdID, ShoppingListID);
+CREATE INDEX idx_sl_household_updated ON ShoppingList (HouseholdID, LastUpdated);
+CREATE INDEX idx_sl_household_total ON ShoppingList (HouseholdID, TotalCost);
+CREATE INDEX idx_pricelog_package_created ON PriceLog (PackageID, CreatedAt);
+CREATE INDEX idx_sli_list_food_location ON ShoppingListItem (ShoppingListID, FoodItemID, LocationID);
+CREATE INDEX idx_lot_food_expiration ON StockLot (FoodItemID, ExpirationDate);
+CREATE INDEX idx_lot_location_expiration ON StockLot (LocationID, ExpirationDate);
+
+-- Migrations under SQL/migrations already folded into this file. Existing
+-- databases pick them up with `flask --app app db upgrade`.
+CREATE TABLE SchemaMigration (
+    Version CHAR(4) PRIMARY KEY,
+    Name VARCHAR(100) NOT NULL,
+    AppliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
 
-    ELSE
-      DELETE FROM ShoppingListItem
-      WHERE ShoppingListID = shopping_list_id
-        AND FoodItemID     = NEW.FoodItemID
-        AND LocationID     = NEW.LocationID
-        AND Status         = 'active';
-    END IF;
-  END IF;
-END$$
-DELIMITER ;
+INSERT INTO SchemaMigration (Version, Name)
+VALUES
+('0001', 'ledger_indexes'),
+('0002', 'history_keyset_index'),
+('0003', 'transfer_groups'),
+('0004', 'inventory_operation_proc'),
+('0005', 'shopping_list_refresh_switch'),
+('0006', 'app_side_shopping_list_refresh'),
+('0007', 'shopping_list_version'),
+('0008', 'stock_lots'),
+('0009', 'household_cache_generation'),
+('0010', 'ledger_household'),
+('0011', 'ledger_checkpoints'),
+('0012', 'ledger_cold_tier'),
+('0013', 'latest_price'),
+('0014', 'household_shopping_list_history'),
+('0015', 'household_archive_jobs'),
+('0016', 'shopping_list_items_json_caller_txn'),
+('0017', 'consume_stock_lots_source_only');
 
 
 DROP FUNCTION IF EXISTS GetCurrentStock;
@@ -257,14 +263,8 @@ BEGIN
   DECLARE current_qty DECIMAL(9,2);
 
   SET current_qty = (
-    SELECT SUM(
-      CASE
-        WHEN TransactionType IN ('add','purchase','transfer_in') THEN QtyInBaseUnits
-        WHEN TransactionType IN ('remove','expire','transfer_out') THEN -QtyInBaseUnits
-        ELSE 0
-      END
-    )
-    FROM InventoryTransaction
+    SELECT SUM(Qty)
+    FROM StockBalance
     WHERE FoodItemID = p_food_id
   );
 
@@ -288,21 +288,36 @@ BEGIN
         f.Category,
         p.Label AS PackageLabel,
         p.BaseUnitAmt AS QtyPerPackage,
-        GetCurrentStock(f.FoodItemID) AS TotalQtyInBaseUnits,
+        IFNULL(stock.Qty, 0) AS TotalQtyInBaseUnits,
         bu.Abbreviation AS BaseUnitAbbr,
-        FLOOR(GetCurrentStock(f.FoodItemID) / p.BaseUnitAmt) AS WholePackages,
-        MOD(GetCurrentStock(f.FoodItemID), p.BaseUnitAmt) AS Remainder,
-        (SELECT i.LocationID 
-         FROM InventoryTransaction i 
-         WHERE i.FoodItemID = f.FoodItemID 
-         ORDER BY i.CreatedAt DESC 
-         LIMIT 1) AS LocationID
+        FLOOR(IFNULL(stock.Qty, 0) / p.BaseUnitAmt) AS WholePackages,
+        MOD(IFNULL(stock.Qty, 0), p.BaseUnitAmt) AS Remainder,
+        COALESCE(
+            (SELECT i.LocationID 
+             FROM InventoryTransaction i 
+             WHERE i.FoodItemID = f.FoodItemID 
+             ORDER BY i.CreatedAt DESC 
+             LIMIT 1),
+            -- Every ledger row for this item has been checkpointed
+            (SELECT sc.LocationID
+             FROM StockCheckpoint sc
+             WHERE sc.FoodItemID = f.FoodItemID
+             ORDER BY sc.ThroughTransactionID DESC
+             LIMIT 1)
+        ) AS LocationID
     FROM FoodItem f
     JOIN Package p 
         ON f.PreferredPackageID = p.PackageID
         AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
     JOIN BaseUnit bu 
         ON f.BaseUnitID = bu.UnitID
+    LEFT JOIN (
+        SELECT sb.FoodItemID, SUM(sb.Qty) AS Qty
+        FROM StockBalance sb
+        JOIN FoodItem fi ON sb.FoodItemID = fi.FoodItemID
+        WHERE fi.HouseholdID = p_HouseholdID
+        GROUP BY sb.FoodItemID
+    ) stock ON stock.FoodItemID = f.FoodItemID
     WHERE f.HouseholdID = p_HouseholdID
       AND f.IsArchived = 0
       AND (p_SearchQuery IS NULL OR p_SearchQuery = '' OR LOWER(f.Name) LIKE CONCAT('%', LOWER(p_SearchQuery), '%'))
@@ -322,54 +337,87 @@ BEGIN
         f.Category,
         p.Label AS PackageLabel,
         p.BaseUnitAmt AS QtyPerPackage,
-        SUM(
-            CASE 
-                WHEN i.TransactionType IN ('add', 'purchase', 'transfer_in') THEN i.QtyInBaseUnits
-                WHEN i.TransactionType IN ('remove', 'expire', 'transfer_out') THEN -i.QtyInBaseUnits
-                ELSE 0
-            END
-        ) AS TotalQtyInBaseUnits,
+        sb.Qty AS TotalQtyInBaseUnits,
         bu.Abbreviation AS BaseUnitAbbr,
-        FLOOR(
-            SUM(
-                CASE 
-                    WHEN i.TransactionType IN ('add', 'purchase', 'transfer_in') THEN i.QtyInBaseUnits
-                    WHEN i.TransactionType IN ('remove', 'expire', 'transfer_out') THEN -i.QtyInBaseUnits
-                    ELSE 0
-                END
-            ) / p.BaseUnitAmt
-        ) AS WholePackages,
-        MOD(
-            SUM(
-                CASE 
-                    WHEN i.TransactionType IN ('add', 'purchase', 'transfer_in') THEN i.QtyInBaseUnits
-                    WHEN i.TransactionType IN ('remove', 'expire', 'transfer_out') THEN -i.QtyInBaseUnits
-                    ELSE 0
-                END
-            ), 
-            p.BaseUnitAmt
-        ) AS Remainder,
+        FLOOR(sb.Qty / p.BaseUnitAmt) AS WholePackages,
+        MOD(sb.Qty, p.BaseUnitAmt) AS Remainder,
         p_LocationID AS LocationID
     FROM FoodItem f
     JOIN Package p ON f.PreferredPackageID = p.PackageID
         AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
     JOIN BaseUnit bu ON f.BaseUnitID = bu.UnitID
-    JOIN InventoryTransaction i ON f.FoodItemID = i.FoodItemID
-    JOIN Location l ON i.LocationID = l.LocationID
+    JOIN StockBalance sb ON sb.FoodItemID = f.FoodItemID
+        AND sb.LocationID = p_LocationID
     WHERE f.HouseholdID = p_HouseholdID
       AND f.IsArchived = 0
-      AND l.LocationID = p_LocationID
+      AND sb.Qty > 0
       AND (p_SearchQuery IS NULL OR p_SearchQuery = '' OR LOWER(f.Name) LIKE CONCAT('%', LOWER(p_SearchQuery), '%'))
-    GROUP BY f.FoodItemID, f.Name, f.Type, f.Category, p.Label, p.BaseUnitAmt, bu.Abbreviation
-    HAVING TotalQtyInBaseUnits > 0
     ORDER BY f.FoodItemID DESC;
 END$$
 DELIMITER ;
 
-DROP PROCEDURE IF EXISTS AddRemoveExistingFoodItem;
+DROP PROCEDURE IF EXISTS ConsumeStockLots;
 
 DELIMITER $$
-CREATE PROCEDURE AddRemoveExistingFoodItem(
+-- Takes quantity out of an item's open lots, earliest expiration first,
+-- starting at l_LocationID and falling back to the item's other locations.
+-- Empty lots are deleted. With l_MoveToLocationID set, only lots at
+-- l_LocationID are taken, since that's the only balance a transfer debits,
+-- and every consumed part is re-created at l_MoveToLocationID with its
+-- expiration date.
+CREATE PROCEDURE ConsumeStockLots(
+    IN f_FoodItemID INT,
+    IN l_LocationID INT,
+    IN quantity DECIMAL(11,2),
+    IN l_MoveToLocationID INT
+)
+BEGIN
+    DECLARE remaining DECIMAL(11,2) DEFAULT quantity;
+    DECLARE lot_id INT;
+    DECLARE lot_qty DECIMAL(11,2);
+    DECLARE lot_exp DATE;
+    DECLARE take_qty DECIMAL(11,2);
+
+    consume: WHILE remaining > 0 DO
+        SET lot_id = NULL;
+
+        SELECT LotID, RemainingQty, ExpirationDate
+        INTO lot_id, lot_qty, lot_exp
+        FROM StockLot
+        WHERE FoodItemID = f_FoodItemID
+          AND (l_MoveToLocationID IS NULL OR LocationID = l_LocationID)
+        ORDER BY LocationID = l_LocationID DESC, ExpirationDate IS NULL, ExpirationDate, LotID
+        LIMIT 1
+        FOR UPDATE;
+
+        IF lot_id IS NULL THEN
+            LEAVE consume;
+        END IF;
+
+        SET take_qty = LEAST(lot_qty, remaining);
+
+        IF take_qty = lot_qty THEN
+            DELETE FROM StockLot WHERE LotID = lot_id;
+        ELSE
+            UPDATE StockLot SET RemainingQty = RemainingQty - take_qty WHERE LotID = lot_id;
+        END IF;
+
+        IF l_MoveToLocationID IS NOT NULL THEN
+            INSERT INTO StockLot (FoodItemID, LocationID, ExpirationDate, RemainingQty)
+            VALUES (f_FoodItemID, l_MoveToLocationID, lot_exp, take_qty);
+        END IF;
+
+        SET remaining = remaining - take_qty;
+    END WHILE;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS ApplyInventoryOperation;
+
+DELIMITER $$
+-- Same checks and writes as AddRemoveExistingFoodItem, but it leaves the
+-- transaction to the caller so a batch can share one transaction.
+CREATE PROCEDURE ApplyInventoryOperation(
     IN f_FoodItemID INT,
     IN l_LocationID INT,
     IN u_UserID INT,
@@ -381,17 +429,9 @@ BEGIN
     DECLARE current_qty DECIMAL(9,2);
     DECLARE exp_date DATE;
 
-    START TRANSACTION;
-
-    SELECT SUM(
-        CASE
-            WHEN TransactionType IN ('add','purchase','transfer_in') THEN QtyInBaseUnits
-            WHEN TransactionType IN ('remove','expire','transfer_out') THEN -QtyInBaseUnits
-            ELSE 0
-        END
-    )
+    SELECT SUM(Qty)
     INTO current_qty
-    FROM InventoryTransaction
+    FROM StockBalance
     WHERE FoodItemID = f_FoodItemID
     FOR UPDATE;
 
@@ -400,19 +440,10 @@ BEGIN
     END IF;
 
     IF i_TransactionType IN ('remove','expire','transfer_out') AND current_qty < quantity THEN
-        ROLLBACK;
         SIGNAL SQLSTATE '45000'
             SET MESSAGE_TEXT = 'Insufficient stock for this removal';
     END IF;
 
-    IF i_TransactionType = 'expire' THEN
-        UPDATE InventoryTransaction
-        SET ExpirationDate = CURDATE()
-        WHERE FoodItemID = f_FoodItemID
-          AND ExpirationDate IS NOT NULL
-          AND ExpirationDate > CURDATE();
-    END IF;
-
     IF i_ExpirationDate IS NOT NULL THEN
         SET exp_date = i_ExpirationDate;
     ELSEIF i_TransactionType IN ('add','purchase','transfer_in') THEN
@@ -421,17 +452,141 @@ BEGIN
         SET exp_date = NULL;
     END IF;
 
+    -- Balance first, then the ledger row
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (
+        f_FoodItemID,
+        l_LocationID,
+        CASE
+            WHEN i_TransactionType IN ('add','purchase','transfer_in') THEN quantity
+            WHEN i_TransactionType IN ('remove','expire','transfer_out') THEN -quantity
+            ELSE 0
+        END
+    )
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
     INSERT INTO InventoryTransaction (
-        FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
+        FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
     )
-    VALUES (
-        f_FoodItemID, l_LocationID, u_UserID, quantity, i_TransactionType, exp_date
+    SELECT f_FoodItemID, l_LocationID, l.HouseholdID, u_UserID, quantity, i_TransactionType, exp_date
+    FROM Location l
+    WHERE l.LocationID = l_LocationID;
+
+    IF i_TransactionType IN ('add','purchase','transfer_in') AND quantity > 0 THEN
+        INSERT INTO StockLot (FoodItemID, LocationID, ExpirationDate, RemainingQty)
+        VALUES (f_FoodItemID, l_LocationID, exp_date, quantity);
+    ELSEIF i_TransactionType IN ('remove','expire','transfer_out') THEN
+        CALL ConsumeStockLots(f_FoodItemID, l_LocationID, quantity, NULL);
+    END IF;
+END$$
+DELIMITER ;
+
+DROP PROCEDURE IF EXISTS AddRemoveExistingFoodItem;
+
+DELIMITER $$
+-- ApplyInventoryOperation in its own transaction, for callers outside the
+-- API's request unit of work (the API calls ApplyInventoryOperation).
+CREATE PROCEDURE AddRemoveExistingFoodItem(
+    IN f_FoodItemID INT,
+    IN l_LocationID INT,
+    IN u_UserID INT,
+    IN i_TransactionType VARCHAR(20),
+    IN quantity DECIMAL(9,2),
+    IN i_ExpirationDate DATE
+)
+BEGIN
+    DECLARE EXIT HANDLER FOR SQLEXCEPTION
+    BEGIN
+        ROLLBACK;
+        RESIGNAL;
+    END;
+
+    START TRANSACTION;
+
+    CALL ApplyInventoryOperation(
+        f_FoodItemID, l_LocationID, u_UserID, i_TransactionType, quantity, i_ExpirationDate
     );
 
     COMMIT;
 END$$
 DELIMITER ;
 
+DROP PROCEDURE IF EXISTS TransferFoodItem;
+
+DELIMITER $$
+-- Both legs of a transfer; like ApplyInventoryOperation it leaves the
+-- transaction to the caller (the request's unit of work).
+CREATE PROCEDURE TransferFoodItem(
+    IN f_FoodItemID INT,
+    IN l_FromLocationID INT,
+    IN l_ToLocationID INT,
+    IN u_UserID INT,
+    IN quantity DECIMAL(9,2),
+    IN i_ExpirationDate DATE
+)
+BEGIN
+    DECLARE current_qty DECIMAL(9,2);
+    DECLARE group_id INT;
+
+    SELECT SUM(Qty)
+    INTO current_qty
+    FROM StockBalance
+    WHERE FoodItemID = f_FoodItemID
+    FOR UPDATE;
+
+    IF current_qty IS NULL THEN
+        SET current_qty = 0;
+    END IF;
+
+    IF current_qty < quantity THEN
+        SIGNAL SQLSTATE '45000'
+            SET MESSAGE_TEXT = 'Insufficient stock for this transfer';
+    END IF;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (f_FoodItemID, l_FromLocationID, -quantity)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
+    )
+    SELECT f_FoodItemID, l_FromLocationID, l.HouseholdID, u_UserID, quantity, 'transfer_out', NULL
+    FROM Location l
+    WHERE l.LocationID = l_FromLocationID;
+
+    -- The outgoing leg's ID names the group
+    SET group_id = LAST_INSERT_ID();
+
+    UPDATE InventoryTransaction
+    SET TransferGroupID = group_id
+    WHERE TransactionID = group_id;
+
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (f_FoodItemID, l_ToLocationID, quantity)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate, TransferGroupID
+    )
+    SELECT f_FoodItemID, l_ToLocationID, l.HouseholdID, u_UserID, quantity, 'transfer_in',
+           IFNULL(i_ExpirationDate, CURDATE() + INTERVAL 14 DAY), group_id
+    FROM Location l
+    WHERE l.LocationID = l_ToLocationID;
+
+    -- Lots keep their expiration dates when they move, unless the caller
+    -- gave the moved stock a new one.
+    IF i_ExpirationDate IS NULL THEN
+        CALL ConsumeStockLots(f_FoodItemID, l_FromLocationID, quantity, l_ToLocationID);
+    ELSE
+        CALL ConsumeStockLots(f_FoodItemID, l_FromLocationID, quantity, NULL);
+        INSERT INTO StockLot (FoodItemID, LocationID, ExpirationDate, RemainingQty)
+        VALUES (f_FoodItemID, l_ToLocationID, i_ExpirationDate, quantity);
+    END IF;
+
+    SELECT group_id AS TransferGroupID;
+END$$
+DELIMITER ;
+
 DROP PROCEDURE IF EXISTS AddNewFoodItem;
 
 DELIMITER $$
@@ -499,15 +654,36 @@ BEGIN
     IF p_price_per_item IS NOT NULL THEN
         INSERT INTO PriceLog (PackageID, PriceTotal, Store)
         VALUES (package_id, p_price_per_item, p_store);
+
+        INSERT INTO LatestPrice (PackageID, PriceTotal, Store, CreatedAt)
+        SELECT PackageID, PriceTotal, Store, CreatedAt
+        FROM PriceLog
+        WHERE PriceLogID = LAST_INSERT_ID()
+        ON DUPLICATE KEY UPDATE
+            PriceTotal = VALUES(PriceTotal),
+            Store = VALUES(Store),
+            CreatedAt = VALUES(CreatedAt);
     END IF;
 
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    VALUES (food_item_id, l_location_id, total_base_qty)
+    ON DUPLICATE KEY UPDATE Qty = Qty + VALUES(Qty);
+
     INSERT INTO InventoryTransaction(FoodItemID,
                                      LocationID,
+                                     HouseholdID,
                                      UserID,
                                      QtyInBaseUnits,
                                      TransactionType,
                                      ExpirationDate)
-    VALUES (food_item_id, l_location_id, u_user_id, total_base_qty, 'add', expiration_date);
+    VALUES (food_item_id, l_location_id, h_household_id, u_user_id, total_base_qty, 'add', expiration_date);
+
+    IF total_base_qty > 0 THEN
+        INSERT INTO StockLot (FoodItemID, LocationID, ExpirationDate, RemainingQty)
+        VALUES (food_item_id, l_location_id, expiration_date, total_base_qty);
+    END IF;
+
+    SELECT food_item_id AS FoodItemID;
 END$$
 DELIMITER ;
 
@@ -530,6 +706,8 @@ VALUES
 DROP PROCEDURE IF EXISTS UpdateShoppingListItemsJSON;
 
 DELIMITER $$
+-- Replaces a list's items; the caller's transaction covers it and the
+-- Version bump that follows.
 CREATE PROCEDURE UpdateShoppingListItemsJSON(
     IN sl_id INT,
     IN sl_items JSON
@@ -551,8 +729,6 @@ BEGIN
     -- Disable safe updates to allow deletion by ShoppingListID
     SET SQL_SAFE_UPDATES = 0;
 
-    START TRANSACTION;
-
     -- Remove all items from the current list
     DELETE FROM ShoppingListItem WHERE ShoppingListID = sl_id;
 
@@ -589,65 +765,6 @@ BEGIN
     SET TotalCost = list_total,
         LastUpdated = CURRENT_TIMESTAMP
     WHERE ShoppingListID = sl_id;
-
-    COMMIT;
-END$$
-DELIMITER ;
-
-DROP PROCEDURE IF EXISTS getShoppingListByParam;
-
-DELIMITER $$
-CREATE PROCEDURE getShoppingListByParam(
-  IN param INT,
-  IN orderbool BOOL  
-)
-BEGIN
-  DECLARE offset_val INT;
--- sort by id
-    IF param = 0 THEN
-        IF orderbool THEN
-            SELECT *
-            FROM ShoppingList
-            ORDER BY ShoppingListID ASC;
-        ELSE
-            SELECT *
-            FROM ShoppingList
-            ORDER BY ShoppingListID DESC;
-        END IF;
--- sort by last updated date
-    ELSEIF param = 1 THEN
-        IF orderbool THEN
-            SELECT *
-            FROM ShoppingList
-            ORDER BY LastUpdated ASC;
-        ELSE
-            SELECT *
-            FROM ShoppingList
-            ORDER BY LastUpdated DESC;
-        END IF;
--- sort by status
-    ELSEIF param = 2 THEN
-        IF orderbool THEN
-            SELECT *
-            FROM ShoppingList
-            ORDER BY Status ASC;
-        ELSE
-            SELECT *
-            FROM ShoppingList
-            ORDER BY Status DESC;
-        END IF;
--- sort by total price
-    ELSE
-        IF orderbool THEN
-            SELECT *
-            FROM ShoppingList
-            ORDER BY TotalCost ASC;
-        ELSE
-            SELECT *
-            FROM ShoppingList
-            ORDER BY TotalCost DESC;
-        END IF;
-    END IF;
 END$$
 DELIMITER ;
 
@@ -658,21 +775,27 @@ GRANT SELECT ON stocker.* TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.FoodItem TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.Household TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.InventoryTransaction TO 'stocker_app'@'localhost';
+GRANT UPDATE ON stocker.InventoryTransactionArchive TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.Location TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.Package TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.PriceLog TO 'stocker_app'@'localhost';
+GRANT INSERT, UPDATE ON stocker.LatestPrice TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.ShoppingList TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.StockLevel TO 'stocker_app'@'localhost';
+GRANT INSERT, UPDATE, DELETE ON stocker.StockBalance TO 'stocker_app'@'localhost';
+GRANT INSERT, UPDATE, DELETE ON stocker.StockLot TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.Users TO 'stocker_app'@'localhost';
+GRANT INSERT, UPDATE ON stocker.HouseholdArchiveJob TO 'stocker_app'@'localhost';
 GRANT INSERT, UPDATE ON stocker.ShoppingListItem TO 'stocker_app'@'localhost';
 GRANT DELETE ON stocker.ShoppingListItem TO 'stocker_app'@'localhost';
 GRANT DELETE ON stocker.Users           TO 'stocker_app'@'localhost';
 
 GRANT EXECUTE ON PROCEDURE stocker.AddNewFoodItem TO 'stocker_app'@'localhost';
 GRANT EXECUTE ON PROCEDURE stocker.AddRemoveExistingFoodItem TO 'stocker_app'@'localhost';
+GRANT EXECUTE ON PROCEDURE stocker.ApplyInventoryOperation TO 'stocker_app'@'localhost';
+GRANT EXECUTE ON PROCEDURE stocker.TransferFoodItem TO 'stocker_app'@'localhost';
 GRANT EXECUTE ON PROCEDURE stocker.GetHouseholdInventory TO 'stocker_app'@'localhost';
 GRANT EXECUTE ON PROCEDURE stocker.GetInventoryByLocation TO 'stocker_app'@'localhost';
-GRANT EXECUTE ON PROCEDURE stocker.getShoppingListByParam TO 'stocker_app'@'localhost';
 GRANT EXECUTE ON PROCEDURE stocker.UpdateShoppingListItemsJSON TO 'stocker_app'@'localhost';
 GRANT EXECUTE ON FUNCTION stocker.GetCurrentStock TO 'stocker_app'@'localhost';
 SHOW GRANTS FOR 'stocker_app'@'localhost';
\ No newline at end of file
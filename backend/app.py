@@ -4,9 +4,15 @@ from apiflask import APIFlask
 from flask import jsonify, send_from_directory, request
 from flask_cors import CORS
 from config import config
-from extensions import login_manager
+from extensions import login_manager, db_pool, init_request_db
 from routes import food_items_bp, shopping_lists_bp, households_bp, auth_bp, transactions_bp
-from routes.auth import authorize_request, AUTH_EXEMPT_ENDPOINTS
+from routes.auth import authorize_request, flush_session_evictions, AUTH_EXEMPT_ENDPOINTS
+from commands import register_commands
+from shopping_list_refresh import flush_touched_stock
+from household_cache import household_cache, bump_household_generations
+from password_hashing import password_hasher
+from ownership import ownership_cache, flush_ownership_invalidations
+from household_archive import archive_jobs, start_queued_archive_jobs
 
 
 def create_app(config_name='development'):
@@ -27,6 +33,16 @@ def create_app(config_name='development'):
     app.url_map.strict_slashes = False
     CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
+    db_pool.init_app(app)
+    init_request_db(
+        app,
+        before_commit=[flush_touched_stock, bump_household_generations],
+        after_commit=[flush_session_evictions, flush_ownership_invalidations, start_queued_archive_jobs],
+    )
+    household_cache.init_app(app)
+    password_hasher.init_app(app)
+    ownership_cache.init_app(app)
+    archive_jobs.init_app(app)
     login_manager.init_app(app)
     login_manager.session_protection = 'strong'
     login_manager.login_view = 'auth.login_user'
@@ -37,6 +53,8 @@ def create_app(config_name='development'):
     app.register_blueprint(auth_bp)
     app.register_blueprint(transactions_bp)
 
+    register_commands(app)
+
     @app.before_request
     def enforce_authorization():
         if request.method == 'OPTIONS':
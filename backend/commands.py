@@ -0,0 +1,302 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from extensions import db_cursor, get_db, QUERY_PLAN_CHECKS
+import migrations
+import shopping_list_refresh
+from household_cache import bump_generations
+from household_archive import archive_jobs
+
+# Signed quantity of a ledger row, matching GetCurrentStock's original rules.
+LEDGER_DELTA_SQL = """
+    CASE
+        WHEN TransactionType IN ('add','purchase','transfer_in') THEN QtyInBaseUnits
+        WHEN TransactionType IN ('remove','expire','transfer_out') THEN -QtyInBaseUnits
+        ELSE 0
+    END
+"""
+
+# Ledger totals: the checkpointed quantity plus the rows still in the ledger.
+LEDGER_BALANCES_SQL = f"""
+    SELECT FoodItemID, LocationID, SUM(Qty) AS Qty
+    FROM (
+        SELECT FoodItemID, LocationID, Qty
+        FROM StockCheckpoint
+        UNION ALL
+        SELECT FoodItemID, LocationID, SUM({LEDGER_DELTA_SQL}) AS Qty
+        FROM InventoryTransaction
+        GROUP BY FoodItemID, LocationID
+    ) ledger
+    GROUP BY FoodItemID, LocationID
+"""
+
+CHECKPOINT_CHUNK_ROWS = 5000
+
+CHECKPOINT_BOUNDARY_SQL = """
+    SELECT MIN(TransactionID) AS FirstID, MAX(TransactionID) AS Boundary
+    FROM InventoryTransaction
+    WHERE CreatedAt < NOW() - INTERVAL %s DAY
+"""
+
+# Transfer legs share the transfer_out row's ID as TransferGroupID; a group
+# with a leg past the boundary and a leg at or below it would be split.
+SPLIT_TRANSFER_SQL = """
+    SELECT MIN(TransferGroupID) AS TransferGroupID
+    FROM InventoryTransaction
+    WHERE TransactionID > %s
+      AND TransferGroupID <= %s
+"""
+
+CHECKPOINT_FOLD_SQL = f"""
+    INSERT INTO StockCheckpoint (FoodItemID, LocationID, Qty, ThroughTransactionID)
+    SELECT FoodItemID, LocationID, SUM({LEDGER_DELTA_SQL}), MAX(TransactionID)
+    FROM InventoryTransaction
+    WHERE TransactionID BETWEEN %s AND %s
+    GROUP BY FoodItemID, LocationID
+    ON DUPLICATE KEY UPDATE
+        Qty = Qty + VALUES(Qty),
+        ThroughTransactionID = GREATEST(ThroughTransactionID, VALUES(ThroughTransactionID))
+"""
+
+CHECKPOINT_ARCHIVE_SQL = """
+    INSERT INTO InventoryTransactionArchive
+        (TransactionID, FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits,
+         TransactionType, CreatedAt, ExpirationDate, TransferGroupID)
+    SELECT TransactionID, FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits,
+           TransactionType, CreatedAt, ExpirationDate, TransferGroupID
+    FROM InventoryTransaction
+    WHERE TransactionID BETWEEN %s AND %s
+"""
+
+CHECKPOINT_DELETE_SQL = """
+    DELETE FROM InventoryTransaction
+    WHERE TransactionID BETWEEN %s AND %s
+"""
+
+# Moves each household's archive horizon past the rows just archived, so
+# history knows which pages can be served from the hot ledger alone.
+CHECKPOINT_HORIZON_SQL = """
+    UPDATE Household h
+    JOIN (
+        SELECT HouseholdID,
+               MAX(CreatedAt) AS ArchivedThrough,
+               SUM(TransactionType != 'transfer_in') AS HistoryRows
+        FROM InventoryTransactionArchive
+        WHERE TransactionID BETWEEN %s AND %s
+        GROUP BY HouseholdID
+    ) a ON a.HouseholdID = h.HouseholdID
+    SET h.ArchivedThrough = GREATEST(COALESCE(h.ArchivedThrough, a.ArchivedThrough), a.ArchivedThrough),
+        h.ArchivedHistoryRows = h.ArchivedHistoryRows + a.HistoryRows
+"""
+
+stock_cli = AppGroup('stock', help='Maintain the StockBalance projection.')
+
+
+@stock_cli.command('rebuild')
+def rebuild_stock_balance():
+    """Recreate StockBalance from StockCheckpoint and the InventoryTransaction ledger."""
+    with db_cursor() as cursor:
+        # The DELETE locks every balance row, which blocks writers at their
+        # FOR UPDATE read until the rebuilt rows are committed.
+        cursor.execute("DELETE FROM StockBalance")
+        cursor.execute(f"""
+            INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+            {LEDGER_BALANCES_SQL}
+        """)
+        rebuilt = cursor.rowcount
+        bump_generations(cursor)
+    click.echo(f'Rebuilt {rebuilt} stock balance rows.')
+
+
+@stock_cli.command('verify')
+def verify_stock_balance():
+    """Compare StockBalance with the ledger and exit non-zero on drift."""
+    with db_cursor() as cursor:
+        cursor.execute(f"""
+            SELECT l.FoodItemID, l.LocationID, l.Qty AS LedgerQty, sb.Qty AS BalanceQty
+            FROM ({LEDGER_BALANCES_SQL}) l
+            LEFT JOIN StockBalance sb
+                ON sb.FoodItemID = l.FoodItemID AND sb.LocationID = l.LocationID
+            WHERE IFNULL(sb.Qty, 0) <> l.Qty
+            UNION ALL
+            SELECT sb.FoodItemID, sb.LocationID, NULL AS LedgerQty, sb.Qty AS BalanceQty
+            FROM StockBalance sb
+            LEFT JOIN ({LEDGER_BALANCES_SQL}) l
+                ON sb.FoodItemID = l.FoodItemID AND sb.LocationID = l.LocationID
+            WHERE l.FoodItemID IS NULL AND sb.Qty <> 0
+        """)
+        mismatches = cursor.fetchall()
+
+    for row in mismatches:
+        click.echo(
+            f"FoodItem {row['FoodItemID']} @ Location {row['LocationID']}: "
+            f"ledger={row['LedgerQty'] or 0} balance={row['BalanceQty'] or 0}"
+        )
+    if mismatches:
+        raise click.ClickException(f'{len(mismatches)} stock balance rows disagree with the ledger')
+    click.echo('StockBalance matches the ledger.')
+
+
+@stock_cli.command('checkpoint')
+@click.option('--older-than', 'days', type=click.IntRange(min=1), default=None,
+              help='Fold ledger rows older than this many days (default LEDGER_HOT_DAYS).')
+def checkpoint_ledger(days):
+    """Fold old ledger rows into StockCheckpoint and move them to InventoryTransactionArchive."""
+    if days is None:
+        days = current_app.config['LEDGER_HOT_DAYS']
+    with db_cursor() as cursor:
+        cursor.execute(CHECKPOINT_BOUNDARY_SQL, (days,))
+        row = cursor.fetchone()
+        first_id, boundary = row['FirstID'], row['Boundary']
+        if boundary is not None:
+            boundary = _unsplit_boundary(cursor, boundary)
+
+    if boundary is None or boundary < first_id:
+        click.echo('No ledger rows to checkpoint.')
+        return
+
+    # One transaction per chunk keeps row locks and undo small; each chunk
+    # is folded, archived and deleted together, so an interrupted run can
+    # simply be started again.
+    folded = 0
+    low = first_id
+    while low <= boundary:
+        with db_cursor() as cursor:
+            high = _unsplit_boundary(cursor, min(low + CHECKPOINT_CHUNK_ROWS - 1, boundary))
+            if high < low:
+                raise click.ClickException(f'Transfer at TransactionID {low} spans more than one chunk')
+            cursor.execute(CHECKPOINT_FOLD_SQL, (low, high))
+            cursor.execute(CHECKPOINT_ARCHIVE_SQL, (low, high))
+            cursor.execute(CHECKPOINT_DELETE_SQL, (low, high))
+            folded += cursor.rowcount
+            cursor.execute(CHECKPOINT_HORIZON_SQL, (low, high))
+        low = high + 1
+    click.echo(f'Checkpointed {folded} ledger rows through TransactionID {boundary}.')
+
+
+def _unsplit_boundary(cursor, boundary):
+    """Lower boundary until no transfer group straddles it."""
+    while True:
+        cursor.execute(SPLIT_TRANSFER_SQL, (boundary, boundary))
+        group_id = cursor.fetchone()['TransferGroupID']
+        if group_id is None:
+            return boundary
+        boundary = group_id - 1
+
+
+# Approximation used when lots can't be replayed: one lot per item/location
+# holding its whole balance, dated with the latest recorded inflow expiration.
+LOT_SEED_SQL = """
+    INSERT INTO StockLot (FoodItemID, LocationID, ExpirationDate, RemainingQty)
+    SELECT sb.FoodItemID, sb.LocationID, latest.ExpirationDate, sb.Qty
+    FROM StockBalance sb
+    LEFT JOIN (
+        SELECT FoodItemID, LocationID, MAX(ExpirationDate) AS ExpirationDate
+        FROM (
+            SELECT FoodItemID, LocationID, ExpirationDate, TransactionType
+            FROM InventoryTransaction
+            UNION ALL
+            SELECT FoodItemID, LocationID, ExpirationDate, TransactionType
+            FROM InventoryTransactionArchive
+        ) tx
+        WHERE TransactionType IN ('add','purchase','transfer_in')
+        GROUP BY FoodItemID, LocationID
+    ) latest ON latest.FoodItemID = sb.FoodItemID AND latest.LocationID = sb.LocationID
+    WHERE sb.Qty > 0
+"""
+
+
+@stock_cli.command('reseed-lots')
+def reseed_stock_lots():
+    """Replace StockLot with one lot per item/location seeded from StockBalance."""
+    with db_cursor() as cursor:
+        cursor.execute("DELETE FROM StockLot")
+        cursor.execute(LOT_SEED_SQL)
+        seeded = cursor.rowcount
+        bump_generations(cursor)
+    click.echo(f'Seeded {seeded} stock lots.')
+
+
+@stock_cli.command('refresh-lists')
+@click.option('--household', 'household_id', type=int, default=None, help='Only this household.')
+def refresh_shopping_lists(household_id):
+    """Recompute active shopping lists from StockBalance and StockLevel targets."""
+    with db_cursor() as cursor:
+        if household_id is None:
+            cursor.execute("SELECT HouseholdID FROM Household ORDER BY HouseholdID")
+            household_ids = [row['HouseholdID'] for row in cursor.fetchall()]
+        else:
+            household_ids = [household_id]
+        for current_id in household_ids:
+            shopping_list_refresh.refresh_household(cursor, current_id)
+        bump_generations(cursor, household_ids)
+    click.echo(f'Refreshed shopping lists for {len(household_ids)} household(s).')
+
+
+db_cli = AppGroup('db', help='Schema migrations and query plan checks.')
+
+
+@db_cli.command('upgrade')
+@click.option('--to', 'target', default=None, help='Stop after this version, e.g. 0003.')
+def db_upgrade(target):
+    """Apply pending migrations from SQL/migrations."""
+    conn = get_db()
+    try:
+        ran = migrations.upgrade(conn, target=target, echo=click.echo)
+    finally:
+        conn.close()
+    click.echo(f'Applied {len(ran)} migration(s).' if ran else 'Database is up to date.')
+
+
+@db_cli.command('downgrade')
+@click.option('--steps', default=1, show_default=True, help='Number of migrations to revert.')
+def db_downgrade(steps):
+    """Revert the most recently applied migrations."""
+    conn = get_db()
+    try:
+        reverted = migrations.downgrade(conn, steps=steps, echo=click.echo)
+    finally:
+        conn.close()
+    click.echo(f'Reverted {len(reverted)} migration(s).')
+
+
+@db_cli.command('status')
+def db_status():
+    """List migrations and whether each one is applied."""
+    with db_cursor() as cursor:
+        rows = migrations.status(cursor)
+    for row in rows:
+        mark = 'x' if row['applied'] else ' '
+        click.echo(f"[{mark}] {row['version']}_{row['name']}")
+
+
+@db_cli.command('check-plans')
+def db_check_plans():
+    """EXPLAIN every registered hot query and fail on unindexed full scans."""
+    with db_cursor() as cursor:
+        failures, warnings = migrations.check_query_plans(cursor, QUERY_PLAN_CHECKS)
+    for warning in warnings:
+        click.echo(f'warning: {warning}')
+    for failure in failures:
+        click.echo(f'FAIL: {failure}')
+    if failures:
+        raise click.ClickException(f'{len(failures)} registered queries fall back to a full table scan')
+    click.echo(f'{len(QUERY_PLAN_CHECKS)} registered queries use indexes.')
+
+
+archive_cli = AppGroup('archive', help='Household export and import files.')
+
+
+@archive_cli.command('prune')
+@click.option('--hours', type=float, default=None,
+              help='Keep files written within this many hours (default HOUSEHOLD_ARCHIVE_KEEP_HOURS).')
+def prune_archives(hours):
+    """Delete old household archives, uploads and abandoned partial exports."""
+    removed = archive_jobs.prune(hours)
+    click.echo(f'Removed {removed} archive file(s) from {archive_jobs.directory}.')
+
+
+def register_commands(app):
+    app.cli.add_command(stock_cli)
+    app.cli.add_command(db_cli)
+    app.cli.add_command(archive_cli)
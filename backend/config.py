@@ -12,6 +12,31 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD') or ''
     MYSQL_DATABASE = os.getenv('MYSQL_DATABASE', 'stocker')
     MYSQL_UNIX_SOCKET = os.getenv('MYSQL_UNIX_SOCKET', '')
+    # Connection pool, sized per gunicorn worker process
+    MYSQL_POOL_SIZE = int(os.getenv('MYSQL_POOL_SIZE', 5))
+    MYSQL_POOL_TIMEOUT = float(os.getenv('MYSQL_POOL_TIMEOUT', 10))
+    MYSQL_POOL_RECYCLE = int(os.getenv('MYSQL_POOL_RECYCLE', 1800))
+    MYSQL_POOL_PING_AFTER = int(os.getenv('MYSQL_POOL_PING_AFTER', 30))
+    MYSQL_POOL_RESET_SESSION = os.getenv('MYSQL_POOL_RESET_SESSION', '1') == '1'
+    # Per-process budget for cached household reads, 0 turns the cache off
+    HOUSEHOLD_CACHE_MAX_BYTES = int(os.getenv('HOUSEHOLD_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    # Seconds a worker reuses a logged-in user's row, 0 reads it on every request
+    SESSION_USER_CACHE_TTL = float(os.getenv('SESSION_USER_CACHE_TTL', 30))
+    # Households whose food item/location ownership a worker keeps, and for how long
+    OWNERSHIP_CACHE_HOUSEHOLDS = int(os.getenv('OWNERSHIP_CACHE_HOUSEHOLDS', 1000))
+    OWNERSHIP_CACHE_TTL = float(os.getenv('OWNERSHIP_CACHE_TTL', 60))
+    # bcrypt work factor for new hashes; older hashes are upgraded on login
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    # Hashing threads per worker and how many requests may wait for them before a 503
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', 8))
+    # Ledger rows older than this many days are moved to the archive by `stock checkpoint`
+    LEDGER_HOT_DAYS = int(os.getenv('LEDGER_HOT_DAYS', 365))
+    # Where background household exports and uploaded imports are written, and threads per worker running them
+    HOUSEHOLD_ARCHIVE_DIR = os.getenv('HOUSEHOLD_ARCHIVE_DIR', '')
+    HOUSEHOLD_ARCHIVE_WORKERS = int(os.getenv('HOUSEHOLD_ARCHIVE_WORKERS', 1))
+    # Archive files older than this are deleted before each new job and by `archive prune`
+    HOUSEHOLD_ARCHIVE_KEEP_HOURS = float(os.getenv('HOUSEHOLD_ARCHIVE_KEEP_HOURS', 24))
 
 
 class DevelopmentConfig(Config):
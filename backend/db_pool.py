@@ -0,0 +1,200 @@
+import os
+import threading
+import time
+from collections import deque
+
+import mysql.connector
+
+
+class PoolExhaustedError(Exception):
+    pass
+
+
+class PooledConnection:
+    """Wraps a raw mysql connection so that close() hands it back to the pool."""
+
+    def __init__(self, pool, raw):
+        self._pool = pool
+        self._raw = raw
+        self._closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._raw, name)
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._pool._release(self._raw)
+
+    def __del__(self):
+        # Handlers that bail out on an exception without close() would
+        # otherwise leak their slot.
+        if not self._closed:
+            self.close()
+
+
+class _PoolEntry:
+    __slots__ = ('raw', 'created_at', 'released_at', 'used')
+
+    def __init__(self, raw):
+        now = time.monotonic()
+        self.raw = raw
+        self.created_at = now
+        self.released_at = now
+        self.used = False
+
+
+class ConnectionPool:
+    """
+    Per-process MySQL connection pool.
+
+    Connections are opened lazily up to MYSQL_POOL_SIZE. On checkout a
+    connection is recycled once it is older than MYSQL_POOL_RECYCLE seconds,
+    pinged if it sat idle longer than MYSQL_POOL_PING_AFTER seconds, and has its
+    session state reset when MYSQL_POOL_RESET_SESSION is on. The pool remembers
+    the pid it was filled in so that gunicorn workers forked from a preloaded
+    master never share sockets.
+    """
+
+    def __init__(self, app=None):
+        self._settings = None
+        self._lock = threading.Condition()
+        self._idle = deque()
+        self._entries = {}
+        self._pending = 0
+        self._pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        connect_args = {
+            'host': config['MYSQL_HOST'],
+            'port': config['MYSQL_PORT'],
+            'user': config['MYSQL_USER'],
+            'password': config.get('MYSQL_PASSWORD') or '',
+            'database': config['MYSQL_DATABASE'],
+        }
+        if config.get('MYSQL_UNIX_SOCKET'):
+            connect_args['unix_socket'] = config['MYSQL_UNIX_SOCKET']
+
+        self._settings = {
+            'connect_args': connect_args,
+            'size': max(1, int(config.get('MYSQL_POOL_SIZE', 5))),
+            'timeout': float(config.get('MYSQL_POOL_TIMEOUT', 10)),
+            'recycle': float(config.get('MYSQL_POOL_RECYCLE', 1800)),
+            'ping_after': float(config.get('MYSQL_POOL_PING_AFTER', 30)),
+            'reset_session': bool(config.get('MYSQL_POOL_RESET_SESSION', True)),
+        }
+        app.extensions['mysql_pool'] = self
+
+    def connect(self):
+        if self._settings is None:
+            raise RuntimeError('Connection pool is not initialised, call init_app() first')
+
+        deadline = time.monotonic() + self._settings['timeout']
+        with self._lock:
+            self._check_pid()
+            while True:
+                if self._idle:
+                    entry = self._idle.pop()
+                    break
+                if len(self._entries) + self._pending < self._settings['size']:
+                    entry = None
+                    self._pending += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolExhaustedError(
+                        f"No database connection available after {self._settings['timeout']}s "
+                        f"(pool size {self._settings['size']})"
+                    )
+                self._lock.wait(remaining)
+
+        if entry is None:
+            try:
+                entry = self._open()
+            finally:
+                with self._lock:
+                    self._pending -= 1
+                    if entry is not None:
+                        self._entries[id(entry.raw)] = entry
+                    self._lock.notify()
+        else:
+            entry = self._prepare(entry)
+
+        entry.used = True
+        return PooledConnection(self, entry.raw)
+
+    def _open(self):
+        raw = mysql.connector.connect(**self._settings['connect_args'])
+        raw.autocommit = False
+        return _PoolEntry(raw)
+
+    def _prepare(self, entry):
+        now = time.monotonic()
+        try:
+            if now - entry.created_at > self._settings['recycle']:
+                raise mysql.connector.Error('connection exceeded max lifetime')
+            if now - entry.released_at > self._settings['ping_after']:
+                entry.raw.ping(reconnect=False)
+            if self._settings['reset_session'] and entry.used:
+                entry.raw.reset_session()
+            return entry
+        except mysql.connector.Error:
+            self._discard(entry)
+            replacement = self._open()
+            with self._lock:
+                self._entries[id(replacement.raw)] = replacement
+            return replacement
+
+    def _release(self, raw):
+        with self._lock:
+            entry = self._entries.get(id(raw))
+            if entry is None or entry.raw is not raw:
+                # Checked out before a fork; not ours to keep.
+                return
+
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+        except mysql.connector.Error:
+            self._discard(entry)
+            return
+
+        with self._lock:
+            entry.released_at = time.monotonic()
+            self._idle.append(entry)
+            self._lock.notify()
+
+    def _discard(self, entry):
+        with self._lock:
+            self._entries.pop(id(entry.raw), None)
+            self._lock.notify()
+        try:
+            entry.raw.close()
+        except Exception:
+            pass
+
+    def _check_pid(self):
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        # Inherited sockets belong to the parent; forget them without closing.
+        self._idle.clear()
+        self._entries.clear()
+        self._pending = 0
+        self._pid = pid
+
+    def dispose(self):
+        with self._lock:
+            entries = list(self._idle)
+            self._idle.clear()
+            for entry in entries:
+                self._entries.pop(id(entry.raw), None)
+        for entry in entries:
+            try:
+                entry.raw.close()
+            except Exception:
+                pass
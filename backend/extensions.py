@@ -1,34 +1,126 @@
+import base64
+import json
 from contextlib import contextmanager
 from functools import wraps
 import mysql.connector
-from flask import current_app, jsonify
+from flask import jsonify, g, has_request_context
 from apiflask import APIBlueprint
 from flask_login import LoginManager
+from db_pool import ConnectionPool
 
 
 def get_db():
-    conn = mysql.connector.connect(
-        host=current_app.config['MYSQL_HOST'],
-        port=current_app.config['MYSQL_PORT'],
-        user=current_app.config['MYSQL_USER'],
-        password=current_app.config.get('MYSQL_PASSWORD') or '',
-        database=current_app.config['MYSQL_DATABASE']
-    )
-    return conn
+    """
+    Inside a request this is the request's unit of work: one pooled connection
+    stored on flask.g, opened on first use and committed or rolled back once
+    when the request finishes (see init_request_db). Callers must not commit or
+    close it. Outside a request a plain pooled connection is returned and the
+    caller owns it.
+    """
+    if not has_request_context():
+        return db_pool.connect()
+    if 'db_conn' not in g:
+        g.db_conn = db_pool.connect()
+    return g.db_conn
 
 
 @contextmanager
 def db_cursor():
     try:
         conn = get_db()
-        cursor = conn.cursor(dictionary=True)
+    except Exception as e:
+        raise Exception(f'Database connection failed: {str(e)}')
+
+    # Buffered so nested db_cursor() calls on the shared connection never trip
+    # over each other's unread result sets.
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    if has_request_context():
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+        return
+
+    try:
         yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+@contextmanager
+def read_snapshot(buffered=True):
+    """
+    Like db_cursor(), but every query in the block sees one read-only
+    consistent snapshot (START TRANSACTION READ ONLY WITH CONSISTENT
+    SNAPSHOT), so a count and a page can't disagree. Only for endpoints
+    that don't write: inside a request the transaction left open by earlier
+    reads (the login lookup, access checks) is ended first.
+
+    buffered=False leaves rows on the server until they are fetched, for
+    generators streaming a response under stream_with_context(). Only one
+    result set can then be open at a time.
+    """
+    try:
+        conn = get_db()
     except Exception as e:
         raise Exception(f'Database connection failed: {str(e)}')
+
+    if conn.in_transaction:
+        conn.commit()
+    conn.start_transaction(consistent_snapshot=True, readonly=True)
+    cursor = conn.cursor(dictionary=True, buffered=buffered)
+    try:
+        yield cursor
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
     finally:
-        if 'cursor' in locals():
+        try:
             cursor.close()
-        if 'conn' in locals():
+        except mysql.connector.Error:
+            # Rows a client disconnect left unread; the pool discards the
+            # connection when its rollback fails the same way.
+            if buffered:
+                raise
+        if not has_request_context():
+            conn.close()
+
+
+def init_request_db(app, before_commit=(), after_commit=()):
+    """
+    before_commit callbacks get the request connection and run, in order,
+    just before a successful request commits; work they do is part of the
+    same transaction. after_commit callbacks take no arguments and run once
+    that commit went through, for in-process state that must not change
+    before other connections can see the new data.
+    """
+    @app.after_request
+    def commit_request_db(response):
+        # Commit here rather than in teardown so a failed commit still turns
+        # into a 500 instead of a success the client can't trust.
+        conn = g.get('db_conn')
+        if conn is not None:
+            if response.status_code < 400:
+                for callback in before_commit:
+                    callback(conn)
+                conn.commit()
+                for callback in after_commit:
+                    callback()
+            else:
+                conn.rollback()
+        return response
+
+    @app.teardown_request
+    def release_request_db(exc):
+        conn = g.pop('db_conn', None)
+        if conn is not None:
+            # Rolls back anything left open by an unhandled exception.
             conn.close()
 
 
@@ -48,6 +140,54 @@ def document_api_route(bp, method, path, summary, description=None, **kwargs):
     return decorator
 
 
+def encode_cursor(*values):
+    """Opaque keyset-pagination token for the given sort key values."""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """Inverse of encode_cursor(); raises ValueError on anything malformed."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError('Malformed cursor') from e
+    if not isinstance(values, list):
+        raise ValueError('Malformed cursor')
+    return values
+
+
+# Hot queries registered here are EXPLAINed by `flask --app app db check-plans`.
+QUERY_PLAN_CHECKS = []
+
+
+def register_query_plan(name, sql, params=(), allow_full_scan=()):
+    QUERY_PLAN_CHECKS.append({
+        'name': name,
+        'sql': sql,
+        'params': tuple(params),
+        'allow_full_scan': set(allow_full_scan),
+    })
+    return sql
+
+
+def insert_rows(cursor, table, columns, rows):
+    """
+    One multi-row INSERT of rows (sequences matching columns). The new
+    auto-increment IDs are not derived from lastrowid: InnoDB's interleaved
+    lock mode doesn't promise a multi-row INSERT consecutive values, so
+    callers that need them re-select the rows by a natural key.
+    """
+    if not rows:
+        return
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    cursor.execute(
+        f"INSERT INTO {table} ({', '.join(columns)}) VALUES " + ', '.join([placeholders] * len(rows)),
+        [value for row in rows for value in row],
+    )
+
+
 def handle_db_error(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
@@ -59,3 +199,4 @@ def handle_db_error(f):
 
 
 login_manager = LoginManager()
+db_pool = ConnectionPool()
@@ -0,0 +1,558 @@
+"""
+Household backup and restore as gzip-compressed NDJSON. An export reads a
+household's tables from one read-only snapshot through an unbuffered cursor
+and writes one JSON line per row. An import creates a new household and
+loads the rows in archive order, remapping every ID: rows other rows
+reference are inserted one at a time and mapped through lastrowid, the
+rest go in multi-row INSERTs. Both run on a small per-process thread pool
+and record their progress in HouseholdArchiveJob, so any worker can report
+on a job while it runs.
+
+One JSON object per line:
+    {"format": "stocker-household", "version": 1, "household": {...}, "counts": {...}}
+    {"table": "Location", "row": {...}}
+    ...
+    {"end": true, "rows": N}
+"""
+import glob
+import gzip
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask import g
+
+from extensions import db_cursor, get_db, insert_rows, read_snapshot
+from password_hashing import placeholder_password_hash
+
+ARCHIVE_FORMAT = 'stocker-household'
+ARCHIVE_VERSION = 1
+FETCH_ROWS = 1000
+IMPORT_BATCH_ROWS = 1000
+PROGRESS_EVERY_ROWS = 5000
+# Everything ArchiveJobRunner writes, for prune()
+ARCHIVE_FILE_PATTERNS = ('household_job_*.ndjson.gz', 'household_job_*.ndjson.gz.part')
+
+JOB_EXPORT = 'export'
+JOB_IMPORT = 'import'
+
+JOB_SQL = """
+    SELECT JobID, Kind, HouseholdID, UserID, Status, CurrentTable, RowsDone, RowsTotal,
+           Error, CreatedAt, UpdatedAt
+    FROM HouseholdArchiveJob
+    WHERE JobID = %s
+"""
+
+CREATE_JOB_SQL = """
+    INSERT INTO HouseholdArchiveJob (Kind, HouseholdID, UserID) VALUES (%s, %s, %s)
+"""
+
+JOB_PROGRESS_SQL = """
+    UPDATE HouseholdArchiveJob
+    SET Status = %s, CurrentTable = %s, RowsDone = %s, RowsTotal = %s
+    WHERE JobID = %s
+"""
+
+JOB_FINISHED_SQL = """
+    UPDATE HouseholdArchiveJob
+    SET Status = %s, HouseholdID = %s, RowsDone = %s, Error = %s, CurrentTable = NULL
+    WHERE JobID = %s
+"""
+
+# (table, query) in restore order; every %s is the household. Archived
+# ledger rows come before the hot ones so restored IDs keep their order.
+EXPORT_QUERIES = (
+    ('BaseUnit', """
+        SELECT bu.UnitID, bu.MeasurementType, bu.Abbreviation
+        FROM BaseUnit bu
+        WHERE bu.UnitID IN (SELECT BaseUnitID FROM FoodItem WHERE HouseholdID = %s)
+    """),
+    ('Users', """
+        SELECT u.UserID, u.DisplayName
+        FROM Users u
+        WHERE u.UserID IN (
+            SELECT UserID FROM InventoryTransactionArchive WHERE HouseholdID = %s
+            UNION
+            SELECT UserID FROM InventoryTransaction WHERE HouseholdID = %s
+        )
+    """),
+    ('Location', """
+        SELECT LocationID, LocationName, IsArchived
+        FROM Location
+        WHERE HouseholdID = %s
+        ORDER BY LocationID
+    """),
+    ('FoodItem', """
+        SELECT FoodItemID, BaseUnitID, Name, Type, Category, PreferredPackageID, IsArchived
+        FROM FoodItem
+        WHERE HouseholdID = %s
+        ORDER BY FoodItemID
+    """),
+    ('Package', """
+        SELECT p.PackageID, p.FoodItemID, p.Label, p.BaseUnitAmt, p.IsArchived
+        FROM Package p
+        JOIN FoodItem fi ON fi.FoodItemID = p.FoodItemID
+        WHERE fi.HouseholdID = %s
+        ORDER BY p.PackageID
+    """),
+    ('StockLevel', """
+        SELECT sl.FoodItemID, sl.TargetLevel
+        FROM StockLevel sl
+        JOIN FoodItem fi ON fi.FoodItemID = sl.FoodItemID
+        WHERE fi.HouseholdID = %s
+    """),
+    ('PriceLog', """
+        SELECT pl.PackageID, pl.PriceTotal, pl.Store, pl.CreatedAt
+        FROM PriceLog pl
+        JOIN Package p ON p.PackageID = pl.PackageID
+        JOIN FoodItem fi ON fi.FoodItemID = p.FoodItemID
+        WHERE fi.HouseholdID = %s
+        ORDER BY pl.PriceLogID
+    """),
+    ('LatestPrice', """
+        SELECT lp.PackageID, lp.PriceTotal, lp.Store, lp.CreatedAt
+        FROM LatestPrice lp
+        JOIN Package p ON p.PackageID = lp.PackageID
+        JOIN FoodItem fi ON fi.FoodItemID = p.FoodItemID
+        WHERE fi.HouseholdID = %s
+    """),
+    ('InventoryTransaction', """
+        SELECT TransactionID, FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType,
+               CreatedAt, ExpirationDate, TransferGroupID
+        FROM InventoryTransactionArchive
+        WHERE HouseholdID = %s
+        ORDER BY TransactionID
+    """),
+    ('InventoryTransaction', """
+        SELECT TransactionID, FoodItemID, LocationID, UserID, QtyInBaseUnits, TransactionType,
+               CreatedAt, ExpirationDate, TransferGroupID
+        FROM InventoryTransaction
+        WHERE HouseholdID = %s
+        ORDER BY TransactionID
+    """),
+    ('StockBalance', """
+        SELECT sb.FoodItemID, sb.LocationID, sb.Qty
+        FROM StockBalance sb
+        JOIN FoodItem fi ON fi.FoodItemID = sb.FoodItemID
+        WHERE fi.HouseholdID = %s
+    """),
+    ('StockLot', """
+        SELECT lot.FoodItemID, lot.LocationID, lot.ExpirationDate, lot.RemainingQty, lot.CreatedAt
+        FROM StockLot lot
+        JOIN FoodItem fi ON fi.FoodItemID = lot.FoodItemID
+        WHERE fi.HouseholdID = %s
+        ORDER BY lot.LotID
+    """),
+    ('ShoppingList', """
+        SELECT ShoppingListID, Status, LastUpdated, TotalCost, Version
+        FROM ShoppingList
+        WHERE HouseholdID = %s
+        ORDER BY ShoppingListID
+    """),
+    ('ShoppingListItem', """
+        SELECT sli.ShoppingListID, sli.FoodItemID, sli.LocationID, sli.PackageID,
+               sli.NeededQty, sli.PurchasedQty, sli.TotalPrice, sli.Status
+        FROM ShoppingListItem sli
+        JOIN ShoppingList sl ON sl.ShoppingListID = sli.ShoppingListID
+        WHERE sl.HouseholdID = %s
+        ORDER BY sli.ShoppingListItemID
+    """),
+)
+
+# Restored tables: (own ID column to remap or None, inserted columns,
+# {column: table whose remapped ID it holds}). HouseholdID is always the
+# new household. BaseUnit is matched to existing units rather than
+# inserted, and Users become archived placeholders keeping DisplayName so
+# history still shows who did what.
+IMPORT_TABLES = {
+    'Users': ('UserID', ('HouseholdID', 'UserName', 'DisplayName', 'RoleName', 'PasswordHash', 'IsArchived'), {}),
+    'Location': ('LocationID', ('HouseholdID', 'LocationName', 'IsArchived'), {}),
+    'FoodItem': (
+        'FoodItemID',
+        ('BaseUnitID', 'HouseholdID', 'Name', 'Type', 'Category', 'IsArchived'),
+        {'BaseUnitID': 'BaseUnit'},
+    ),
+    'Package': ('PackageID', ('FoodItemID', 'Label', 'BaseUnitAmt', 'IsArchived'), {'FoodItemID': 'FoodItem'}),
+    'StockLevel': (None, ('FoodItemID', 'TargetLevel'), {'FoodItemID': 'FoodItem'}),
+    'PriceLog': (None, ('PackageID', 'PriceTotal', 'Store', 'CreatedAt'), {'PackageID': 'Package'}),
+    'LatestPrice': (None, ('PackageID', 'PriceTotal', 'Store', 'CreatedAt'), {'PackageID': 'Package'}),
+    'InventoryTransaction': (
+        'TransactionID',
+        ('FoodItemID', 'LocationID', 'HouseholdID', 'UserID', 'QtyInBaseUnits', 'TransactionType',
+         'CreatedAt', 'ExpirationDate', 'TransferGroupID'),
+        {'FoodItemID': 'FoodItem', 'LocationID': 'Location', 'UserID': 'Users'},
+    ),
+    'StockBalance': (None, ('FoodItemID', 'LocationID', 'Qty'), {'FoodItemID': 'FoodItem', 'LocationID': 'Location'}),
+    'StockLot': (
+        None,
+        ('FoodItemID', 'LocationID', 'ExpirationDate', 'RemainingQty', 'CreatedAt'),
+        {'FoodItemID': 'FoodItem', 'LocationID': 'Location'},
+    ),
+    'ShoppingList': ('ShoppingListID', ('HouseholdID', 'Status', 'LastUpdated', 'TotalCost', 'Version'), {}),
+    'ShoppingListItem': (
+        None,
+        ('ShoppingListID', 'FoodItemID', 'LocationID', 'PackageID', 'NeededQty', 'PurchasedQty', 'TotalPrice', 'Status'),
+        {'ShoppingListID': 'ShoppingList', 'FoodItemID': 'FoodItem', 'LocationID': 'Location', 'PackageID': 'Package'},
+    ),
+}
+
+BASE_UNIT_SQL = """
+    SELECT UnitID FROM BaseUnit WHERE MeasurementType <=> %s AND Abbreviation <=> %s LIMIT 1
+"""
+
+
+class ArchiveError(Exception):
+    pass
+
+
+class ArchiveJobRunner:
+    """
+    Thread pool for archive jobs, HOUSEHOLD_ARCHIVE_WORKERS threads per
+    process. Like the password hasher it remembers the pid it started in
+    so forked gunicorn workers get their own threads. A job whose process
+    dies stays 'running'; its UpdatedAt stops moving. Archive files older
+    than HOUSEHOLD_ARCHIVE_KEEP_HOURS are pruned ahead of each new job.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._workers = 1
+        self.directory = os.path.join(tempfile.gettempdir(), 'stocker-archives')
+        self.keep_hours = 24.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._workers = max(1, int(app.config.get('HOUSEHOLD_ARCHIVE_WORKERS', 1)))
+        self.directory = app.config.get('HOUSEHOLD_ARCHIVE_DIR') or self.directory
+        self.keep_hours = float(app.config.get('HOUSEHOLD_ARCHIVE_KEEP_HOURS', self.keep_hours))
+        with self._lock:
+            self._shutdown()
+
+    def archive_path(self, job_id):
+        return os.path.join(self.directory, f'household_job_{int(job_id)}.ndjson.gz')
+
+    def upload_path(self, job_id):
+        return os.path.join(self.directory, f'household_job_{int(job_id)}.upload.ndjson.gz')
+
+    def submit(self, job_id):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._shutdown()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix='household-archive'
+                )
+                self._pid = os.getpid()
+            executor = self._executor
+        executor.submit(self.prune)
+        executor.submit(run_job, job_id)
+
+    def prune(self, keep_hours=None):
+        """
+        Delete exports, leftover uploads and abandoned .part files last
+        written more than keep_hours ago; returns how many were removed.
+        Downloads of a pruned export get a 410.
+        """
+        keep_hours = self.keep_hours if keep_hours is None else keep_hours
+        cutoff = time.time() - keep_hours * 3600
+        removed = 0
+        for pattern in ARCHIVE_FILE_PATTERNS:
+            for path in glob.glob(os.path.join(self.directory, pattern)):
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except FileNotFoundError:
+                    # Another worker pruned or finished it first
+                    pass
+        return removed
+
+    def _shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        self._executor = None
+        self._pid = None
+
+
+archive_jobs = ArchiveJobRunner()
+
+
+def create_job(cursor, kind, household_id, user_id):
+    """Record a queued job; it starts once the request commits."""
+    cursor.execute(CREATE_JOB_SQL, (kind, household_id, user_id))
+    job_id = cursor.lastrowid
+    g.setdefault('queued_archive_jobs', []).append(job_id)
+    return job_id
+
+
+def start_queued_archive_jobs():
+    """after_commit hook for init_request_db."""
+    for job_id in g.pop('queued_archive_jobs', ()):
+        archive_jobs.submit(job_id)
+
+
+def get_job(job_id):
+    with db_cursor() as cursor:
+        cursor.execute(JOB_SQL, (job_id,))
+        return cursor.fetchone()
+
+
+def run_job(job_id):
+    job = get_job(job_id)
+    if job is None:
+        return
+    progress = _Progress(job_id)
+    try:
+        if job['Kind'] == JOB_EXPORT:
+            household_id = job['HouseholdID']
+            rows = export_household(household_id, archive_jobs.archive_path(job_id), progress)
+        else:
+            path = archive_jobs.upload_path(job_id)
+            try:
+                household_id, rows = import_household(path, progress)
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+    except Exception as e:
+        progress.finish('failed', job['HouseholdID'], progress.rows_done, str(e)[:255])
+        return
+    progress.finish('done', household_id, rows, None)
+
+
+class _Progress:
+    """Writes a job's progress on its own connection every PROGRESS_EVERY_ROWS rows."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.rows_done = 0
+        self.rows_total = None
+        self._reported = None
+
+    def update(self, table, rows_done, force=False):
+        self.rows_done = rows_done
+        if not force and self._reported is not None and rows_done - self._reported < PROGRESS_EVERY_ROWS:
+            return
+        self._reported = rows_done
+        with db_cursor() as cursor:
+            cursor.execute(JOB_PROGRESS_SQL, ('running', table, rows_done, self.rows_total, self.job_id))
+
+    def finish(self, status, household_id, rows_done, error):
+        with db_cursor() as cursor:
+            cursor.execute(JOB_FINISHED_SQL, (status, household_id, rows_done, error, self.job_id))
+
+
+def export_household(household_id, path, progress):
+    """Write the household's archive to path; returns the number of rows written."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = path + '.part'
+    written = 0
+    try:
+        with read_snapshot(buffered=False) as cursor, gzip.open(partial, 'wt', encoding='utf-8') as out:
+            cursor.execute("SELECT HouseholdName FROM Household WHERE HouseholdID = %s", (household_id,))
+            household = cursor.fetchall()
+            if not household:
+                raise ArchiveError(f'Household {household_id} not found')
+
+            counts = {}
+            for table, query in EXPORT_QUERIES:
+                cursor.execute(f"SELECT COUNT(*) AS total FROM ({query}) t", (household_id,) * query.count('%s'))
+                counts[table] = counts.get(table, 0) + cursor.fetchall()[0]['total']
+            progress.rows_total = sum(counts.values())
+            progress.update(None, 0, force=True)
+
+            out.write(_line({
+                'format': ARCHIVE_FORMAT,
+                'version': ARCHIVE_VERSION,
+                'exported_at': datetime.utcnow(),
+                'household': household[0],
+                'counts': counts,
+            }))
+            for table, query in EXPORT_QUERIES:
+                progress.update(table, written, force=True)
+                cursor.execute(query, (household_id,) * query.count('%s'))
+                while True:
+                    rows = cursor.fetchmany(FETCH_ROWS)
+                    if not rows:
+                        break
+                    out.write(''.join(_line({'table': table, 'row': row}) for row in rows))
+                    written += len(rows)
+                    progress.update(table, written)
+            out.write(_line({'end': True, 'rows': written}))
+    except Exception:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    os.replace(partial, path)
+    return written
+
+
+def import_household(path, progress):
+    """
+    Load an archive into a new household in one transaction. Returns
+    (household_id, rows); nothing is kept if any row fails.
+    """
+    conn = get_db()
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as archive:
+            header = json.loads(archive.readline() or 'null')
+            if not isinstance(header, dict) or header.get('format') != ARCHIVE_FORMAT:
+                raise ArchiveError('Not a household archive')
+            if header.get('version') != ARCHIVE_VERSION:
+                raise ArchiveError(f"Unsupported archive version {header.get('version')}")
+            progress.rows_total = sum((header.get('counts') or {}).values())
+            progress.update(None, 0, force=True)
+
+            loader = _Loader(cursor, header.get('household') or {})
+            finished = False
+            for line in archive:
+                record = json.loads(line)
+                if record.get('end'):
+                    finished = True
+                    break
+                loader.add(record['table'], record['row'])
+                progress.update(loader.table, loader.rows)
+            if not finished:
+                raise ArchiveError('Archive is truncated')
+            loader.finish()
+        conn.commit()
+        return loader.household_id, loader.rows
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+class _Loader:
+    """
+    Buffers one table's rows and inserts them IMPORT_BATCH_ROWS at a time.
+    Rows are written in archive order, so a transfer_in leg's group head
+    is always mapped before the leg itself is inserted.
+    """
+
+    def __init__(self, cursor, household):
+        self.cursor = cursor
+        self.maps = {table: {} for table in ('BaseUnit', *IMPORT_TABLES)}
+        self.table = None
+        self.pending = []
+        self.rows = 0
+        self.preferred_packages = []
+        self.household_id = _create_household(cursor, household.get('HouseholdName') or 'Imported Household')
+
+    def add(self, table, row):
+        if table not in self.maps:
+            raise ArchiveError(f'Unknown table {table}')
+        if table != self.table or len(self.pending) >= IMPORT_BATCH_ROWS:
+            self._flush()
+            self.table = table
+        self.pending.append(row)
+        self.rows += 1
+
+    def finish(self):
+        self._flush()
+        if self.preferred_packages:
+            self.cursor.executemany(
+                "UPDATE FoodItem SET PreferredPackageID = %s WHERE FoodItemID = %s",
+                [(self._mapped('Package', package_id), food_item_id) for food_item_id, package_id in self.preferred_packages],
+            )
+
+    def _flush(self):
+        rows, table = self.pending, self.table
+        self.pending = []
+        if not rows:
+            return
+        if table == 'BaseUnit':
+            for row in rows:
+                self.cursor.execute(BASE_UNIT_SQL, (row['MeasurementType'], row['Abbreviation']))
+                unit = self.cursor.fetchone()
+                if unit is None:
+                    raise ArchiveError(f"No base unit {row['Abbreviation']} ({row['MeasurementType']}) in this database")
+                self.maps['BaseUnit'][row['UnitID']] = unit['UnitID']
+            return
+
+        id_column, columns, refs = IMPORT_TABLES[table]
+        batch = []
+        for row in rows:
+            prepared = self._prepare(table, row)
+            values = [
+                self.household_id if column == 'HouseholdID'
+                else self._mapped(refs[column], prepared[column]) if column in refs and prepared.get(column) is not None
+                else prepared.get(column)
+                for column in columns
+            ]
+            if not self._referenced(table, id_column, row):
+                batch.append(values)
+                continue
+
+            # Rows other rows point at go in alone, so lastrowid is their new
+            # ID; a multi-row INSERT's IDs need not be consecutive.
+            insert_rows(self.cursor, table, columns, batch)
+            batch = []
+            insert_rows(self.cursor, table, columns, [values])
+            new_id = self.cursor.lastrowid
+            self.maps[table][row[id_column]] = new_id
+            if table == 'InventoryTransaction':
+                self.cursor.execute(
+                    "UPDATE InventoryTransaction SET TransferGroupID = TransactionID WHERE TransactionID = %s",
+                    (new_id,),
+                )
+            elif table == 'FoodItem' and row.get('PreferredPackageID') is not None:
+                self.preferred_packages.append((new_id, row['PreferredPackageID']))
+        insert_rows(self.cursor, table, columns, batch)
+
+    @staticmethod
+    def _referenced(table, id_column, row):
+        if id_column is None:
+            return False
+        # Of the ledger, only transfer_out legs (the group heads) are referenced again
+        return table != 'InventoryTransaction' or row.get('TransferGroupID') == row[id_column]
+
+    def _prepare(self, table, row):
+        if table == 'Users':
+            return {
+                'UserName': f"imported_{self.household_id}_{row['UserID']}",
+                'DisplayName': row.get('DisplayName') or 'Imported User',
+                'RoleName': 'system',
+                'PasswordHash': placeholder_password_hash(),
+                'IsArchived': 1,
+            }
+        if table == 'InventoryTransaction' and row.get('TransferGroupID') is not None:
+            # Group heads are filled in after insert; an unknown group becomes NULL
+            group_id = row['TransferGroupID']
+            row = dict(row, TransferGroupID=None)
+            if group_id != row['TransactionID'] and group_id in self.maps['InventoryTransaction']:
+                row['TransferGroupID'] = self.maps['InventoryTransaction'][group_id]
+        return row
+
+    def _mapped(self, table, old_id):
+        try:
+            return self.maps[table][old_id]
+        except KeyError:
+            raise ArchiveError(f'{table} {old_id} is referenced but not in the archive') from None
+
+
+def _create_household(cursor, name):
+    while True:
+        join_code = str(uuid.uuid4())[:6].upper()
+        cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (join_code,))
+        if not cursor.fetchone():
+            break
+    cursor.execute("""
+        INSERT INTO Household (HouseholdName, JoinCode)
+        VALUES (%s, %s)
+    """, (name, join_code))
+    return cursor.lastrowid
+
+
+def _line(record):
+    return json.dumps(record, default=str, separators=(',', ':')) + '\n'
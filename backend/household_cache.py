@@ -0,0 +1,231 @@
+"""
+In-process cache for household-scoped reads. Entries are keyed by
+(household, CacheGeneration, endpoint, params). Handlers that write queue the
+household with mark_household_changed(), and bump_household_generations()
+increments Household.CacheGeneration in the same transaction right before
+the request commits. A bump makes every cached result for that household
+unreachable in every worker without any cross-process messaging. The
+generation and the cached computation are read from one snapshot, so an
+entry can never hold data newer or older than its key. The same generation
+backs the ETags of household_etag().
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+
+from flask import g, jsonify, request, make_response
+
+from extensions import db_cursor, read_snapshot
+
+GENERATION_SQL = """
+    SELECT HouseholdID, CacheGeneration FROM Household WHERE HouseholdID = %s
+"""
+
+FOOD_ITEM_GENERATION_SQL = """
+    SELECT h.HouseholdID, h.CacheGeneration
+    FROM FoodItem fi
+    JOIN Household h ON h.HouseholdID = fi.HouseholdID
+    WHERE fi.FoodItemID = %s
+"""
+
+SHOPPING_LIST_GENERATION_SQL = """
+    SELECT h.HouseholdID, h.CacheGeneration
+    FROM ShoppingList sl
+    JOIN Household h ON h.HouseholdID = sl.HouseholdID
+    WHERE sl.ShoppingListID = %s
+"""
+
+BUMP_GENERATIONS_SQL = """
+    UPDATE Household
+    SET CacheGeneration = CacheGeneration + 1
+    WHERE HouseholdID IN ({placeholders})
+"""
+
+BUMP_ALL_GENERATIONS_SQL = """
+    UPDATE Household SET CacheGeneration = CacheGeneration + 1
+"""
+
+
+class HouseholdCache:
+    """
+    LRU over serialized-size estimates, bounded by HOUSEHOLD_CACHE_MAX_BYTES
+    (0 disables caching). Storing a newer generation for a household drops
+    its older entries right away instead of waiting for them to age out.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_household = {}
+        self._size = 0
+        self._max_bytes = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._max_bytes = max(0, int(app.config.get('HOUSEHOLD_CACHE_MAX_BYTES', 0)))
+        self.clear()
+
+    @property
+    def enabled(self):
+        return self._max_bytes > 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, value, size):
+        if size > self._max_bytes:
+            return
+        household_id, generation = key[0], key[1]
+        with self._lock:
+            self._discard(key)
+            keys = self._by_household.setdefault(household_id, set())
+            for stale in [k for k in keys if k[1] < generation]:
+                self._discard(stale)
+            self._entries[key] = (value, size)
+            keys.add(key)
+            self._size += size
+            while self._size > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_household.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self._size, 'max_bytes': self._max_bytes}
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry[1]
+        keys = self._by_household.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_household[key[0]]
+
+
+household_cache = HouseholdCache()
+
+
+def cached_household_read(household_id, endpoint, params, compute):
+    """
+    Return compute(cursor) for this household, served from the cache while
+    the household's generation is unchanged. compute must only read and
+    must return something JSON-serializable.
+    """
+    with read_snapshot() as cursor:
+        cursor.execute(GENERATION_SQL, (household_id,))
+        row = cursor.fetchone()
+        if row is None or not household_cache.enabled:
+            return compute(cursor)
+
+        key = (int(household_id), row['CacheGeneration'], endpoint, tuple(params))
+        entry = household_cache.get(key)
+        if entry is not None:
+            return entry[0]
+
+        value = compute(cursor)
+        household_cache.put(key, value, len(json.dumps(value, default=str)))
+        return value
+
+
+def household_etag(generation_sql=GENERATION_SQL, key_arg='household_id'):
+    """
+    Conditional GET for handlers whose body only depends on one household's
+    data. key_arg is read from the view args, then the query string, and
+    generation_sql maps it to (HouseholdID, CacheGeneration). Another
+    household's data gets a 403 before any ETag comparison, so 304s can't
+    be used to probe for foreign rows; otherwise a matching If-None-Match
+    gets a 304 before the handler runs any of its queries.
+    Goes below @handle_db_error.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = kwargs.get(key_arg, request.args.get(key_arg))
+            if key in (None, ''):
+                return f(*args, **kwargs)
+            with db_cursor() as cursor:
+                cursor.execute(generation_sql, (key,))
+                row = cursor.fetchone()
+            if not row:
+                return f(*args, **kwargs)
+
+            user = getattr(g, 'current_user', None)
+            if not user:
+                return jsonify({'error': 'Not authenticated'}), 401
+            if user.get('HouseholdID') != row['HouseholdID']:
+                return jsonify({'error': 'Forbidden'}), 403
+
+            etag = _household_etag(row['HouseholdID'], row['CacheGeneration'])
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            # Let the browser keep the body but revalidate on every use
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
+
+
+def _household_etag(household_id, generation):
+    # The viewer's household is part of the tag so leaving a household
+    # doesn't keep revalidating its data, and the date covers endpoints
+    # that compare against CURDATE().
+    user = getattr(g, 'current_user', None) or {}
+    raw = '|'.join(str(part) for part in (
+        household_id, generation, user.get('HouseholdID'), date.today().isoformat(), request.full_path,
+    ))
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def mark_household_changed(household_id):
+    """Queue a household whose cached reads this request invalidates."""
+    if household_id is None:
+        return
+    changed = g.setdefault('changed_households', set())
+    changed.add(int(household_id))
+
+
+def bump_household_generations(conn):
+    """before_commit hook for init_request_db: bump everything queued."""
+    changed = g.pop('changed_households', None)
+    if not changed:
+        return
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    try:
+        bump_generations(cursor, changed)
+    finally:
+        cursor.close()
+
+
+def bump_generations(cursor, household_ids=None):
+    """Bump the given households, or every household when None."""
+    if household_ids is None:
+        cursor.execute(BUMP_ALL_GENERATIONS_SQL)
+        return
+    # Sorted so concurrent bumps lock Household rows in the same order
+    household_ids = sorted({int(household_id) for household_id in household_ids})
+    if not household_ids:
+        return
+    placeholders = ', '.join(['%s'] * len(household_ids))
+    cursor.execute(BUMP_GENERATIONS_SQL.format(placeholders=placeholders), tuple(household_ids))
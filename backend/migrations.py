@@ -0,0 +1,156 @@
+import os
+import re
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'SQL', 'migrations')
+
+MIGRATION_FILE_RE = re.compile(r'^(\d{4})_([a-z0-9_]+)\.(up|down)\.sql$')
+
+TRACKING_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS SchemaMigration (
+        Version CHAR(4) PRIMARY KEY,
+        Name VARCHAR(100) NOT NULL,
+        AppliedAt DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class MigrationError(Exception):
+    pass
+
+
+def discover_migrations(directory=MIGRATIONS_DIR):
+    """Return [{'version', 'name', 'up', 'down'}] sorted by version."""
+    found = {}
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        version, name, direction = match.groups()
+        entry = found.setdefault(version, {'version': version, 'name': name, 'up': None, 'down': None})
+        if entry['name'] != name:
+            raise MigrationError(f'Migration {version} has files with different names')
+        entry[direction] = os.path.join(directory, filename)
+
+    migrations = [found[version] for version in sorted(found)]
+    for migration in migrations:
+        if not migration['up'] or not migration['down']:
+            raise MigrationError(f"Migration {migration['version']}_{migration['name']} needs both up and down scripts")
+    return migrations
+
+
+def split_sql(script):
+    """
+    Split a script into statements, honouring the mysql client's DELIMITER
+    directive so the same files work in phpMyAdmin/mysql and here.
+    """
+    statements = []
+    delimiter = ';'
+    buffer = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not buffer and (not stripped or stripped.startswith('--')):
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(buffer).rstrip()
+            statement = statement[:-len(delimiter)].strip()
+            if statement:
+                statements.append(statement)
+            buffer = []
+    tail = '\n'.join(buffer).strip()
+    if tail:
+        statements.append(tail)
+    return statements
+
+
+def applied_versions(cursor):
+    cursor.execute(TRACKING_TABLE_SQL)
+    cursor.execute("SELECT Version FROM SchemaMigration ORDER BY Version")
+    return [row['Version'] for row in cursor.fetchall()]
+
+
+def _run_script(cursor, path):
+    with open(path, encoding='utf-8') as f:
+        for statement in split_sql(f.read()):
+            cursor.execute(statement)
+            if cursor.with_rows:
+                cursor.fetchall()
+
+
+def upgrade(conn, target=None, echo=print):
+    """Apply pending migrations up to and including `target` (default: all)."""
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    applied = set(applied_versions(cursor))
+    ran = []
+    for migration in discover_migrations():
+        if target is not None and migration['version'] > target:
+            break
+        if migration['version'] in applied:
+            continue
+        echo(f"Applying {migration['version']}_{migration['name']}")
+        # DDL auto-commits in MySQL, so each script is only as atomic as its
+        # statements; the tracking row is written last so a failed script is
+        # retried on the next run.
+        _run_script(cursor, migration['up'])
+        cursor.execute(
+            "INSERT INTO SchemaMigration (Version, Name) VALUES (%s, %s)",
+            (migration['version'], migration['name']),
+        )
+        conn.commit()
+        ran.append(migration['version'])
+    cursor.close()
+    return ran
+
+
+def downgrade(conn, steps=1, echo=print):
+    """Revert the `steps` most recently applied migrations."""
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    applied = applied_versions(cursor)
+    by_version = {m['version']: m for m in discover_migrations()}
+    reverted = []
+    for version in reversed(applied[-steps:] if steps > 0 else []):
+        migration = by_version.get(version)
+        if migration is None:
+            raise MigrationError(f'No scripts found for applied migration {version}')
+        echo(f"Reverting {migration['version']}_{migration['name']}")
+        _run_script(cursor, migration['down'])
+        cursor.execute("DELETE FROM SchemaMigration WHERE Version = %s", (version,))
+        conn.commit()
+        reverted.append(version)
+    cursor.close()
+    return reverted
+
+
+def status(cursor):
+    applied = set(applied_versions(cursor))
+    return [
+        {**migration, 'applied': migration['version'] in applied}
+        for migration in discover_migrations()
+    ]
+
+
+def check_query_plans(cursor, checks):
+    """
+    EXPLAIN every registered query. A table accessed with type=ALL and no
+    candidate index is a failure; type=ALL with candidate keys is only a
+    warning since the optimizer prefers scans on small development data.
+    """
+    failures = []
+    warnings = []
+    for check in checks:
+        cursor.execute(f"EXPLAIN {check['sql']}", check['params'])
+        for row in cursor.fetchall():
+            table = row.get('table') or ''
+            if row.get('type') != 'ALL':
+                continue
+            if table.startswith('<') or table in check['allow_full_scan']:
+                continue
+            message = f"{check['name']}: full scan of {table}"
+            if row.get('possible_keys'):
+                warnings.append(f"{message} (optimizer skipped {row['possible_keys']})")
+            else:
+                failures.append(message)
+    return failures, warnings
@@ -0,0 +1,193 @@
+"""
+Which household owns a food item or location. A food item or location never
+moves to another household, so a household's index, loaded lazily in one
+query, answers most access checks without touching the database. IDs the
+index doesn't know (created by another worker, or not this household's) are
+looked up in one query per check. Archiving a food item changes what the
+checks return, so handlers call invalidate_ownership() and the index is
+dropped once the request commits; other workers reload theirs after
+OWNERSHIP_CACHE_TTL seconds.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import g
+
+from extensions import db_cursor
+
+FOOD_ITEM = 'food_item'
+LOCATION = 'location'
+
+HOUSEHOLD_FOOD_ITEMS_SQL = """
+    SELECT 'food_item' AS Kind, FoodItemID AS EntityID, HouseholdID, IsArchived
+    FROM FoodItem
+    WHERE HouseholdID = %s
+"""
+
+HOUSEHOLD_LOCATIONS_SQL = """
+    SELECT 'location' AS Kind, LocationID AS EntityID, HouseholdID, 0 AS IsArchived
+    FROM Location
+    WHERE HouseholdID = %s
+"""
+
+FOOD_ITEMS_BY_ID_SQL = """
+    SELECT 'food_item' AS Kind, FoodItemID AS EntityID, HouseholdID, IsArchived
+    FROM FoodItem
+    WHERE FoodItemID IN ({placeholders})
+"""
+
+LOCATIONS_BY_ID_SQL = """
+    SELECT 'location' AS Kind, LocationID AS EntityID, HouseholdID, 0 AS IsArchived
+    FROM Location
+    WHERE LocationID IN ({placeholders})
+"""
+
+
+class OwnershipCache:
+    """LRU of per-household {(kind, id): is_archived} indexes with a TTL."""
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._indexes = OrderedDict()
+        self._max_households = 1000
+        self._ttl = 60.0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self._max_households = max(0, int(app.config.get('OWNERSHIP_CACHE_HOUSEHOLDS', 1000)))
+        self._ttl = float(app.config.get('OWNERSHIP_CACHE_TTL', 60))
+        self.clear()
+
+    def get(self, household_id):
+        with self._lock:
+            entry = self._indexes.get(household_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._indexes[household_id]
+                return None
+            self._indexes.move_to_end(household_id)
+            return entry[1]
+
+    def put(self, household_id, index):
+        if self._max_households == 0:
+            return
+        with self._lock:
+            self._indexes[household_id] = (time.monotonic() + self._ttl, index)
+            self._indexes.move_to_end(household_id)
+            while len(self._indexes) > self._max_households:
+                self._indexes.popitem(last=False)
+
+    def add(self, household_id, entries):
+        with self._lock:
+            entry = self._indexes.get(household_id)
+            if entry is not None:
+                entry[1].update(entries)
+
+    def discard(self, household_ids):
+        with self._lock:
+            for household_id in household_ids:
+                self._indexes.pop(household_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+ownership_cache = OwnershipCache()
+
+
+def check_ownership(household_id, food_item_ids=(), location_ids=(), include_archived=True):
+    """
+    Validate every ID a request names against household_id, in at most one
+    query. Returns (missing, foreign): sets of (kind, id) for IDs that don't
+    exist (or are archived food items, unless include_archived) and for IDs
+    owned by another household.
+    """
+    household_id = int(household_id)
+    wanted = {(FOOD_ITEM, int(i)) for i in food_item_ids} | {(LOCATION, int(i)) for i in location_ids}
+    if not wanted:
+        return set(), set()
+
+    index = ownership_cache.get(household_id)
+    if index is None:
+        index, owners = _load(household_id, wanted)
+        ownership_cache.put(household_id, index)
+    else:
+        unknown = {key for key in wanted if key not in index}
+        owners = _lookup(unknown) if unknown else {}
+        ownership_cache.add(household_id, {
+            key: archived for key, (owner, archived) in owners.items() if owner == household_id
+        })
+
+    missing, foreign = set(), set()
+    for key in wanted:
+        if key in index:
+            archived = index[key]
+        elif key in owners and owners[key][0] == household_id:
+            archived = owners[key][1]
+        elif key in owners:
+            foreign.add(key)
+            continue
+        else:
+            missing.add(key)
+            continue
+        if archived and not include_archived:
+            missing.add(key)
+    return missing, foreign
+
+
+def invalidate_ownership(household_id):
+    """Queue a household whose index is dropped after this request commits."""
+    if household_id is None:
+        return
+    g.setdefault('ownership_invalidations', set()).add(int(household_id))
+
+
+def flush_ownership_invalidations():
+    """after_commit hook for init_request_db."""
+    household_ids = g.pop('ownership_invalidations', None)
+    if household_ids:
+        ownership_cache.discard(household_ids)
+
+
+def _load(household_id, wanted):
+    """The household's whole index plus the owners of the requested IDs, in one query."""
+    branches = [HOUSEHOLD_FOOD_ITEMS_SQL, HOUSEHOLD_LOCATIONS_SQL]
+    params = [household_id, household_id]
+    lookup_sql, lookup_params = _lookup_query(wanted)
+    if lookup_sql:
+        branches.append(lookup_sql)
+        params.extend(lookup_params)
+
+    index, owners = {}, {}
+    with db_cursor() as cursor:
+        cursor.execute(' UNION '.join(branches), tuple(params))
+        for row in cursor.fetchall():
+            key = (row['Kind'], row['EntityID'])
+            owners[key] = (row['HouseholdID'], bool(row['IsArchived']))
+            if row['HouseholdID'] == household_id:
+                index[key] = bool(row['IsArchived'])
+    return index, owners
+
+
+def _lookup(keys):
+    sql, params = _lookup_query(keys)
+    with db_cursor() as cursor:
+        cursor.execute(sql, params)
+        return {
+            (row['Kind'], row['EntityID']): (row['HouseholdID'], bool(row['IsArchived']))
+            for row in cursor.fetchall()
+        }
+
+
+def _lookup_query(keys):
+    branches, params = [], []
+    for kind, template in ((FOOD_ITEM, FOOD_ITEMS_BY_ID_SQL), (LOCATION, LOCATIONS_BY_ID_SQL)):
+        ids = sorted(entity_id for key_kind, entity_id in keys if key_kind == kind)
+        if ids:
+            branches.append(template.format(placeholders=', '.join(['%s'] * len(ids))))
+            params.extend(ids)
+    return ' UNION '.join(branches), tuple(params)
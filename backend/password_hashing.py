@@ -0,0 +1,114 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
+
+import bcrypt
+from flask import jsonify
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt on a small per-process thread pool so login storms can only
+    occupy PASSWORD_HASH_WORKERS cores per worker. bcrypt releases the GIL
+    while it works, so request threads doing cheap reads keep running. At
+    most PASSWORD_HASH_QUEUE jobs wait behind the running ones; past that,
+    submit raises PasswordHasherBusy straight away instead of queueing
+    requests until they time out. Like the connection pool, it remembers
+    the pid it started in so forked gunicorn workers get their own threads.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._slots = None
+        self.rounds = 12
+        self._workers = 2
+        self._queue = 8
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        config = app.config
+        self.rounds = int(config.get('BCRYPT_ROUNDS', 12))
+        self._workers = max(1, int(config.get('PASSWORD_HASH_WORKERS', 2)))
+        self._queue = max(0, int(config.get('PASSWORD_HASH_QUEUE', 8)))
+        with self._lock:
+            self._shutdown()
+
+    def hash_password(self, password):
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        return self._submit(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check_password(self, password, password_hash):
+        """False for a wrong password or anything that isn't a bcrypt hash."""
+        if isinstance(password_hash, str):
+            password_hash = password_hash.encode('utf-8')
+        try:
+            return self._submit(bcrypt.checkpw, password.encode('utf-8'), password_hash)
+        except (ValueError, TypeError):
+            return False
+
+    def needs_rehash(self, password_hash):
+        """True when the hash was made with a different work factor than BCRYPT_ROUNDS."""
+        if isinstance(password_hash, bytes):
+            password_hash = password_hash.decode('utf-8', 'replace')
+        parts = (password_hash or '').split('$')
+        try:
+            return int(parts[2]) != self.rounds
+        except (IndexError, ValueError):
+            return False
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            if self._pid != os.getpid():
+                self._shutdown()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._workers, thread_name_prefix='bcrypt'
+                )
+                self._slots = threading.BoundedSemaphore(self._workers + self._queue)
+                self._pid = os.getpid()
+            executor, slots = self._executor, self._slots
+
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy('Too many password checks in progress')
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        return future.result()
+
+    def _shutdown(self):
+        if self._executor is not None and self._pid == os.getpid():
+            self._executor.shutdown(wait=False)
+        self._executor = None
+        self._slots = None
+        self._pid = None
+
+
+password_hasher = PasswordHasher()
+
+
+@lru_cache(maxsize=None)
+def placeholder_password_hash():
+    """Hash stored on placeholder accounts nobody logs into; computed once per process."""
+    return password_hasher.hash_password('deleted-user-placeholder')
+
+
+def reject_when_busy(f):
+    """Turns PasswordHasherBusy into a 503. Goes below @handle_db_error."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        try:
+            return f(*args, **kwargs)
+        except PasswordHasherBusy:
+            return jsonify({'error': 'Server is busy, try again shortly'}), 503, {'Retry-After': '1'}
+    return decorated_function
@@ -1,4 +1,4 @@
-from flask import jsonify, request, current_app, g
+from flask import jsonify, request, g, current_app
 from flask_login import (
     current_user,
     login_user as flask_login_user,
@@ -12,9 +12,17 @@ from extensions import (
     handle_db_error,
     login_manager,
 )
-import mysql.connector
+from household_cache import mark_household_changed
+from password_hashing import (
+    password_hasher,
+    placeholder_password_hash,
+    reject_when_busy,
+    PasswordHasherBusy,
+)
+from collections import OrderedDict
+import threading
+import time
 import uuid
-import bcrypt
 
 AUTH_EXEMPT_ENDPOINTS = {
     'auth.login_user',
@@ -50,26 +58,70 @@ def load_user(user_id):
     if not user_id:
         return None
     try:
-        user = _get_user_by_id(int(user_id))
+        user = _get_session_user(int(user_id))
     except (ValueError, TypeError):
         return None
     if not user:
         return None
     return AuthenticatedUser(user)
 
-def get_write_conn():
-    return mysql.connector.connect(
-        host=current_app.config['MYSQL_HOST'],
-        port=current_app.config['MYSQL_PORT'],
-        user=current_app.config['MYSQL_USER'],
-        password=current_app.config.get('MYSQL_PASSWORD') or '',
-        database=current_app.config['MYSQL_DATABASE'],
-        unix_socket=current_app.config.get('MYSQL_UNIX_SOCKET')
-    )
 
+# user_loader runs on every authenticated request, so the Users/Household row
+# is kept per process for SESSION_USER_CACHE_TTL seconds, at most
+# SESSION_USER_CACHE_LIMIT rows, least recently used dropped first. Handlers
+# that change it queue an eviction that runs after their commit; other
+# workers pick the change up when the TTL runs out.
+_session_users = OrderedDict()
+_session_users_lock = threading.Lock()
+_session_evictions = 0
+SESSION_USER_CACHE_LIMIT = 10000
+
+
+def _get_session_user(user_id: int):
+    ttl = current_app.config.get('SESSION_USER_CACHE_TTL', 0)
+    now = time.monotonic()
+    with _session_users_lock:
+        entry = _session_users.get(user_id)
+        if entry and entry[0] > now:
+            _session_users.move_to_end(user_id)
+            return dict(entry[1])
+        evictions = _session_evictions
+
+    user = _get_user_by_id(user_id)
+    if not user or ttl <= 0:
+        return user
+    with _session_users_lock:
+        # An eviction that ran while we were reading may cover this row
+        if evictions == _session_evictions:
+            _session_users[user_id] = (now + ttl, dict(user))
+            _session_users.move_to_end(user_id)
+            while len(_session_users) > SESSION_USER_CACHE_LIMIT:
+                _session_users.popitem(last=False)
+    return user
+
+
+def evict_session_users(user_ids=(), household_ids=()):
+    """Drop cached session rows for these users and every member of these households, after commit."""
+    g.setdefault('evicted_user_ids', set()).update(int(u) for u in user_ids if u is not None)
+    g.setdefault('evicted_household_ids', set()).update(int(h) for h in household_ids if h is not None)
+
+
+def flush_session_evictions():
+    """after_commit hook for init_request_db."""
+    global _session_evictions
+    user_ids = g.pop('evicted_user_ids', None) or set()
+    household_ids = g.pop('evicted_household_ids', None) or set()
+    if not user_ids and not household_ids:
+        return
+    with _session_users_lock:
+        _session_evictions += 1
+        for cached_id, (_, row) in list(_session_users.items()):
+            if cached_id in user_ids or row.get('HouseholdID') in household_ids:
+                del _session_users[cached_id]
 
 @document_api_route(bp, 'post', '/login', 'Login user', 'Validate user credentials')
 @handle_db_error
+@reject_when_busy
 def login_user():
     data = request.get_json() or {}
     username = data.get('username')
@@ -103,15 +155,19 @@ def login_user():
             return jsonify({'error': 'Invalid username or password'}), 401
         
         # Verify password using bcrypt
-        try:
-            password_hash = user["PasswordHash"]
-            if isinstance(password_hash, str):
-                password_hash = password_hash.encode('utf-8')
-            if not bcrypt.checkpw(password.encode('utf-8'), password_hash):
-                return jsonify({'error': 'Invalid username or password'}), 401
-        except (ValueError, TypeError):
+        if not password_hasher.check_password(password, user["PasswordHash"]):
             return jsonify({'error': 'Invalid username or password'}), 401
 
+        # Move the stored hash to the current BCRYPT_ROUNDS while we have the password
+        if password_hasher.needs_rehash(user["PasswordHash"]):
+            try:
+                cursor.execute(
+                    "UPDATE Users SET PasswordHash=%s WHERE UserID=%s",
+                    (password_hasher.hash_password(password), user["UserID"]),
+                )
+            except PasswordHasherBusy:
+                pass  # the next login tries again
+
     flask_login_user(AuthenticatedUser(user), remember=remember)
 
     return jsonify({
@@ -121,6 +177,7 @@ def login_user():
 
 @document_api_route(bp, 'post', '/register', 'Register new user', 'Create user and automatically create household if no join_code provided') 
 @handle_db_error
+@reject_when_busy
 def register_user():
     data = request.get_json() or {}
     username = data.get('username')
@@ -132,72 +189,62 @@ def register_user():
     if not username or not display_name or not password:
         return jsonify({'error': 'Username, display name, and password required'}), 400
 
-    conn = get_write_conn()
-    cursor = conn.cursor(dictionary=True)
+    with db_cursor() as cursor:
+        # check if username exists
+        cursor.execute("SELECT UserID FROM Users WHERE UserName=%s", (username,))
+        if cursor.fetchone():
+            return jsonify({'error': 'Username already exists'}), 409
 
-    # check if username exists
-    cursor.execute("SELECT UserID FROM Users WHERE UserName=%s", (username,))
-    if cursor.fetchone():
-        cursor.close()
-        conn.close()
-        return jsonify({'error': 'Username already exists'}), 409
+        # Hash password using bcrypt
+        password_hash = password_hasher.hash_password(password)
 
-    # Hash password using bcrypt
-    password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-    
-    household_id = None
-    role = 'member'
-    
-    # If joining existing household
-    if join_code:
-        cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (join_code,))
-        h = cursor.fetchone()
-        if not h:
-            cursor.close()
-            conn.close()
-            return jsonify({'error': 'Invalid join code'}), 404
-        household_id = h["HouseholdID"]
+        household_id = None
         role = 'member'
-    else:
-        # Auto-create household if no join_code
-        # Generate unique join code
-        while True:
-            new_join_code = str(uuid.uuid4())[:6].upper()
-            cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (new_join_code,))
-            if not cursor.fetchone():
-                break
-        
-        # Use display name for household name
-        household_name = f"{display_name}'s Household"
-        
-        # Create household
-        cursor.execute("""
-            INSERT INTO Household (HouseholdName, JoinCode)
-            VALUES (%s, %s)
-        """, (household_name, new_join_code))
-        
-        household_id = cursor.lastrowid
-        role = 'owner'
-    
-    # Insert new user
-    cursor.execute("""
-        INSERT INTO Users (HouseholdID, UserName, DisplayName, RoleName, PasswordHash, IsArchived)
-        VALUES (%s, %s, %s, %s, %s, 0)
-    """, (household_id, username, display_name, role, password_hash))
 
-    conn.commit()
+        # If joining existing household
+        if join_code:
+            cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (join_code,))
+            h = cursor.fetchone()
+            if not h:
+                return jsonify({'error': 'Invalid join code'}), 404
+            household_id = h["HouseholdID"]
+            role = 'member'
+        else:
+            # Auto-create household if no join_code
+            # Generate unique join code
+            while True:
+                new_join_code = str(uuid.uuid4())[:6].upper()
+                cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (new_join_code,))
+                if not cursor.fetchone():
+                    break
+
+            # Use display name for household name
+            household_name = f"{display_name}'s Household"
+
+            # Create household
+            cursor.execute("""
+                INSERT INTO Household (HouseholdName, JoinCode)
+                VALUES (%s, %s)
+            """, (household_name, new_join_code))
 
-    # Get user info
-    cursor.execute("""
-        SELECT u.UserID, u.UserName, u.DisplayName, u.RoleName, u.HouseholdID, h.HouseholdName, h.JoinCode
-        FROM Users u
-        LEFT JOIN Household h ON u.HouseholdID = h.HouseholdID
-        WHERE u.UserName=%s
-    """, (username,))
-    user = cursor.fetchone()
+            household_id = cursor.lastrowid
+            role = 'owner'
+
+        # Insert new user
+        cursor.execute("""
+            INSERT INTO Users (HouseholdID, UserName, DisplayName, RoleName, PasswordHash, IsArchived)
+            VALUES (%s, %s, %s, %s, %s, 0)
+        """, (household_id, username, display_name, role, password_hash))
+        mark_household_changed(household_id)
 
-    cursor.close()
-    conn.close()
+        # Get user info
+        cursor.execute("""
+            SELECT u.UserID, u.UserName, u.DisplayName, u.RoleName, u.HouseholdID, h.HouseholdName, h.JoinCode
+            FROM Users u
+            LEFT JOIN Household h ON u.HouseholdID = h.HouseholdID
+            WHERE u.UserName=%s
+        """, (username,))
+        user = cursor.fetchone()
 
     flask_login_user(AuthenticatedUser(user), remember=remember)
 
@@ -235,57 +282,50 @@ def join_household():
     if not user_id or not join_code:
         return jsonify({"error": "user_id and join_code required"}), 400
 
-    conn = get_write_conn()
-    cursor = conn.cursor(dictionary=True)
-
-    # validate household
-    cursor.execute("SELECT HouseholdID, HouseholdName FROM Household WHERE JoinCode=%s", (join_code,))
-    h = cursor.fetchone()
-    if not h:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "Invalid join code"}), 404
-
-    # check if user is already in this household
-    cursor.execute("SELECT HouseholdID FROM Users WHERE UserID=%s", (user_id,))
-    u = cursor.fetchone()
-
-    if u and u["HouseholdID"] == h["HouseholdID"]:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "You are already in this household"}), 400
-    
-    # If user is owner of old household, promote first member to owner
-    old_household_id = u.get("HouseholdID") if u else None
-    if old_household_id:
-        cursor.execute("SELECT RoleName FROM Users WHERE UserID=%s", (user_id,))
-        old_user_info = cursor.fetchone()
-        if old_user_info and old_user_info.get("RoleName") == "owner":
-            cursor.execute("""
-                SELECT UserID FROM Users 
-                WHERE HouseholdID=%s AND UserID!=%s AND IsArchived=0
-                LIMIT 1
-            """, (old_household_id, user_id))
-            other_member = cursor.fetchone()
-            if other_member:
-                cursor.execute("UPDATE Users SET RoleName='owner' WHERE UserID=%s", (other_member["UserID"],))
-    
-    # update user - set role to member when joining
-    cursor.execute("""
-        UPDATE Users
-        SET HouseholdID=%s, RoleName='member'
-        WHERE UserID=%s
-    """, (h["HouseholdID"], user_id))
+    with db_cursor() as cursor:
+        # validate household
+        cursor.execute("SELECT HouseholdID, HouseholdName FROM Household WHERE JoinCode=%s", (join_code,))
+        h = cursor.fetchone()
+        if not h:
+            return jsonify({"error": "Invalid join code"}), 404
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        # check if user is already in this household
+        cursor.execute("SELECT HouseholdID FROM Users WHERE UserID=%s", (user_id,))
+        u = cursor.fetchone()
 
-    return jsonify({
-        "message": "Joined household successfully",
-        "household_id": h["HouseholdID"],
-        "household_name": h["HouseholdName"]
-    }), 200
+        if u and u["HouseholdID"] == h["HouseholdID"]:
+            return jsonify({"error": "You are already in this household"}), 400
+
+        # If user is owner of old household, promote first member to owner
+        old_household_id = u.get("HouseholdID") if u else None
+        if old_household_id:
+            cursor.execute("SELECT RoleName FROM Users WHERE UserID=%s", (user_id,))
+            old_user_info = cursor.fetchone()
+            if old_user_info and old_user_info.get("RoleName") == "owner":
+                cursor.execute("""
+                    SELECT UserID FROM Users 
+                    WHERE HouseholdID=%s AND UserID!=%s AND IsArchived=0
+                    LIMIT 1
+                """, (old_household_id, user_id))
+                other_member = cursor.fetchone()
+                if other_member:
+                    cursor.execute("UPDATE Users SET RoleName='owner' WHERE UserID=%s", (other_member["UserID"],))
+
+        # update user - set role to member when joining
+        cursor.execute("""
+            UPDATE Users
+            SET HouseholdID=%s, RoleName='member'
+            WHERE UserID=%s
+        """, (h["HouseholdID"], user_id))
+        mark_household_changed(old_household_id)
+        mark_household_changed(h["HouseholdID"])
+        evict_session_users([user_id], [old_household_id])
+
+        return jsonify({
+            "message": "Joined household successfully",
+            "household_id": h["HouseholdID"],
+            "household_name": h["HouseholdName"]
+        }), 200
 
 
 @document_api_route(
@@ -302,84 +342,77 @@ def create_household():
     if not user_id:
         return jsonify({"error": "user_id required"}), 400
 
-    conn = get_write_conn()
-    cursor = conn.cursor(dictionary=True)
-
-    # check if user exists
-    cursor.execute("""
-        SELECT UserID, HouseholdID, DisplayName
-        FROM Users
-        WHERE UserID=%s AND IsArchived=0
-    """, (user_id,))
-    user = cursor.fetchone()
-
-    if not user:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "User not found"}), 404
-
-    # If user is owner of old household, promote first member to owner
-    old_household_id = user.get("HouseholdID")
-    if old_household_id:
-        cursor.execute("SELECT RoleName FROM Users WHERE UserID=%s", (user_id,))
-        old_user_info = cursor.fetchone()
-        if old_user_info and old_user_info.get("RoleName") == "owner":
-            cursor.execute("""
-                SELECT UserID FROM Users 
-                WHERE HouseholdID=%s AND UserID!=%s AND IsArchived=0
-                LIMIT 1
-            """, (old_household_id, user_id))
-            other_member = cursor.fetchone()
-            if other_member:
-                cursor.execute("UPDATE Users SET RoleName='owner' WHERE UserID=%s", (other_member["UserID"],))
-
-    # generate unique join code
-    while True:
-        join_code = str(uuid.uuid4())[:6].upper()
-        cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (join_code,))
-        if not cursor.fetchone():
-            break  
+    with db_cursor() as cursor:
+        # check if user exists
+        cursor.execute("""
+            SELECT UserID, HouseholdID, DisplayName
+            FROM Users
+            WHERE UserID=%s AND IsArchived=0
+        """, (user_id,))
+        user = cursor.fetchone()
 
-    # Use provided name or generate default name
-    if not household_name or household_name.strip() == "":
-        household_name = f"{user['DisplayName']}'s Household"
+        if not user:
+            return jsonify({"error": "User not found"}), 404
 
-    # create household
-    cursor.execute("""
-        INSERT INTO Household (HouseholdName, JoinCode)
-        VALUES (%s, %s)
-    """, (household_name, join_code))
-    
-    household_id = cursor.lastrowid
+        # If user is owner of old household, promote first member to owner
+        old_household_id = user.get("HouseholdID")
+        if old_household_id:
+            cursor.execute("SELECT RoleName FROM Users WHERE UserID=%s", (user_id,))
+            old_user_info = cursor.fetchone()
+            if old_user_info and old_user_info.get("RoleName") == "owner":
+                cursor.execute("""
+                    SELECT UserID FROM Users 
+                    WHERE HouseholdID=%s AND UserID!=%s AND IsArchived=0
+                    LIMIT 1
+                """, (old_household_id, user_id))
+                other_member = cursor.fetchone()
+                if other_member:
+                    cursor.execute("UPDATE Users SET RoleName='owner' WHERE UserID=%s", (other_member["UserID"],))
+
+        # generate unique join code
+        while True:
+            join_code = str(uuid.uuid4())[:6].upper()
+            cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (join_code,))
+            if not cursor.fetchone():
+                break  
 
-    # update user - set as owner (this automatically removes them from old household)
-    cursor.execute("""
-        UPDATE Users
-        SET HouseholdID=%s, RoleName='owner'
-        WHERE UserID=%s
-    """, (household_id, user_id))
+        # Use provided name or generate default name
+        if not household_name or household_name.strip() == "":
+            household_name = f"{user['DisplayName']}'s Household"
 
-    conn.commit()
+        # create household
+        cursor.execute("""
+            INSERT INTO Household (HouseholdName, JoinCode)
+            VALUES (%s, %s)
+        """, (household_name, join_code))
 
-    # get household info
-    cursor.execute("""
-        SELECT HouseholdID, HouseholdName, JoinCode
-        FROM Household
-        WHERE HouseholdID=%s
-    """, (household_id,))
-    household = cursor.fetchone()
+        household_id = cursor.lastrowid
 
-    cursor.close()
-    conn.close()
+        # update user - set as owner (this automatically removes them from old household)
+        cursor.execute("""
+            UPDATE Users
+            SET HouseholdID=%s, RoleName='owner'
+            WHERE UserID=%s
+        """, (household_id, user_id))
+        mark_household_changed(old_household_id)
+        evict_session_users([user_id], [old_household_id])
+
+        # get household info
+        cursor.execute("""
+            SELECT HouseholdID, HouseholdName, JoinCode
+            FROM Household
+            WHERE HouseholdID=%s
+        """, (household_id,))
+        household = cursor.fetchone()
 
-    return jsonify({
-        "message": "Household created successfully",
-        "household": {
-            "household_id": household["HouseholdID"],
-            "household_name": household["HouseholdName"],
-            "join_code": household["JoinCode"]
-        }
-    }), 200
+        return jsonify({
+            "message": "Household created successfully",
+            "household": {
+                "household_id": household["HouseholdID"],
+                "household_name": household["HouseholdName"],
+                "join_code": household["JoinCode"]
+            }
+        }), 200
 
 
 @document_api_route(bp, 'post', '/remove-member',
@@ -393,58 +426,52 @@ def remove_member():
     if not username:
         return jsonify({"error": "username required"}), 400
 
-    conn = get_write_conn()
-    cursor = conn.cursor(dictionary=True)
+    with db_cursor() as cursor:
+        # validate user exists and get display name
+        cursor.execute("""
+            SELECT UserID, HouseholdID, DisplayName
+            FROM Users
+            WHERE UserName=%s AND IsArchived=0
+        """, (username,))
+        user = cursor.fetchone()
 
-    # validate user exists and get display name
-    cursor.execute("""
-        SELECT UserID, HouseholdID, DisplayName
-        FROM Users
-        WHERE UserName=%s AND IsArchived=0
-    """, (username,))
-    user = cursor.fetchone()
+        if not user:
+            return jsonify({"error": "User not found"}), 404
 
-    if not user:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "User not found"}), 404
+        user_id = user["UserID"]
 
-    user_id = user["UserID"]
-    
-    # Auto-create household for removed user
-    # Generate unique join code
-    while True:
-        join_code = str(uuid.uuid4())[:6].upper()
-        cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (join_code,))
-        if not cursor.fetchone():
-            break
-    
-    # Use display name for household name
-    household_name = f"{user['DisplayName']}'s Household"
-    
-    # Create household
-    cursor.execute("""
-        INSERT INTO Household (HouseholdName, JoinCode)
-        VALUES (%s, %s)
-    """, (household_name, join_code))
-    
-    household_id = cursor.lastrowid
+        # Auto-create household for removed user
+        # Generate unique join code
+        while True:
+            join_code = str(uuid.uuid4())[:6].upper()
+            cursor.execute("SELECT HouseholdID FROM Household WHERE JoinCode=%s", (join_code,))
+            if not cursor.fetchone():
+                break
 
-    # Update user - set as owner of new household
-    cursor.execute("""
-        UPDATE Users
-        SET HouseholdID=%s, RoleName='owner'
-        WHERE UserID=%s
-    """, (household_id, user_id))
+        # Use display name for household name
+        household_name = f"{user['DisplayName']}'s Household"
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        # Create household
+        cursor.execute("""
+            INSERT INTO Household (HouseholdName, JoinCode)
+            VALUES (%s, %s)
+        """, (household_name, join_code))
 
-    return jsonify({
-        "message": "User removed from household and assigned to new household",
-        "removed_username": username
-    }), 200
+        household_id = cursor.lastrowid
+
+        # Update user - set as owner of new household
+        cursor.execute("""
+            UPDATE Users
+            SET HouseholdID=%s, RoleName='owner'
+            WHERE UserID=%s
+        """, (household_id, user_id))
+        mark_household_changed(user["HouseholdID"])
+        evict_session_users([user_id])
+
+        return jsonify({
+            "message": "User removed from household and assigned to new household",
+            "removed_username": username
+        }), 200
 
 
 @document_api_route(
@@ -453,6 +480,7 @@ def remove_member():
     'User updates their own display name or password'
 )
 @handle_db_error
+@reject_when_busy
 def update_profile():
     data = request.get_json() or {}
     user_id = data.get("user_id")
@@ -466,81 +494,60 @@ def update_profile():
     if not new_name and not new_password:
         return jsonify({"error": "Nothing to update"}), 400
 
-    conn = get_write_conn()
-    cursor = conn.cursor(dictionary=True)
+    with db_cursor() as cursor:
+        # validate user exists
+        cursor.execute("""
+            SELECT UserID, HouseholdID, PasswordHash
+            FROM Users
+            WHERE UserID=%s AND IsArchived=0
+        """, (user_id,))
+        user = cursor.fetchone()
+
+        if not user:
+            return jsonify({"error": "User not found"}), 404
 
-    # validate user exists
-    cursor.execute("""
-        SELECT UserID, PasswordHash
-        FROM Users
-        WHERE UserID=%s AND IsArchived=0
-    """, (user_id,))
-    user = cursor.fetchone()
+        # If password change requested, verify old password
+        if new_password:
+            if not old_password:
+                return jsonify({"error": "old_password required to change password"}), 400
 
-    if not user:
-        cursor.close()
-        conn.close()
-        return jsonify({"error": "User not found"}), 404
-
-    # If password change requested, verify old password
-    if new_password:
-        if not old_password:
-            cursor.close()
-            conn.close()
-            return jsonify({"error": "old_password required to change password"}), 400
-        
-        # Verify old password using bcrypt
-        try:
-            password_hash = user["PasswordHash"]
-            if isinstance(password_hash, str):
-                password_hash = password_hash.encode('utf-8')
-            if not bcrypt.checkpw(old_password.encode('utf-8'), password_hash):
-                cursor.close()
-                conn.close()
+            # Verify old password using bcrypt
+            if not password_hasher.check_password(old_password, user["PasswordHash"]):
                 return jsonify({"error": "Old password incorrect"}), 401
-            
+
             # Verify new password is different from old password using bcrypt
-            if bcrypt.checkpw(new_password.encode('utf-8'), password_hash):
-                cursor.close()
-                conn.close()
+            if password_hasher.check_password(new_password, user["PasswordHash"]):
                 return jsonify({"error": "New password cannot be the same as old password"}), 400
-        except (ValueError, TypeError):
-            cursor.close()
-            conn.close()
-            return jsonify({"error": "Old password incorrect"}), 401
-        
-        # password length check
-        if len(new_password) < 6:
-            cursor.close()
-            conn.close()
-            return jsonify({"error": "Password must be at least 6 characters"}), 400
 
-    updates = []
-    params = []
+            # password length check
+            if len(new_password) < 6:
+                return jsonify({"error": "Password must be at least 6 characters"}), 400
 
-    if new_name:
-        updates.append("DisplayName=%s")
-        params.append(new_name)
+        updates = []
+        params = []
 
-    if new_password:
-        # Hash new password using bcrypt
-        new_password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-        updates.append("PasswordHash=%s")
-        params.append(new_password_hash)
+        if new_name:
+            updates.append("DisplayName=%s")
+            params.append(new_name)
 
-    params.append(user_id)
+        if new_password:
+            # Hash new password using bcrypt
+            new_password_hash = password_hasher.hash_password(new_password)
+            updates.append("PasswordHash=%s")
+            params.append(new_password_hash)
 
-    cursor.execute(f"""
-        UPDATE Users
-        SET {', '.join(updates)}
-        WHERE UserID=%s
-    """, tuple(params))
+        params.append(user_id)
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        cursor.execute(f"""
+            UPDATE Users
+            SET {', '.join(updates)}
+            WHERE UserID=%s
+        """, tuple(params))
+        # Display names show up in the household's transaction history
+        mark_household_changed(user["HouseholdID"])
+        evict_session_users([user_id])
 
-    return jsonify({"message": "Profile updated successfully"}), 200
+        return jsonify({"message": "Profile updated successfully"}), 200
 
 
 @document_api_route(
@@ -549,6 +556,7 @@ def update_profile():
     'Remove a user account and clean up associated ownership/transaction references'
 )
 @handle_db_error
+@reject_when_busy
 def delete_account(user_id: int):
     data = request.get_json() or {}
     confirm_username = (data.get("confirm_username") or "").strip()
@@ -556,10 +564,7 @@ def delete_account(user_id: int):
     if not confirm_username:
         return jsonify({"error": "confirm_username required"}), 400
 
-    conn = get_write_conn()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
+    with db_cursor() as cursor:
         cursor.execute("""
             SELECT UserID, UserName, HouseholdID, RoleName
             FROM Users
@@ -584,6 +589,11 @@ def delete_account(user_id: int):
             SET UserID = %s
             WHERE UserID = %s
         """, (placeholder_user_id, user_id))
+        cursor.execute("""
+            UPDATE InventoryTransactionArchive
+            SET UserID = %s
+            WHERE UserID = %s
+        """, (placeholder_user_id, user_id))
 
         if household_id and role == 'owner':
             cursor.execute("""
@@ -604,14 +614,8 @@ def delete_account(user_id: int):
                 """, (successor["UserID"],))
 
         cursor.execute("DELETE FROM Users WHERE UserID=%s", (user_id,))
-
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
-        conn.close()
+        mark_household_changed(household_id)
+        evict_session_users([user_id], [household_id])
 
     flask_logout_user()
     return jsonify({"message": "Account deleted"}), 200
@@ -669,7 +673,7 @@ def add_deleted_user_placeholder(cursor, household_id):
     if existing:
         return existing["UserID"]
 
-    placeholder_password = bcrypt.hashpw(b"deleted-user-placeholder", bcrypt.gensalt()).decode('utf-8')
+    placeholder_password = placeholder_password_hash()
 
     cursor.execute("""
         INSERT INTO Users (HouseholdID, UserName, DisplayName, RoleName, PasswordHash, IsArchived)
@@ -1,9 +1,125 @@
-from datetime import datetime, timedelta
+import csv
+import io
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
 from flask import jsonify, request, g
-from extensions import db_cursor, get_db, create_api_blueprint, document_api_route, handle_db_error
+from extensions import (
+    db_cursor,
+    create_api_blueprint,
+    document_api_route,
+    handle_db_error,
+    insert_rows,
+    register_query_plan,
+)
+from shopping_list_refresh import mark_stock_touched
+from household_cache import (
+    cached_household_read,
+    household_etag,
+    mark_household_changed,
+    FOOD_ITEM_GENERATION_SQL,
+)
+from ownership import check_ownership, invalidate_ownership
 
 bp = create_api_blueprint('food_items', '/api/food-items')
 
+FOOD_ITEM_DETAIL_SQL = register_query_plan('food_items.detail', """
+    SELECT 
+        fi.FoodItemID,
+        fi.Name,
+        fi.Type,
+        fi.Category,
+        fi.BaseUnitID,
+        fi.HouseholdID,
+        fi.PreferredPackageID,
+        bu.Abbreviation AS BaseUnit,
+        p.Label AS PackageLabel,
+        p.BaseUnitAmt AS PackageBaseUnitAmt,
+
+        (
+            SELECT sl.TargetLevel
+            FROM StockLevel sl
+            WHERE sl.FoodItemID = fi.FoodItemID
+            LIMIT 1
+        ) AS TargetLevel,
+
+        lp.PriceTotal AS LatestPrice,
+        lp.Store AS LatestStore
+
+    FROM FoodItem fi
+    JOIN BaseUnit bu ON fi.BaseUnitID = bu.UnitID
+    LEFT JOIN Package p ON fi.PreferredPackageID = p.PackageID
+        AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
+    LEFT JOIN LatestPrice lp ON lp.PackageID = fi.PreferredPackageID
+    WHERE fi.FoodItemID = %s
+      AND fi.IsArchived = 0
+""", (1,))
+
+# Copies the PriceLog row just inserted on this connection into LatestPrice.
+LATEST_PRICE_UPSERT_SQL = """
+    INSERT INTO LatestPrice (PackageID, PriceTotal, Store, CreatedAt)
+    SELECT PackageID, PriceTotal, Store, CreatedAt
+    FROM PriceLog
+    WHERE PriceLogID = LAST_INSERT_ID()
+    ON DUPLICATE KEY UPDATE
+        PriceTotal = VALUES(PriceTotal),
+        Store = VALUES(Store),
+        CreatedAt = VALUES(CreatedAt)
+"""
+
+NOT_ON_ACTIVE_LIST_SQL = register_query_plan('food_items.not_on_active_list', """
+    SELECT 
+        fi.FoodItemID AS FoodItemID,
+        fi.Name AS FoodItemName,
+        IFNULL(pl.PriceTotal, 0) AS PricePerUnit,
+        0 AS PurchasedQty,
+        0 AS NeededQty,
+        0 AS TotalPrice,
+        'active' AS Status,
+        ROUND(getCurrentStock(fi.FoodItemID) / IFNULL(pp.BaseUnitAmt, 1), 2) AS CurrentStock,
+        loc.LocationID AS LocationID,
+        pp.PackageID AS PackageID,
+        pp.BaseUnitAmt AS PackageBaseUnitAmt,
+        ROUND(IFNULL(sl.TargetLevel, 0) / IFNULL(pp.BaseUnitAmt, 1), 2) AS TargetLevel
+    FROM FoodItem fi
+    LEFT JOIN StockLevel sl ON fi.FoodItemID = sl.FoodItemID
+    LEFT JOIN Package pp ON fi.PreferredPackageID = pp.PackageID
+        AND (pp.IsArchived = 0 OR pp.IsArchived IS NULL)
+    LEFT JOIN LatestPrice pl ON pp.PackageID = pl.PackageID
+    LEFT JOIN (
+        SELECT l1.LocationID, l1.HouseholdID
+        FROM Location l1
+        INNER JOIN (
+            SELECT HouseholdID, MIN(LocationID) AS MinLocationID
+            FROM Location
+            GROUP BY HouseholdID
+        ) l2 ON l1.HouseholdID = l2.HouseholdID AND l1.LocationID = l2.MinLocationID
+    ) loc ON fi.HouseholdID = loc.HouseholdID
+    WHERE fi.HouseholdID = %s
+        AND fi.IsArchived = 0
+        AND fi.FoodItemID NOT IN (
+            SELECT sli.FoodItemID
+            FROM ShoppingList sl
+            JOIN ShoppingListItem sli ON sl.ShoppingListID = sli.ShoppingListID
+            WHERE sl.HouseholdID = %s
+              AND sl.Status = 'active'
+        )
+    ORDER BY fi.Name
+""", (1, 1))
+
+
+# Bulk import: at most this many rows per request, inserted this many per statement
+MAX_IMPORT_ROWS = 2000
+IMPORT_BATCH_ROWS = 500
+# DECIMAL(9,2) ledger quantities
+MAX_BASE_QTY = Decimal(10_000_000)
+
+# CSV headers / JSON keys of an import row; only name, base_unit,
+# package_amount and location are required.
+IMPORT_FIELDS = (
+    'name', 'type', 'category', 'base_unit', 'package_label', 'package_amount',
+    'target_level', 'quantity', 'price', 'store', 'location', 'expiration_date',
+)
+
 
 def _get_current_user_household():
     user = getattr(g, 'current_user', None)
@@ -20,23 +136,10 @@ def _ensure_food_item_access(food_item_id):
     if error:
         return error
 
-    with db_cursor() as cursor:
-        cursor.execute("""
-            SELECT HouseholdID
-            FROM FoodItem
-            WHERE FoodItemID = %s
-              AND IsArchived = 0
-            LIMIT 1
-        """, (food_item_id,))
-        row = cursor.fetchone()
-
-    if not row:
+    missing, foreign = check_ownership(household_id, food_item_ids=[food_item_id], include_archived=False)
+    if missing:
         return jsonify({'error': 'Food item not found'}), 404
-
-    item_household_id = row.get("HouseholdID")
-    if item_household_id is None or household_id is None:
-        return jsonify({"error": "Forbidden"}), 403
-    if item_household_id != household_id:
+    if foreign:
         return jsonify({"error": "Forbidden"}), 403
 
     return None
@@ -45,56 +148,14 @@ def _ensure_food_item_access(food_item_id):
 
 @document_api_route(bp, 'get', '/<int:food_item_id>', 'Get food item by ID', 'Returns a single food item by its ID')
 @handle_db_error
+@household_etag(FOOD_ITEM_GENERATION_SQL, 'food_item_id')
 def get_food_item(food_item_id):
     unauthorized = _ensure_food_item_access(food_item_id)
     if unauthorized:
         return unauthorized
 
     with db_cursor() as cursor:
-        query = """
-            SELECT 
-                fi.FoodItemID,
-                fi.Name,
-                fi.Type,
-                fi.Category,
-                fi.BaseUnitID,
-                fi.HouseholdID,
-                fi.PreferredPackageID,
-                bu.Abbreviation AS BaseUnit,
-                p.Label AS PackageLabel,
-                p.BaseUnitAmt AS PackageBaseUnitAmt,
-
-                (
-                    SELECT sl.TargetLevel
-                    FROM StockLevel sl
-                    WHERE sl.FoodItemID = fi.FoodItemID
-                    LIMIT 1
-                ) AS TargetLevel,
-
-                (
-                    SELECT pl.PriceTotal
-                    FROM PriceLog pl
-                    WHERE pl.PackageID = fi.PreferredPackageID
-                    ORDER BY pl.CreatedAt DESC
-                    LIMIT 1
-                ) AS LatestPrice,
-
-                (
-                    SELECT pl.Store
-                    FROM PriceLog pl
-                    WHERE pl.PackageID = fi.PreferredPackageID
-                    ORDER BY pl.CreatedAt DESC
-                    LIMIT 1
-                ) AS LatestStore
-
-            FROM FoodItem fi
-            JOIN BaseUnit bu ON fi.BaseUnitID = bu.UnitID
-            LEFT JOIN Package p ON fi.PreferredPackageID = p.PackageID
-                AND (p.IsArchived = 0 OR p.IsArchived IS NULL)
-            WHERE fi.FoodItemID = %s
-              AND fi.IsArchived = 0
-        """
-        cursor.execute(query, (food_item_id,))
+        cursor.execute(FOOD_ITEM_DETAIL_SQL, (food_item_id,))
         result = cursor.fetchone()
         
         if not result:
@@ -105,65 +166,19 @@ def get_food_item(food_item_id):
 # get items not on active list
 @document_api_route(bp, 'get', '/not-on-active-list', 'Get items not on active list', 'Returns food items that are not currently on the active shopping list')
 @handle_db_error
+@household_etag()
 def get_items_not_on_active_list():
-    household_id = request.args.get('household_id')
+    household_id = request.args.get('household_id', type=int)
     
     if not household_id:
         return jsonify({'error': 'household_id is required'}), 400
     
-    with db_cursor() as cursor:
-        query = """
-            SELECT 
-                fi.FoodItemID AS FoodItemID,
-                fi.Name AS FoodItemName,
-                IFNULL(pl.PriceTotal, 0) AS PricePerUnit,
-                0 AS PurchasedQty,
-                0 AS NeededQty,
-                0 AS TotalPrice,
-                'active' AS Status,
-                ROUND(getCurrentStock(fi.FoodItemID) / IFNULL(pp.BaseUnitAmt, 1), 2) AS CurrentStock,
-                loc.LocationID AS LocationID,
-                pp.PackageID AS PackageID,
-                pp.BaseUnitAmt AS PackageBaseUnitAmt,
-                ROUND(IFNULL(sl.TargetLevel, 0) / IFNULL(pp.BaseUnitAmt, 1), 2) AS TargetLevel
-            FROM FoodItem fi
-            LEFT JOIN StockLevel sl ON fi.FoodItemID = sl.FoodItemID
-            LEFT JOIN Package pp ON fi.PreferredPackageID = pp.PackageID
-                AND (pp.IsArchived = 0 OR pp.IsArchived IS NULL)
-            LEFT JOIN (
-                SELECT pl1.PackageID, pl1.PriceTotal
-                FROM PriceLog pl1
-                INNER JOIN (
-                    SELECT PackageID, MAX(CreatedAt) AS MaxCreatedAt
-                    FROM PriceLog
-                    GROUP BY PackageID
-                ) pl2 ON pl1.PackageID = pl2.PackageID AND pl1.CreatedAt = pl2.MaxCreatedAt
-            ) pl ON pp.PackageID = pl.PackageID
-            LEFT JOIN (
-                SELECT l1.LocationID, l1.HouseholdID
-                FROM Location l1
-                INNER JOIN (
-                    SELECT HouseholdID, MIN(LocationID) AS MinLocationID
-                    FROM Location
-                    GROUP BY HouseholdID
-                ) l2 ON l1.HouseholdID = l2.HouseholdID AND l1.LocationID = l2.MinLocationID
-            ) loc ON fi.HouseholdID = loc.HouseholdID
-            WHERE fi.HouseholdID = %s
-                AND fi.IsArchived = 0
-                AND fi.FoodItemID NOT IN (
-                    SELECT sli.FoodItemID
-                    FROM ShoppingList sl
-                    JOIN ShoppingListItem sli ON sl.ShoppingListID = sli.ShoppingListID
-                    WHERE sl.HouseholdID = %s
-                      AND sl.Status = 'active'
-                )
-            ORDER BY fi.Name
-        """
-        
-        cursor.execute(query, (household_id, household_id))
-        results = cursor.fetchall()
-        
-        return jsonify(results), 200
+    def read_items(cursor):
+        cursor.execute(NOT_ON_ACTIVE_LIST_SQL, (household_id, household_id))
+        return cursor.fetchall()
+
+    results = cached_household_read(household_id, 'not_on_active_list', (), read_items)
+    return jsonify(results), 200
 
 
 @document_api_route(bp, 'get', '/base-units', 'Get all base units', 'Returns a list of all available base units')
@@ -183,6 +198,7 @@ def get_base_units():
 @document_api_route(bp, 'get', '/package-labels', 
                     'Get unique package labels by household', 'Returns a list of unique package labels for a specific household')
 @handle_db_error
+@household_etag()
 def get_package_labels():
     household_id = request.args.get('household_id')
     
@@ -215,10 +231,7 @@ def add_new_food_item():
     if not expiration_date:
         expiration_date = (datetime.utcnow() + timedelta(days=14)).date().isoformat()
     
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
+    with db_cursor() as cursor:
         cursor.callproc('AddNewFoodItem', [
             data.get('food_name'),
             data.get('type') or '',
@@ -235,16 +248,13 @@ def add_new_food_item():
             data.get('price_per_item'),
             data.get('store')
         ])
-        cursor.fetchall()
-        conn.commit()
-        
+        for result in cursor.stored_results():
+            for row in result.fetchall():
+                mark_stock_touched(row['FoodItemID'], data.get('location_id'))
+        mark_household_changed(data.get('household_id'))
+        invalidate_ownership(data.get('household_id'))
+
         return jsonify({'message': 'Added to inventory!'}), 201
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 @document_api_route(bp, 'put', '/<int:food_item_id>', 'Update food item metadata', 'Updates basic fields for an existing food item and its preferred package')
@@ -256,10 +266,7 @@ def update_food_item(food_item_id):
 
     data = request.get_json()
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
+    with db_cursor() as cursor:
         cursor.execute("""
             UPDATE FoodItem
             SET Name = %s,
@@ -368,10 +375,8 @@ def update_food_item(food_item_id):
             if price_value is not None:
                 cursor.execute("""
                     SELECT PriceTotal, Store
-                    FROM PriceLog
+                    FROM LatestPrice
                     WHERE PackageID = %s
-                    ORDER BY CreatedAt DESC
-                    LIMIT 1
                 """, (effective_package_id,))
                 price_log_row = cursor.fetchone() or {}
 
@@ -386,16 +391,10 @@ def update_food_item(food_item_id):
                         INSERT INTO PriceLog (PackageID, PriceTotal, Store)
                         VALUES (%s, %s, %s)
                     """, (effective_package_id, price_value, normalized_store))
+                    cursor.execute(LATEST_PRICE_UPSERT_SQL)
 
-        conn.commit()
-
+        mark_household_changed(g.current_user.get("HouseholdID"))
         return jsonify({'message': 'Food item updated successfully'}), 200
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
 
 
 @document_api_route(bp, 'delete', '/<int:food_item_id>', 'Archive food item', 'Soft deletes a food item and packages')
@@ -405,10 +404,7 @@ def archive_food_item(food_item_id):
     if unauthorized:
         return unauthorized
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
+    with db_cursor() as cursor:
         cursor.execute("""
             UPDATE FoodItem
             SET IsArchived = 1
@@ -417,7 +413,6 @@ def archive_food_item(food_item_id):
         """, (food_item_id,))
 
         if cursor.rowcount == 0:
-            conn.rollback()
             return jsonify({'error': 'Item not found'}), 404
 
         cursor.execute("""
@@ -427,12 +422,255 @@ def archive_food_item(food_item_id):
               AND (IsArchived = 0 OR IsArchived IS NULL)
         """, (food_item_id,))
 
-        conn.commit()
-
+        mark_household_changed(g.current_user.get("HouseholdID"))
+        invalidate_ownership(g.current_user.get("HouseholdID"))
         return jsonify({'message': 'Item archived.'}), 200
-    except Exception as e:
-        conn.rollback()
-        return jsonify({'error': str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+
+
+@document_api_route(bp, 'post', '/import', 'Bulk import food items',
+                    'Adds many new food items to the current household from CSV (text/csv body or a "file" upload) '
+                    'or JSON ({"items": [...]}); every row is validated before anything is written')
+@handle_db_error
+def import_food_items():
+    household_id, error = _get_current_user_household()
+    if error:
+        return error
+
+    try:
+        rows = _read_import_rows()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not rows:
+        return jsonify({'error': 'No rows to import'}), 400
+    if len(rows) > MAX_IMPORT_ROWS:
+        return jsonify({'error': f'At most {MAX_IMPORT_ROWS} rows per import'}), 400
+
+    with db_cursor() as cursor:
+        items, errors = _validate_import_rows(cursor, household_id, rows)
+        if errors:
+            return jsonify({'error': 'Import rejected, nothing was added', 'errors': errors}), 400
+
+        user_id = g.current_user['UserID']
+        for start in range(0, len(items), IMPORT_BATCH_ROWS):
+            _insert_food_items(cursor, household_id, user_id, items[start:start + IMPORT_BATCH_ROWS])
+
+        for item in items:
+            mark_stock_touched(item['food_item_id'], item['location_id'])
+        mark_household_changed(household_id)
+        invalidate_ownership(household_id)
+
+        return jsonify({'message': f'Imported {len(items)} food items', 'count': len(items)}), 201
+
+
+def _read_import_rows():
+    """Rows as dicts from a CSV upload, a CSV body or JSON."""
+    upload = request.files.get('file')
+    if upload is not None:
+        return _csv_rows(io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline=''))
+    if request.mimetype == 'text/csv':
+        return _csv_rows(io.StringIO(request.get_data(as_text=True), newline=''))
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('items')
+    if not isinstance(data, list) or not all(isinstance(row, dict) for row in data):
+        raise ValueError('Send CSV or JSON {"items": [...]}')
+    return data
+
+
+def _csv_rows(text):
+    reader = csv.DictReader(text)
+    headers = {(name or '').strip().lower() for name in reader.fieldnames or ()}
+    unknown = headers - set(IMPORT_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown CSV columns: {', '.join(sorted(unknown))}")
+    return [
+        {(key or '').strip().lower(): value for key, value in row.items()}
+        for row in reader
+        if any((value or '').strip() for value in row.values() if isinstance(value, str))
+    ]
+
+
+def _validate_import_rows(cursor, household_id, rows):
+    """
+    Resolve base units and locations and check every row against the
+    household's existing items in three queries. Returns (items, errors);
+    errors name the 1-based row number.
+    """
+    cursor.execute("SELECT UnitID, Abbreviation FROM BaseUnit ORDER BY UnitID")
+    units = {}
+    for unit in cursor.fetchall():
+        units.setdefault(str(unit['UnitID']), unit['UnitID'])
+        units.setdefault((unit['Abbreviation'] or '').strip().lower(), unit['UnitID'])
+
+    cursor.execute("""
+        SELECT LocationID, LocationName
+        FROM Location
+        WHERE HouseholdID = %s AND IsArchived = 0
+        ORDER BY LocationID
+    """, (household_id,))
+    locations = {}
+    for location in cursor.fetchall():
+        locations.setdefault(str(location['LocationID']), location['LocationID'])
+        locations.setdefault(location['LocationName'].strip().lower(), location['LocationID'])
+
+    # unique_food covers archived items too
+    cursor.execute("SELECT Name, Type FROM FoodItem WHERE HouseholdID = %s", (household_id,))
+    taken = {_food_key(row['Name'], row['Type']) for row in cursor.fetchall()}
+
+    default_expiration = (datetime.utcnow() + timedelta(days=14)).date()
+    items, errors = [], []
+    for number, row in enumerate(rows, start=1):
+        try:
+            item = _parse_import_row(row, units, locations, default_expiration)
+            key = _food_key(item['name'], item['type'])
+            if key in taken:
+                raise ValueError(f"{item['name']} already exists")
+            taken.add(key)
+            items.append(item)
+        except ValueError as e:
+            errors.append({'row': number, 'error': str(e)})
+    return items, errors
+
+
+def _parse_import_row(row, units, locations, default_expiration):
+    name = _text(row.get('name'))
+    if not name:
+        raise ValueError('name is required')
+
+    base_unit = _text(row.get('base_unit')).lower()
+    if base_unit not in units:
+        raise ValueError(f"Unknown base_unit {row.get('base_unit')!r}")
+    location = _text(row.get('location')).lower()
+    if location not in locations:
+        raise ValueError(f"Unknown location {row.get('location')!r}")
+
+    package_amount = _decimal(row, 'package_amount', required=True)
+    if package_amount <= 0:
+        raise ValueError('package_amount must be positive')
+    quantity = _decimal(row, 'quantity') or Decimal(0)
+    if quantity < 0 or quantity != quantity.to_integral_value():
+        raise ValueError('quantity must be a whole number of packages')
+    target_level = _decimal(row, 'target_level')
+    price = _decimal(row, 'price')
+
+    expiration = _text(row.get('expiration_date'))
+    try:
+        expiration_date = date.fromisoformat(expiration) if expiration else default_expiration
+    except ValueError:
+        raise ValueError('expiration_date must be YYYY-MM-DD') from None
+
+    for field in ('name', 'type', 'category', 'package_label', 'store'):
+        if len(_text(row.get(field))) > 100:
+            raise ValueError(f'{field} is longer than 100 characters')
+    if package_amount * quantity >= MAX_BASE_QTY or (target_level or 0) * package_amount >= MAX_BASE_QTY:
+        raise ValueError('quantity and target_level must stay below 10,000,000 base units')
+
+    return {
+        'name': name,
+        'type': _text(row.get('type')),
+        'category': _text(row.get('category')) or None,
+        'base_unit_id': units[base_unit],
+        'package_label': _text(row.get('package_label')) or None,
+        'package_amount': package_amount,
+        # Packages, like the add form; stored in base units
+        'target_level': target_level * package_amount if target_level is not None else None,
+        'qty': package_amount * quantity,
+        'price': price,
+        'store': (_text(row.get('store')).lower() or None) if price is not None else None,
+        'location_id': locations[location],
+        'expiration_date': expiration_date,
+    }
+
+
+def _insert_food_items(cursor, household_id, user_id, items):
+    """AddNewFoodItem for a batch of new items, one statement per table."""
+    insert_rows(cursor, 'FoodItem', ('BaseUnitID', 'HouseholdID', 'Name', 'Type', 'Category'), [
+        (item['base_unit_id'], household_id, item['name'], item['type'], item['category']) for item in items
+    ])
+    # unique_food identifies the new rows
+    placeholders = ', '.join(['(%s, %s)'] * len(items))
+    cursor.execute(f"""
+        SELECT FoodItemID, Name, Type
+        FROM FoodItem
+        WHERE HouseholdID = %s
+          AND (Name, Type) IN ({placeholders})
+    """, [household_id] + [value for item in items for value in (item['name'], item['type'])])
+    food_item_ids = {_food_key(row['Name'], row['Type']): row['FoodItemID'] for row in cursor.fetchall()}
+    for item in items:
+        item['food_item_id'] = food_item_ids[_food_key(item['name'], item['type'])]
+
+    insert_rows(cursor, 'Package', ('FoodItemID', 'Label', 'BaseUnitAmt'), [
+        (item['food_item_id'], item['package_label'], item['package_amount']) for item in items
+    ])
+    # Each new item has exactly one package
+    placeholders = ', '.join(['%s'] * len(items))
+    cursor.execute(f"""
+        SELECT PackageID, FoodItemID
+        FROM Package
+        WHERE FoodItemID IN ({placeholders})
+    """, [item['food_item_id'] for item in items])
+    package_by_item = {row['FoodItemID']: row['PackageID'] for row in cursor.fetchall()}
+    package_ids = [package_by_item[item['food_item_id']] for item in items]
+
+    placeholders = ', '.join(['%s'] * len(package_ids))
+    cursor.execute(f"""
+        UPDATE FoodItem fi
+        JOIN Package p ON p.FoodItemID = fi.FoodItemID
+        SET fi.PreferredPackageID = p.PackageID
+        WHERE p.PackageID IN ({placeholders})
+    """, package_ids)
+
+    insert_rows(cursor, 'StockLevel', ('FoodItemID', 'TargetLevel'), [
+        (item['food_item_id'], item['target_level']) for item in items
+    ])
+
+    priced = [(package_id, item) for package_id, item in zip(package_ids, items) if item['price'] is not None]
+    if priced:
+        insert_rows(cursor, 'PriceLog', ('PackageID', 'PriceTotal', 'Store'), [
+            (package_id, item['price'], item['store']) for package_id, item in priced
+        ])
+        placeholders = ', '.join(['%s'] * len(priced))
+        cursor.execute(f"""
+            INSERT INTO LatestPrice (PackageID, PriceTotal, Store, CreatedAt)
+            SELECT PackageID, PriceTotal, Store, CreatedAt
+            FROM PriceLog
+            WHERE PackageID IN ({placeholders})
+        """, [package_id for package_id, _ in priced])
+
+    insert_rows(cursor, 'StockBalance', ('FoodItemID', 'LocationID', 'Qty'), [
+        (item['food_item_id'], item['location_id'], item['qty']) for item in items
+    ])
+    insert_rows(cursor, 'InventoryTransaction', (
+        'FoodItemID', 'LocationID', 'HouseholdID', 'UserID', 'QtyInBaseUnits', 'TransactionType', 'ExpirationDate'
+    ), [
+        (item['food_item_id'], item['location_id'], household_id, user_id, item['qty'], 'add', item['expiration_date'])
+        for item in items
+    ])
+    insert_rows(cursor, 'StockLot', ('FoodItemID', 'LocationID', 'ExpirationDate', 'RemainingQty'), [
+        (item['food_item_id'], item['location_id'], item['expiration_date'], item['qty'])
+        for item in items if item['qty'] > 0
+    ])
+
+
+def _food_key(name, food_type):
+    return ((name or '').strip().casefold(), (food_type or '').strip().casefold())
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _decimal(row, field, required=False):
+    raw = _text(row.get(field))
+    if not raw:
+        if required:
+            raise ValueError(f'{field} is required')
+        return None
+    try:
+        value = Decimal(raw)
+    except InvalidOperation:
+        raise ValueError(f'{field} must be a number') from None
+    if not value.is_finite() or value < 0:
+        raise ValueError(f'{field} must be a non-negative number')
+    return value
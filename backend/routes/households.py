@@ -1,11 +1,17 @@
-from flask import jsonify, request, g
+import os
+import shutil
+
+from flask import jsonify, request, g, send_file
 from extensions import (
     db_cursor,
+    read_snapshot,
     create_api_blueprint,
     document_api_route,
     handle_db_error,
-    get_db,
 )
+from household_cache import cached_household_read, household_etag, mark_household_changed
+from ownership import invalidate_ownership
+from household_archive import JOB_EXPORT, JOB_IMPORT, archive_jobs, create_job, get_job
 
 bp = create_api_blueprint('households', '/api/households')
 
@@ -27,20 +33,22 @@ def _ensure_household_access(household_id: int):
 
 @document_api_route(bp, 'get', '/<int:household_id>', 'Get household by ID', 'Returns household information including member and food item counts')
 @handle_db_error
+@household_etag()
 def get_household(household_id):
-    with db_cursor() as cursor:
+    with read_snapshot() as cursor:
+        # Separate counts instead of joining both tables, which multiplied
+        # members by food items before the DISTINCT.
         query = """
             SELECT 
                 h.HouseholdID,
                 h.HouseholdName,
                 h.JoinCode,
-                COUNT(DISTINCT u.UserId) AS MemberCount,
-                COUNT(DISTINCT fi.FoodItemID) AS FoodItemCount
+                (SELECT COUNT(*) FROM Users u
+                 WHERE u.HouseholdID = h.HouseholdID AND u.IsArchived = 0) AS MemberCount,
+                (SELECT COUNT(*) FROM FoodItem fi
+                 WHERE fi.HouseholdID = h.HouseholdID AND fi.IsArchived = 0) AS FoodItemCount
             FROM Household h
-            LEFT JOIN Users u ON h.HouseholdID = u.HouseholdID AND u.IsArchived = 0
-            LEFT JOIN FoodItem fi ON h.HouseholdID = fi.HouseholdID AND fi.IsArchived = 0
             WHERE h.HouseholdID = %s
-            GROUP BY h.HouseholdID
         """
         cursor.execute(query, (household_id,))
         result = cursor.fetchone()
@@ -53,12 +61,13 @@ def get_household(household_id):
 
 @document_api_route(bp, 'get', '/<int:household_id>/locations', 'Get locations by household', 'Returns all locations for a household')
 @handle_db_error
+@household_etag()
 def get_household_locations(household_id):
     unauthorized = _ensure_household_access(household_id)
     if unauthorized:
         return unauthorized
 
-    with db_cursor() as cursor:
+    def read_locations(cursor):
         query = """
             SELECT LocationID, LocationName
             FROM Location
@@ -66,9 +75,10 @@ def get_household_locations(household_id):
             ORDER BY LocationName
         """
         cursor.execute(query, (household_id,))
-        results = cursor.fetchall()
-        
-        return jsonify(results), 200
+        return cursor.fetchall()
+
+    results = cached_household_read(household_id, 'locations', (), read_locations)
+    return jsonify(results), 200
 
 
 @document_api_route(bp, 'post', '/<int:household_id>/locations', 'Create household location', 'Adds a new storage location for a household')
@@ -84,10 +94,7 @@ def create_household_location(household_id):
     if not location_name:
         return jsonify({'error': 'location_name is required'}), 400
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
+    with db_cursor() as cursor:
         cursor.execute("""
             SELECT LocationID
             FROM Location
@@ -114,15 +121,9 @@ def create_household_location(household_id):
         """, (location_id,))
         new_location = cursor.fetchone()
 
-        conn.commit()
-
+        mark_household_changed(household_id)
+        invalidate_ownership(household_id)
         return jsonify(new_location), 201
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        cursor.close()
-        conn.close()
 
 
 @document_api_route(bp, 'put', '/<int:household_id>/locations/<int:location_id>', 'Rename household location', 'Updates the name of a storage location')
@@ -138,10 +139,7 @@ def update_household_location(household_id, location_id):
     if not new_name:
         return jsonify({'error': 'location_name is required'}), 400
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
+    with db_cursor() as cursor:
         cursor.execute("""
             SELECT LocationID
             FROM Location
@@ -181,13 +179,105 @@ def update_household_location(household_id, location_id):
         """, (location_id,))
         updated = cursor.fetchone()
 
-        conn.commit()
-
+        mark_household_changed(household_id)
         return jsonify(updated), 200
+
+
+def _job_response(job, status=200):
+    body = {
+        'job_id': job['JobID'],
+        'kind': job['Kind'],
+        'status': job['Status'],
+        'household_id': job['HouseholdID'],
+        'current_table': job['CurrentTable'],
+        'rows_done': job['RowsDone'],
+        'rows_total': job['RowsTotal'],
+        'error': job['Error'],
+        'created_at': job['CreatedAt'],
+        'updated_at': job['UpdatedAt'],
+    }
+    if job['Kind'] == JOB_IMPORT and job['Status'] == 'done':
+        # Members move into the restored household with its join code
+        with db_cursor() as cursor:
+            cursor.execute("SELECT JoinCode FROM Household WHERE HouseholdID = %s", (job['HouseholdID'],))
+            household = cursor.fetchone()
+        body['join_code'] = household['JoinCode'] if household else None
+    return jsonify(body), status
+
+
+@document_api_route(bp, 'post', '/<int:household_id>/export', 'Export household', 'Starts a background export of the household to a gzip-compressed NDJSON archive; poll the returned job and download it when done')
+@handle_db_error
+def export_household(household_id):
+    unauthorized = _ensure_household_access(household_id)
+    if unauthorized:
+        return unauthorized
+
+    with db_cursor() as cursor:
+        job_id = create_job(cursor, JOB_EXPORT, household_id, g.current_user['UserID'])
+    return _job_response(get_job(job_id), 202)
+
+
+@document_api_route(bp, 'get', '/<int:household_id>/export/<int:job_id>', 'Download household export', 'Streams a finished household archive')
+@handle_db_error
+def download_household_export(household_id, job_id):
+    unauthorized = _ensure_household_access(household_id)
+    if unauthorized:
+        return unauthorized
+
+    job = get_job(job_id)
+    if not job or job['Kind'] != JOB_EXPORT or job['HouseholdID'] != household_id:
+        return jsonify({'error': 'Export not found'}), 404
+    if job['Status'] != 'done':
+        return jsonify({'error': f"Export is {job['Status']}"}), 409
+
+    path = archive_jobs.archive_path(job_id)
+    if not os.path.exists(path):
+        # Written to the local disk of whichever host ran the job
+        return jsonify({'error': 'Export file is not available on this server'}), 410
+    return send_file(
+        path,
+        mimetype='application/gzip',
+        as_attachment=True,
+        download_name=f'household_{household_id}_{job_id}.ndjson.gz',
+    )
+
+
+@document_api_route(bp, 'post', '/import', 'Import household', 'Restores a household archive, uploaded as the "file" form field or the raw body, into a new household in the background')
+@handle_db_error
+def import_household():
+    user = getattr(g, 'current_user', None)
+    if not user:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    upload = request.files.get('file')
+    source = upload.stream if upload else request.stream
+
+    with db_cursor() as cursor:
+        job_id = create_job(cursor, JOB_IMPORT, None, user['UserID'])
+
+    path = archive_jobs.upload_path(job_id)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        with open(path, 'wb') as out:
+            shutil.copyfileobj(source, out, 64 * 1024)
+        empty = os.path.getsize(path) == 0
     except Exception:
-        conn.rollback()
+        os.remove(path)
         raise
-    finally:
-        cursor.close()
-        conn.close()
-0
\ No newline at end of file
+    if empty:
+        os.remove(path)
+        return jsonify({'error': 'Archive file is required'}), 400
+    return _job_response(get_job(job_id), 202)
+
+
+@document_api_route(bp, 'get', '/archive-jobs/<int:job_id>', 'Get archive job', 'Returns the progress of a household export or import')
+@handle_db_error
+def get_archive_job(job_id):
+    user = getattr(g, 'current_user', None)
+    if not user:
+        return jsonify({'error': 'Not authenticated'}), 401
+
+    job = get_job(job_id)
+    if not job or job['UserID'] != user['UserID']:
+        return jsonify({'error': 'Job not found'}), 404
+    return _job_response(job)
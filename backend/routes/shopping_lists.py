@@ -1,39 +1,251 @@
-from flask import jsonify, request, Response, render_template
-from extensions import db_cursor, create_api_blueprint, document_api_route, handle_db_error, get_db
+from datetime import date, timedelta
+from itertools import chain, groupby
+from operator import itemgetter
+from flask import jsonify, request, Response, g, stream_template, stream_with_context
+from extensions import (
+    db_cursor,
+    read_snapshot,
+    create_api_blueprint,
+    document_api_route,
+    handle_db_error,
+    register_query_plan,
+    encode_cursor,
+    decode_cursor,
+)
+from shopping_list_refresh import mark_stock_touched
+from household_cache import (
+    cached_household_read,
+    household_etag,
+    mark_household_changed,
+    SHOPPING_LIST_GENERATION_SQL,
+)
+import csv
 import json
 
 bp = create_api_blueprint('shopping_lists', '/api/shopping-lists')
 
+ACTIVE_LIST_SQL = register_query_plan('shopping_lists.active_list', """
+    SELECT 
+        ShoppingListID,
+        HouseholdID,
+        Status,
+        LastUpdated,
+        TotalCost,
+        Version
+    FROM ShoppingList 
+    WHERE HouseholdID = %s AND Status = 'active'
+    ORDER BY LastUpdated DESC
+    LIMIT 1
+""", (1,))
+
+ACTIVE_LIST_ID_SQL = register_query_plan('shopping_lists.active_list_id', """
+    SELECT ShoppingListID 
+    FROM ShoppingList 
+    WHERE HouseholdID = %s AND Status = 'active'
+    ORDER BY ShoppingListID DESC
+    LIMIT 1
+""", (1,))
+
+# List history sort keys by ?param= index. Each has a (HouseholdID, <key>)
+# index; the primary key rides along at the end of every secondary index,
+# so (key, ShoppingListID) order is a plain index walk in either direction.
+LIST_SORT_COLUMNS = ('ShoppingListID', 'LastUpdated', 'Status', 'TotalCost')
+MAX_LIST_PAGE_LIMIT = 100
+
+LISTS_PAGE_SQL = """
+    SELECT ShoppingListID, Status, LastUpdated, TotalCost
+    FROM ShoppingList
+    WHERE HouseholdID = %s{after}
+    ORDER BY {order}
+    LIMIT %s
+"""
+
+LIST_ITEMS_SQL = register_query_plan('shopping_lists.list_items', """
+    SELECT 
+        sli.ShoppingListItemID,
+        sli.FoodItemID,
+        fi.Name AS FoodItemName,
+        sli.LocationID,
+        l.LocationName,
+        sli.PackageID,
+        p.Label AS PackageLabel,
+        p.BaseUnitAmt AS PackageBaseUnitAmt,
+        CEILING(sli.NeededQty / p.BaseUnitAmt) AS NeededQty,
+        sli.PurchasedQty,
+        sli.TotalPrice,
+        sli.Status,
+        ROUND(GetCurrentStock(sli.FoodItemID) / p.BaseUnitAmt, 2) as CurrentStock,
+        IFNULL(pl.PriceTotal, 0) as PricePerUnit,
+        ROUND(IFNULL(sl.TargetLevel, 0) / p.BaseUnitAmt, 2) as TargetLevel
+    FROM ShoppingListItem sli
+    JOIN FoodItem fi ON sli.FoodItemID = fi.FoodItemID
+    LEFT JOIN Location l ON sli.LocationID = l.LocationID
+    LEFT JOIN Package p ON sli.PackageID = p.PackageID
+    LEFT JOIN StockLevel sl ON sli.FoodItemID = sl.FoodItemID
+    LEFT JOIN LatestPrice pl ON sli.PackageID = pl.PackageID
+    WHERE sli.ShoppingListID = %s
+""", (1,))
+
+
+# Bulk completion: everything below is keyed on the completed list's purchased
+# rows, so a whole shopping trip is a handful of statements instead of one
+# AddRemoveExistingFoodItem call per item.
+PURCHASED_ITEMS_SQL = """
+    SELECT
+        sli.ShoppingListItemID,
+        sli.FoodItemID,
+        sli.LocationID,
+        ROUND(sli.PurchasedQty * p.BaseUnitAmt, 2) AS QtyInBaseUnits
+    FROM ShoppingListItem sli
+    JOIN Package p ON sli.PackageID = p.PackageID
+    WHERE sli.ShoppingListID = %s AND sli.PurchasedQty > 0
+"""
+
+LOCK_PURCHASED_STOCK_SQL = f"""
+    SELECT sb.FoodItemID, sb.LocationID
+    FROM StockBalance sb
+    WHERE sb.FoodItemID IN (SELECT purchased.FoodItemID FROM ({PURCHASED_ITEMS_SQL}) purchased)
+    ORDER BY sb.FoodItemID, sb.LocationID
+    FOR UPDATE
+"""
+
+ADD_PURCHASED_STOCK_SQL = f"""
+    INSERT INTO StockBalance (FoodItemID, LocationID, Qty)
+    SELECT totals.FoodItemID, totals.LocationID, totals.Qty
+    FROM (
+        SELECT purchased.FoodItemID, purchased.LocationID, SUM(purchased.QtyInBaseUnits) AS Qty
+        FROM ({PURCHASED_ITEMS_SQL}) purchased
+        GROUP BY purchased.FoodItemID, purchased.LocationID
+    ) totals
+    ON DUPLICATE KEY UPDATE Qty = StockBalance.Qty + totals.Qty
+"""
+
+INSERT_PURCHASE_TRANSACTIONS_SQL = f"""
+    INSERT INTO InventoryTransaction (
+        FoodItemID, LocationID, HouseholdID, UserID, QtyInBaseUnits, TransactionType, ExpirationDate
+    )
+    SELECT purchased.FoodItemID, purchased.LocationID, l.HouseholdID, %s, purchased.QtyInBaseUnits,
+           'add', CURDATE() + INTERVAL 14 DAY
+    FROM ({PURCHASED_ITEMS_SQL}) purchased
+    JOIN Location l ON l.LocationID = purchased.LocationID
+    ORDER BY purchased.ShoppingListItemID
+"""
+
+INSERT_PURCHASE_LOTS_SQL = f"""
+    INSERT INTO StockLot (FoodItemID, LocationID, ExpirationDate, RemainingQty)
+    SELECT purchased.FoodItemID, purchased.LocationID, CURDATE() + INTERVAL 14 DAY, purchased.QtyInBaseUnits
+    FROM ({PURCHASED_ITEMS_SQL}) purchased
+"""
+
+PURCHASED_PAIRS_SQL = f"""
+    SELECT DISTINCT purchased.FoodItemID, purchased.LocationID
+    FROM ({PURCHASED_ITEMS_SQL}) purchased
+"""
+
+
+# Diff-based item updates. Items are keyed by (FoodItemID, LocationID) within a
+# list; LocationID may be NULL, hence <=>.
+ITEM_CHANGES_TABLE = """
+    JSON_TABLE(%s, '$[*]' COLUMNS (
+        FoodItemID INT PATH '$.FoodItemID',
+        LocationID INT PATH '$.LocationID',
+        PackageID INT PATH '$.PackageID',
+        NeededQty DECIMAL(10,2) PATH '$.NeededQuantity',
+        PurchasedQty INT PATH '$.PurchasedQuantity',
+        TotalPrice DECIMAL(10,2) PATH '$.TotalPrice',
+        Status VARCHAR(20) PATH '$.Status'
+    ))
+"""
+
+ITEM_KEYS_TABLE = """
+    JSON_TABLE(%s, '$[*]' COLUMNS (
+        FoodItemID INT PATH '$.FoodItemID',
+        LocationID INT PATH '$.LocationID'
+    ))
+"""
+
+BUMP_VERSION_SQL = """
+    UPDATE ShoppingList SET Version = Version + 1 WHERE ShoppingListID = %s
+"""
+
+LOCK_LIST_VERSION_SQL = """
+    SELECT Version FROM ShoppingList WHERE ShoppingListID = %s FOR UPDATE
+"""
+
+ITEM_KEYS_PRICE_SQL = f"""
+    SELECT IFNULL(SUM(s.TotalPrice), 0) AS Total
+    FROM ShoppingListItem s
+    JOIN {ITEM_KEYS_TABLE} k
+        ON s.FoodItemID = k.FoodItemID AND s.LocationID <=> k.LocationID
+    WHERE s.ShoppingListID = %s
+"""
+
+DELETE_ITEMS_SQL = f"""
+    DELETE s
+    FROM ShoppingListItem s
+    JOIN {ITEM_KEYS_TABLE} k
+        ON s.FoodItemID = k.FoodItemID AND s.LocationID <=> k.LocationID
+    WHERE s.ShoppingListID = %s
+"""
+
+UPDATE_ITEMS_SQL = f"""
+    UPDATE ShoppingListItem s
+    JOIN {ITEM_CHANGES_TABLE} i
+        ON s.FoodItemID = i.FoodItemID AND s.LocationID <=> i.LocationID
+    SET s.PackageID = i.PackageID,
+        s.NeededQty = i.NeededQty,
+        s.PurchasedQty = i.PurchasedQty,
+        s.TotalPrice = i.TotalPrice,
+        s.Status = IFNULL(i.Status, 'active')
+    WHERE s.ShoppingListID = %s
+"""
+
+INSERT_ITEMS_SQL = f"""
+    INSERT INTO ShoppingListItem (
+        ShoppingListID, FoodItemID, LocationID, PackageID, NeededQty, PurchasedQty, TotalPrice, Status
+    )
+    SELECT %s, i.FoodItemID, i.LocationID, i.PackageID, i.NeededQty, i.PurchasedQty, i.TotalPrice,
+           IFNULL(i.Status, 'active')
+    FROM {ITEM_CHANGES_TABLE} i
+    WHERE NOT EXISTS (
+        SELECT 1 FROM ShoppingListItem s
+        WHERE s.ShoppingListID = %s
+          AND s.FoodItemID = i.FoodItemID
+          AND s.LocationID <=> i.LocationID
+    )
+"""
+
+BUMP_LIST_SQL = """
+    UPDATE ShoppingList
+    SET TotalCost = IFNULL(TotalCost, 0) + %s,
+        Version = Version + 1,
+        LastUpdated = NOW()
+    WHERE ShoppingListID = %s
+"""
+
+LIST_VERSION_SQL = """
+    SELECT TotalCost, Version, HouseholdID FROM ShoppingList WHERE ShoppingListID = %s
+"""
+
+
 # Shopping List 
 
 # Get active shopping list
 @document_api_route(bp, 'get', '/active', 'Get active shopping list', 'Returns the active shopping list for a household')
 @handle_db_error
+@household_etag()
 def get_active_shopping_list():
-    household_id = request.args.get('household_id')
+    household_id = request.args.get('household_id', type=int)
     
     if not household_id:
         return jsonify({'error': 'household_id is required'}), 400
         
-    with db_cursor() as cursor:
-        cursor.execute("""
-            SELECT 
-                ShoppingListID,
-                HouseholdID,
-                Status,
-                LastUpdated,
-                TotalCost
-            FROM ShoppingList 
-            WHERE HouseholdID = %s AND Status = 'active'
-            ORDER BY LastUpdated DESC
-            LIMIT 1
-        """, (household_id,))
-        result = cursor.fetchone()
-        
-        if not result:
-            return jsonify(None), 200
-            
-        return jsonify(result), 200
+    def read_active_list(cursor):
+        cursor.execute(ACTIVE_LIST_SQL, (household_id,))
+        return cursor.fetchone()
+
+    result = cached_household_read(household_id, 'active_list', (), read_active_list)
+    return jsonify(result), 200
 
 @document_api_route(bp, 'post', '/complete-active', 'Complete active list and create new', 'Marks active list as completed, creates a new one, and generates inventory transactions')
 @handle_db_error
@@ -47,18 +259,9 @@ def complete_active_shopping_list():
     if not user_id:
         return jsonify({'error': 'user_id is required for inventory transactions'}), 400
         
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
+    with db_cursor() as cursor:
         # Finds active list
-        cursor.execute("""
-            SELECT ShoppingListID 
-            FROM ShoppingList 
-            WHERE HouseholdID = %s AND Status = 'active'
-            ORDER BY ShoppingListID DESC
-            LIMIT 1
-        """, (household_id,))
+        cursor.execute(ACTIVE_LIST_ID_SQL, (household_id,))
         active_list = cursor.fetchone()
         
         completed_list_id = None
@@ -80,54 +283,107 @@ def complete_active_shopping_list():
         
         # Process Inventory Transactions for purchased items
         if completed_list_id:
-            cursor.execute("""
-                SELECT sli.FoodItemID, sli.LocationID, sli.PackageID, sli.PurchasedQty, p.BaseUnitAmt
-                FROM ShoppingListItem sli
-                JOIN Package p ON sli.PackageID = p.PackageID
-                WHERE sli.ShoppingListID = %s AND sli.PurchasedQty > 0
-            """, (completed_list_id,))
-            purchased_items = cursor.fetchall()
-            
-            for item in purchased_items:
-                qty_in_base_units = float(item['PurchasedQty']) * float(item['BaseUnitAmt'])
-                
-                cursor.callproc('AddRemoveExistingFoodItem', (
-                    item['FoodItemID'],
-                    item['LocationID'],
-                    user_id,
-                    'add',
-                    qty_in_base_units,
-                    None 
-                ))
-                for result in cursor.stored_results():
-                    result.fetchall()
-        
-        conn.commit()
-        
+            cursor.execute(LOCK_PURCHASED_STOCK_SQL, (completed_list_id,))
+            cursor.fetchall()
+            cursor.execute(ADD_PURCHASED_STOCK_SQL, (completed_list_id,))
+            cursor.execute(INSERT_PURCHASE_TRANSACTIONS_SQL, (user_id, completed_list_id))
+            cursor.execute(INSERT_PURCHASE_LOTS_SQL, (completed_list_id,))
+            # Refills the new active list at commit
+            cursor.execute(PURCHASED_PAIRS_SQL, (completed_list_id,))
+            for row in cursor.fetchall():
+                mark_stock_touched(row['FoodItemID'], row['LocationID'])
+        mark_household_changed(household_id)
+
         return jsonify({
             'message': 'Active list completed, inventory updated, and new list created',
             'completed_list_id': completed_list_id,
             'new_active_list_id': new_list_id
         }), 201
-    finally:
-        cursor.close()
-        conn.close()
 
 
-#TODO: 1.2 - needs to filter out household id
-@document_api_route(bp, 'get', '/', 'Get shopping lists', 'Get paginated shopping lists with sorting')
+def _ensure_household_access(household_id: int):
+    user = getattr(g, 'current_user', None)
+    if not user:
+        return jsonify({"error": "Not authenticated"}), 401
+
+    current_household_id = user.get("HouseholdID")
+    if current_household_id is None or household_id is None:
+        return jsonify({"error": "Forbidden"}), 403
+
+    if current_household_id != household_id:
+        return jsonify({"error": "Forbidden"}), 403
+
+    return None
+
+
+def _lists_page_sql(column, descending, after):
+    """LISTS_PAGE_SQL for one sort key and direction, starting after the (value, id) cursor."""
+    direction = 'DESC' if descending else 'ASC'
+    keys = (column,) if column == 'ShoppingListID' else (column, 'ShoppingListID')
+    order = ', '.join(f'{key} {direction}' for key in keys)
+    if after is None:
+        return LISTS_PAGE_SQL.format(after='', order=order), ()
+
+    value, list_id = after
+    op = '<' if descending else '>'
+    if column == 'ShoppingListID':
+        condition, params = f'ShoppingListID {op} %s', (list_id,)
+    elif value is None:
+        # NULLs sort first ascending and last descending
+        condition = f'({column} IS NULL AND ShoppingListID {op} %s)'
+        if not descending:
+            condition = f'({condition} OR {column} IS NOT NULL)'
+        params = (list_id,)
+    else:
+        condition = f'{column} {op} %s OR ({column} = %s AND ShoppingListID {op} %s)'
+        if descending:
+            condition += f' OR {column} IS NULL'
+        condition, params = f'({condition})', (value, value, list_id)
+    return LISTS_PAGE_SQL.format(after=f'\n      AND {condition}', order=order), params
+
+
+for _column in LIST_SORT_COLUMNS:
+    register_query_plan(f'shopping_lists.lists_by_{_column}', _lists_page_sql(_column, True, None)[0], (1, 20))
+
+
+@document_api_route(bp, 'get', '/', 'Get shopping lists', 'Returns a household\'s shopping lists sorted by ?param= (0 id, 1 last updated, 2 status, 3 total cost), paged by an opaque ?after= cursor')
 @handle_db_error
+@household_etag()
 def get_shopping_lists():
+    household_id = request.args.get('household_id', type=int)
+    if not household_id:
+        return jsonify({'error': 'household_id is required'}), 400
+    unauthorized = _ensure_household_access(household_id)
+    if unauthorized:
+        return unauthorized
+
     param = int(request.args.get('param', 0))
-    order = request.args.get('order', 'asc')
-    order_bool = 1 if order == 'asc' else 0
-    
-    with db_cursor() as cursor:
-        cursor.callproc('getShoppingListByParam', [param, order_bool])
-        results = []
-        for result in cursor.stored_results():
-            results = result.fetchall()
-        return jsonify(results), 200
+    if not 0 <= param < len(LIST_SORT_COLUMNS):
+        return jsonify({'error': 'Invalid sort param'}), 400
+    column = LIST_SORT_COLUMNS[param]
+    descending = request.args.get('order', 'asc') != 'asc'
+    limit = min(max(int(request.args.get('limit', 20)), 1), MAX_LIST_PAGE_LIMIT)
+
+    after = None
+    if request.args.get('after'):
+        try:
+            value, list_id = decode_cursor(request.args['after'])
+            after = (value, int(list_id))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    sql, after_params = _lists_page_sql(column, descending, after)
+    with read_snapshot() as cursor:
+        # One extra row tells us whether another page exists
+        cursor.execute(sql, (household_id,) + after_params + (limit + 1,))
+        results = cursor.fetchall()
+
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        next_cursor = encode_cursor(last[column], last['ShoppingListID'])
+    return jsonify({'data': results, 'limit': limit, 'next_cursor': next_cursor}), 200
 
 #TODO: 1.3
 @document_api_route(bp, 'patch', '/<int:shopping_list_id>/complete', 'Complete shopping list', 'Marks a shopping list as completed')
@@ -140,47 +396,18 @@ def complete_shopping_list(shopping_list_id):
         
         if result['affected_rows'] == 0:
             return jsonify({'error': 'Shopping list not found'}), 404
+
+        cursor.execute(LIST_VERSION_SQL, (shopping_list_id,))
+        mark_household_changed(cursor.fetchone()['HouseholdID'])
             
         return jsonify({'message': 'Shopping list completed', 'shopping_list_id': shopping_list_id}), 200
 
 @document_api_route(bp, 'get', '/<int:shopping_list_id>/items', 'Get shopping list items', 'Returns all items in a shopping list')
 @handle_db_error
+@household_etag(SHOPPING_LIST_GENERATION_SQL, 'shopping_list_id')
 def get_shopping_list_items(shopping_list_id):
-    with db_cursor() as cursor:
-        query = """
-            SELECT 
-                sli.ShoppingListItemID,
-                sli.FoodItemID,
-                fi.Name AS FoodItemName,
-                sli.LocationID,
-                l.LocationName,
-                sli.PackageID,
-                p.Label AS PackageLabel,
-                p.BaseUnitAmt AS PackageBaseUnitAmt,
-                CEILING(sli.NeededQty / p.BaseUnitAmt) AS NeededQty,
-                sli.PurchasedQty,
-                sli.TotalPrice,
-                sli.Status,
-                ROUND(GetCurrentStock(sli.FoodItemID) / p.BaseUnitAmt, 2) as CurrentStock,
-                IFNULL(pl.PriceTotal, 0) as PricePerUnit,
-                ROUND(IFNULL(sl.TargetLevel, 0) / p.BaseUnitAmt, 2) as TargetLevel
-            FROM ShoppingListItem sli
-            JOIN FoodItem fi ON sli.FoodItemID = fi.FoodItemID
-            LEFT JOIN Location l ON sli.LocationID = l.LocationID
-            LEFT JOIN Package p ON sli.PackageID = p.PackageID
-            LEFT JOIN StockLevel sl ON sli.FoodItemID = sl.FoodItemID
-            LEFT JOIN (
-                SELECT pl1.PackageID, pl1.PriceTotal
-                FROM PriceLog pl1
-                INNER JOIN (
-                    SELECT PackageID, MAX(CreatedAt) AS MaxCreatedAt
-                    FROM PriceLog
-                    GROUP BY PackageID
-                ) pl2 ON pl1.PackageID = pl2.PackageID AND pl1.CreatedAt = pl2.MaxCreatedAt
-            ) pl ON sli.PackageID = pl.PackageID
-            WHERE sli.ShoppingListID = %s
-        """
-        cursor.execute(query, (shopping_list_id,))
+    with read_snapshot() as cursor:
+        cursor.execute(LIST_ITEMS_SQL, (shopping_list_id,))
         results = cursor.fetchall()
         return jsonify(results), 200
 
@@ -195,33 +422,24 @@ def add_shopping_list_items(shopping_list_id):
     if not items:
         return jsonify({'error': 'items array is required'}), 400
     
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
+    with db_cursor() as cursor:
         items_json = json.dumps(items)
         cursor.callproc('AddShoppingListItemsJSON', [shopping_list_id, items_json])
         
         for result in cursor.stored_results():
             result.fetchall()
         
-        conn.commit()
-        
-        cursor.execute("""
-            SELECT TotalCost 
-            FROM ShoppingList 
-            WHERE ShoppingListID = %s
-        """, (shopping_list_id,))
+        cursor.execute(BUMP_VERSION_SQL, (shopping_list_id,))
+        cursor.execute(LIST_VERSION_SQL, (shopping_list_id,))
         result = cursor.fetchone()
+        mark_household_changed(result['HouseholdID'])
         
         return jsonify({
             'message': 'Items added successfully',
             'shopping_list_id': shopping_list_id,
-            'total_cost': result['TotalCost']
+            'total_cost': result['TotalCost'],
+            'version': result['Version']
         }), 201
-    finally:
-        cursor.close()
-        conn.close()
 
 @document_api_route(bp, 'put', '/active/items', 'Update active shopping list items', 'Updates items in the currently active shopping list for a household')
 @handle_db_error
@@ -235,44 +453,133 @@ def update_active_shopping_list_items():
     if not items:
         return jsonify({'error': 'items array is required'}), 400
         
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
+    with db_cursor() as cursor:
         # Find the active list ID
-        cursor.execute("""
-            SELECT ShoppingListID 
-            FROM ShoppingList 
-            WHERE HouseholdID = %s AND Status = 'active'
-            ORDER BY ShoppingListID DESC
-            LIMIT 1
-        """, (household_id,))
+        cursor.execute(ACTIVE_LIST_ID_SQL, (household_id,))
         row = cursor.fetchone()
         
         if not row:
             return jsonify({'error': 'No active shopping list found for this household'}), 404
             
         shopping_list_id = row['ShoppingListID']
-        
+
+        # Lock the list before its items, in the same order as the diff endpoints
+        cursor.execute(LOCK_LIST_VERSION_SQL, (shopping_list_id,))
+        cursor.fetchone()
+
         items_json = json.dumps(items)
         cursor.callproc('UpdateShoppingListItemsJSON', [shopping_list_id, items_json])
         
         for result in cursor.stored_results():
             result.fetchall()
-            
-        conn.commit()
         
-        cursor.execute("SELECT TotalCost FROM ShoppingList WHERE ShoppingListID = %s", (shopping_list_id,))
+        cursor.execute(BUMP_VERSION_SQL, (shopping_list_id,))
+        cursor.execute(LIST_VERSION_SQL, (shopping_list_id,))
         result = cursor.fetchone()
+        mark_household_changed(result['HouseholdID'])
         
         return jsonify({
             'message': 'Items updated successfully',
             'shopping_list_id': shopping_list_id,
-            'total_cost': result['TotalCost']
+            'total_cost': result['TotalCost'],
+            'version': result['Version']
         }), 200
-    finally:
-        cursor.close()
-        conn.close()
+
+def _item_key(item):
+    return (item.get('FoodItemID'), item.get('LocationID'))
+
+
+def _apply_item_changes(cursor, shopping_list_id, data):
+    """
+    Applies a {version, upserts, deletes} diff to one list and returns
+    (body, status). TotalCost moves by the price difference of the touched
+    rows only.
+    """
+    try:
+        version = int(data.get('version'))
+    except (TypeError, ValueError):
+        return {'error': 'version is required'}, 400
+    upserts = data.get('upserts') or []
+    deletes = data.get('deletes') or []
+    if not isinstance(upserts, list) or not isinstance(deletes, list):
+        return {'error': 'upserts and deletes must be arrays'}, 400
+    for item in upserts + deletes:
+        if not isinstance(item, dict) or item.get('FoodItemID') is None:
+            return {'error': 'Every item needs a FoodItemID'}, 400
+
+    cursor.execute(LOCK_LIST_VERSION_SQL, (shopping_list_id,))
+    row = cursor.fetchone()
+    if not row:
+        return {'error': 'Shopping list not found'}, 404
+    if row['Version'] != version:
+        return {
+            'error': 'Shopping list was changed since it was loaded, reload and try again',
+            'version': row['Version']
+        }, 409
+
+    # Last one wins if the same item is sent twice
+    upserts = list({_item_key(item): item for item in upserts}.values())
+    keys = {_item_key(item) for item in upserts + deletes}
+
+    if keys:
+        keys_json = json.dumps([{'FoodItemID': food_id, 'LocationID': location_id} for food_id, location_id in keys])
+        cursor.execute(ITEM_KEYS_PRICE_SQL, (keys_json, shopping_list_id))
+        old_total = cursor.fetchone()['Total']
+
+        if deletes:
+            cursor.execute(DELETE_ITEMS_SQL, (json.dumps(deletes), shopping_list_id))
+        if upserts:
+            upserts_json = json.dumps(upserts)
+            cursor.execute(UPDATE_ITEMS_SQL, (upserts_json, shopping_list_id))
+            cursor.execute(INSERT_ITEMS_SQL, (shopping_list_id, upserts_json, shopping_list_id))
+
+        cursor.execute(ITEM_KEYS_PRICE_SQL, (keys_json, shopping_list_id))
+        new_total = cursor.fetchone()['Total']
+        cursor.execute(BUMP_LIST_SQL, (new_total - old_total, shopping_list_id))
+
+    cursor.execute(LIST_VERSION_SQL, (shopping_list_id,))
+    result = cursor.fetchone()
+    mark_household_changed(result['HouseholdID'])
+    return {
+        'message': 'Items updated successfully',
+        'shopping_list_id': shopping_list_id,
+        'total_cost': result['TotalCost'],
+        'version': result['Version']
+    }, 200
+
+
+@document_api_route(bp, 'patch', '/active/items', 'Apply item changes to active shopping list',
+                        'Upserts and deletes only the changed items of the household\'s active list. '
+                        'Send the list version you loaded; a stale version gets a 409')
+@handle_db_error
+def patch_active_shopping_list_items():
+    data = request.get_json() or {}
+    household_id = data.get('household_id')
+
+    if not household_id:
+        return jsonify({'error': 'household_id is required'}), 400
+
+    with db_cursor() as cursor:
+        cursor.execute(ACTIVE_LIST_ID_SQL, (household_id,))
+        row = cursor.fetchone()
+
+        if not row:
+            return jsonify({'error': 'No active shopping list found for this household'}), 404
+
+        body, status = _apply_item_changes(cursor, row['ShoppingListID'], data)
+        return jsonify(body), status
+
+
+@document_api_route(bp, 'patch', '/<int:shopping_list_id>/items', 'Apply item changes to shopping list',
+                        'Upserts and deletes only the changed items. Send the list version you loaded; '
+                        'a stale version gets a 409')
+@handle_db_error
+def patch_shopping_list_items(shopping_list_id):
+    data = request.get_json() or {}
+
+    with db_cursor() as cursor:
+        body, status = _apply_item_changes(cursor, shopping_list_id, data)
+        return jsonify(body), status
 
 # update shopping list items for either leaving a list open or closing it
 @document_api_route(bp, 'put', '/<int:shopping_list_id>/items', 'Update shopping list items', 'Updates multiple items in a shopping list using JSON')
@@ -284,100 +591,244 @@ def update_shopping_list_items(shopping_list_id):
     if not items:
         return jsonify({'error': 'items array is required'}), 400
     
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
+    with db_cursor() as cursor:
+        # Lock the list before its items, in the same order as the diff endpoints
+        cursor.execute(LOCK_LIST_VERSION_SQL, (shopping_list_id,))
+        if not cursor.fetchone():
+            return jsonify({'error': 'Shopping list not found'}), 404
+
         items_json = json.dumps(items)
         cursor.callproc('UpdateShoppingListItemsJSON', [shopping_list_id, items_json])
         
         for result in cursor.stored_results():
             result.fetchall()
         
-        conn.commit()
-        
-        cursor.execute("""
-            SELECT TotalCost 
-            FROM ShoppingList 
-            WHERE ShoppingListID = %s
-        """, (shopping_list_id,))
+        cursor.execute(BUMP_VERSION_SQL, (shopping_list_id,))
+        cursor.execute(LIST_VERSION_SQL, (shopping_list_id,))
         result = cursor.fetchone()
+        mark_household_changed(result['HouseholdID'])
         
         return jsonify({
             'message': 'Items updated successfully',
             'shopping_list_id': shopping_list_id,
-            'total_cost': result['TotalCost']
+            'total_cost': result['TotalCost'],
+            'version': result['Version']
         }), 200
-    finally:
-        cursor.close()
-        conn.close()
+
+# Exports stream: rows come off an unbuffered snapshot EXPORT_FETCH_ROWS at
+# a time and leave as roughly EXPORT_CHUNK_CHARS-sized chunks, so memory
+# doesn't grow with the number of lists or items.
+EXPORT_FORMATS = ('json', 'html', 'csv')
+EXPORT_FETCH_ROWS = 500
+EXPORT_CHUNK_CHARS = 16 * 1024
+EXPORT_DEFAULT_DAYS = 365
+
+EXPORT_ROWS_SQL = """
+    SELECT
+        sl.ShoppingListID,
+        sl.HouseholdID,
+        sl.LastUpdated,
+        sl.Status AS ListStatus,
+        sl.TotalCost,
+        sli.ShoppingListItemID,
+        fi.Name AS FoodItemName,
+        sli.NeededQty,
+        sli.PurchasedQty,
+        sli.TotalPrice,
+        sli.Status,
+        l.LocationName,
+        p.Label AS PackageLabel
+    FROM ShoppingList sl
+    LEFT JOIN ShoppingListItem sli ON sli.ShoppingListID = sl.ShoppingListID
+    LEFT JOIN FoodItem fi ON sli.FoodItemID = fi.FoodItemID
+    LEFT JOIN Location l ON sli.LocationID = l.LocationID
+    LEFT JOIN Package p ON sli.PackageID = p.PackageID
+    WHERE {where}
+    ORDER BY sl.LastUpdated, sl.ShoppingListID, sli.ShoppingListItemID
+"""
+
+LIST_EXPORT_SQL = register_query_plan(
+    'shopping_lists.export_list',
+    EXPORT_ROWS_SQL.format(where='sl.ShoppingListID = %s'),
+    (1,),
+)
+
+HOUSEHOLD_EXPORT_SQL = register_query_plan('shopping_lists.export_household', EXPORT_ROWS_SQL.format(where="""
+        sl.HouseholdID = %s
+        AND sl.LastUpdated >= %s
+        AND sl.LastUpdated < %s + INTERVAL 1 DAY
+        AND sl.Status = 'completed'
+"""), (1, '2000-01-01', '2100-01-01'))
+
+EXPORT_CSV_COLUMNS = (
+    'ShoppingListID', 'LastUpdated', 'ListStatus', 'TotalCost', 'FoodItemName', 'PackageLabel',
+    'LocationName', 'NeededQty', 'PurchasedQty', 'TotalPrice', 'Status',
+)
+
+
+def _export_rows(sql, params):
+    with read_snapshot(buffered=False) as cursor:
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(EXPORT_FETCH_ROWS)
+            if not rows:
+                return
+            yield from rows
+
+
+def _group_lists(rows):
+    """(list_info, items) per list; items is lazy and must be read before the next list."""
+    for _, group in groupby(rows, key=itemgetter('ShoppingListID')):
+        first = next(group)
+        list_info = {
+            'ShoppingListID': first['ShoppingListID'],
+            'HouseholdID': first['HouseholdID'],
+            'LastUpdated': first['LastUpdated'],
+            'Status': first['ListStatus'],
+            'TotalCost': first['TotalCost'],
+        }
+        items = (
+            {
+                'ShoppingListItemID': row['ShoppingListItemID'],
+                'FoodItemName': row['FoodItemName'],
+                'NeededQty': row['NeededQty'],
+                'PurchasedQty': row['PurchasedQty'],
+                'TotalPrice': row['TotalPrice'],
+                'Status': row['Status'],
+                'LocationName': row['LocationName'],
+                'PackageLabel': row['PackageLabel'],
+            }
+            for row in chain([first], group)
+            if row['ShoppingListItemID'] is not None
+        )
+        yield list_info, items
+
+
+def _json_list(list_info, items):
+    yield '{"shopping_list": ' + json.dumps(list_info, default=str) + ', "items": ['
+    for index, item in enumerate(items):
+        yield (',\n  ' if index else '\n  ') + json.dumps(item, default=str)
+    yield '\n]}'
+
+
+def _json_lists(header, lists):
+    yield '{' + ''.join(f'{json.dumps(k)}: {json.dumps(v, default=str)}, ' for k, v in header.items())
+    yield '"shopping_lists": ['
+    for index, (list_info, items) in enumerate(lists):
+        yield ',\n' if index else '\n'
+        yield from _json_list(list_info, items)
+    yield '\n]}'
+
+
+class _Echo:
+    """File-like object whose write() hands the line back, so csv.writer can feed a generator."""
+
+    def write(self, value):
+        return value
+
+
+def _csv_rows(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_CSV_COLUMNS)
+    for row in rows:
+        yield writer.writerow([row[column] for column in EXPORT_CSV_COLUMNS])
+
+
+def _chunked(parts):
+    """Join many small strings into fewer, larger writes."""
+    buffer, size = [], 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= EXPORT_CHUNK_CHARS:
+            yield ''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def _export_response(format_type, filename, title, sql, params, json_header=None):
+    rows = _export_rows(sql, params)
+    if format_type == 'csv':
+        body, mimetype = stream_with_context(_csv_rows(rows)), 'text/csv'
+    elif format_type == 'html':
+        body = stream_template('shopping_list_export.html', title=title, lists=_group_lists(rows))
+        mimetype = 'text/html'
+    elif json_header is None:
+        body = stream_with_context(
+            part for list_info, items in _group_lists(rows) for part in _json_list(list_info, items)
+        )
+        mimetype = 'application/json'
+    else:
+        body, mimetype = stream_with_context(_json_lists(json_header, _group_lists(rows))), 'application/json'
+    return Response(
+        _chunked(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}.{format_type}'}
+    )
+
+
+def _unsupported_format(format_type):
+    supported = ', '.join(EXPORT_FORMATS)
+    return jsonify({'error': f'Unsupported format: {format_type}. Supported formats: {supported}'}), 400
+
 
 # Export shopping list
-@document_api_route(bp, 'get', '/<int:shopping_list_id>/export', 'Export shopping list', 'Export shopping list data in JSON or HTML format')
+@document_api_route(bp, 'get', '/<int:shopping_list_id>/export', 'Export shopping list', 'Export shopping list data in JSON, HTML or CSV format')
 @handle_db_error
+@household_etag(SHOPPING_LIST_GENERATION_SQL, 'shopping_list_id')
 def export_shopping_list(shopping_list_id):
     format_type = request.args.get('format', 'json').lower()
     
-    if format_type not in ['json', 'html']:
-        return jsonify({'error': f'Unsupported format: {format_type}. Supported formats: json, html'}), 400
+    if format_type not in EXPORT_FORMATS:
+        return _unsupported_format(format_type)
     
     with db_cursor() as cursor:
-        # sl attributes
-        cursor.execute("""
-            SELECT 
-                sl.ShoppingListID,
-                sl.HouseholdID,
-                sl.LastUpdated,
-                sl.Status,
-                sl.TotalCost
-            FROM ShoppingList sl
-            WHERE sl.ShoppingListID = %s
-        """, (shopping_list_id,))
-        list_info = cursor.fetchone()
-        
-        if not list_info:
+        cursor.execute("SELECT 1 FROM ShoppingList WHERE ShoppingListID = %s", (shopping_list_id,))
+        if not cursor.fetchone():
             return jsonify({'error': 'Shopping list not found'}), 404
-        
-        # sli attributes
-        cursor.execute("""
-            SELECT 
-                sli.ShoppingListItemID,
-                fi.Name AS FoodItemName,
-                sli.NeededQty,
-                sli.PurchasedQty,
-                sli.TotalPrice,
-                sli.Status,
-                l.LocationName,
-                p.Label AS PackageLabel
-            FROM ShoppingListItem sli
-            JOIN FoodItem fi ON sli.FoodItemID = fi.FoodItemID
-            LEFT JOIN Location l ON sli.LocationID = l.LocationID
-            LEFT JOIN Package p ON sli.PackageID = p.PackageID
-            WHERE sli.ShoppingListID = %s
-        """, (shopping_list_id,))
-        items = cursor.fetchall()
-        
-        # JSON export
-        if format_type == 'json':
-            data = {
-                'shopping_list': list_info,
-                'items': items
-            }
-            return Response(
-                json.dumps(data, indent=2, default=str),
-                mimetype='application/json',
-                headers={'Content-Disposition': f'attachment; filename=shopping_list_{shopping_list_id}.json'}
-            )
-        
-        # Html export
-        elif format_type == 'html':
-            html = render_template(
-                'shopping_list_export.html',
-                list_info=list_info,
-                items=items
-            )
-            return Response(
-                html,
-                mimetype='text/html',
-                headers={'Content-Disposition': f'attachment; filename=shopping_list_{shopping_list_id}.html'}
-            )
\ No newline at end of file
+
+    # List header and items come from one snapshot so TotalCost matches the rows
+    return _export_response(
+        format_type,
+        f'shopping_list_{shopping_list_id}',
+        f'Shopping List {shopping_list_id}',
+        LIST_EXPORT_SQL,
+        (shopping_list_id,),
+    )
+
+
+@document_api_route(bp, 'get', '/export', 'Export completed shopping lists', 'Export a household\'s lists completed between ?from= and ?to= (YYYY-MM-DD, default the last year) in JSON, HTML or CSV format')
+@handle_db_error
+@household_etag()
+def export_household_shopping_lists():
+    household_id = request.args.get('household_id', type=int)
+    if not household_id:
+        return jsonify({'error': 'household_id is required'}), 400
+    unauthorized = _ensure_household_access(household_id)
+    if unauthorized:
+        return unauthorized
+
+    format_type = request.args.get('format', 'json').lower()
+    if format_type not in EXPORT_FORMATS:
+        return _unsupported_format(format_type)
+
+    try:
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else date.today()
+        start = (
+            date.fromisoformat(request.args['from']) if request.args.get('from')
+            else end - timedelta(days=EXPORT_DEFAULT_DAYS)
+        )
+    except ValueError:
+        return jsonify({'error': 'from and to must be YYYY-MM-DD dates'}), 400
+    if start > end:
+        return jsonify({'error': 'from must not be after to'}), 400
+
+    return _export_response(
+        format_type,
+        f'shopping_lists_{household_id}_{start}_{end}',
+        f'Shopping Lists {start} to {end}',
+        HOUSEHOLD_EXPORT_SQL,
+        (household_id, start, end),
+        json_header={'household_id': household_id, 'from': start, 'to': end},
+    )
@@ -1,10 +1,235 @@
 from datetime import datetime,time
+import mysql.connector
+from mysql.connector import errorcode
 import pytz
 from flask import jsonify, request, g
-from extensions import db_cursor, get_db, create_api_blueprint, document_api_route, handle_db_error
+from extensions import (
+    get_db,
+    db_cursor,
+    read_snapshot,
+    create_api_blueprint,
+    document_api_route,
+    handle_db_error,
+    register_query_plan,
+    encode_cursor,
+    decode_cursor,
+)
+from shopping_list_refresh import mark_stock_touched
+from household_cache import (
+    cached_household_read,
+    household_etag,
+    mark_household_changed,
+    FOOD_ITEM_GENERATION_SQL,
+)
+from ownership import check_ownership, FOOD_ITEM, LOCATION
 
 bp = create_api_blueprint('transactions', '/api/transactions')
 
+CURSOR_DATETIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Rows folded by `stock checkpoint` move to InventoryTransactionArchive with
+# the same columns. Household.ArchivedThrough is the newest CreatedAt a
+# household has in the archive: pages entirely newer than it come from the
+# hot ledger alone, and only pages reaching back to it read both tables.
+# Both legs of a transfer are always in the same table.
+HISTORY_HORIZON_SQL = """
+    SELECT ArchivedThrough, ArchivedHistoryRows FROM Household WHERE HouseholdID = %s
+"""
+
+HISTORY_COUNT_SQL = register_query_plan('transactions.history_count', """
+    SELECT COUNT(*) as total
+    FROM InventoryTransaction tx
+    WHERE tx.HouseholdID = %s
+      AND tx.TransactionType != 'transfer_in'
+""", (1,))
+
+HISTORY_COLUMNS_SQL = """
+    SELECT 
+        tx.TransactionID,
+        fi.Name AS FoodName,
+        u.DisplayName AS DisplayName,
+        tx.QtyInBaseUnits AS QtyInTotal,
+        p.BaseUnitAmt AS QtyPerPackage,
+        tx.TransactionType,
+        tx.CreatedAt,
+        l.LocationName,
+        CASE
+            WHEN tx.TransactionType = 'transfer_out' THEN l_pair.LocationName
+            ELSE NULL
+        END AS CounterLocationName,
+        bu.Abbreviation AS BaseUnitAbbr,
+        p.Label AS PackageLabel
+"""
+
+HISTORY_ENTITY_JOINS_SQL = """
+    INNER JOIN FoodItem fi ON tx.FoodItemID = fi.FoodItemID
+    INNER JOIN Users u ON tx.UserID = u.UserID
+    INNER JOIN Location l ON tx.LocationID = l.LocationID
+    INNER JOIN BaseUnit bu ON fi.BaseUnitID = bu.UnitID
+    INNER JOIN Package p ON fi.PreferredPackageID = p.PackageID
+    LEFT JOIN InventoryTransaction tx_pair
+        ON tx.TransactionType = 'transfer_out'
+        AND tx_pair.TransferGroupID = tx.TransferGroupID
+        AND tx_pair.TransactionType = 'transfer_in'
+"""
+
+HISTORY_JOINS_SQL = HISTORY_ENTITY_JOINS_SQL + """
+    LEFT JOIN Location l_pair ON tx_pair.LocationID = l_pair.LocationID
+"""
+
+HISTORY_ARCHIVE_JOINS_SQL = HISTORY_ENTITY_JOINS_SQL + """
+    LEFT JOIN InventoryTransactionArchive txa_pair
+        ON tx.TransactionType = 'transfer_out'
+        AND txa_pair.TransferGroupID = tx.TransferGroupID
+        AND txa_pair.TransactionType = 'transfer_in'
+    LEFT JOIN Location l_pair ON l_pair.LocationID = COALESCE(tx_pair.LocationID, txa_pair.LocationID)
+"""
+
+# Keyset condition: rows strictly older than the (CreatedAt, TransactionID) cursor.
+HISTORY_KEYSET_SQL = """
+      AND (tx.CreatedAt < %s OR (tx.CreatedAt = %s AND tx.TransactionID < %s))
+    ORDER BY tx.CreatedAt DESC, tx.TransactionID DESC
+    LIMIT %s
+"""
+
+HISTORY_SELECT_SQL = HISTORY_COLUMNS_SQL + """
+    FROM InventoryTransaction tx
+""" + HISTORY_JOINS_SQL + """
+    WHERE tx.HouseholdID = %s
+      AND tx.TransactionType != 'transfer_in'
+"""
+
+# Offset page as a deferred join: the inner query walks only
+# idx_tx_household_created to pick the page's IDs and counts every match on
+# the way (COUNT(*) OVER() is evaluated before LIMIT), then the wide joins
+# run for the page rows alone.
+HISTORY_PAGE_SQL = register_query_plan('transactions.history_page', HISTORY_COLUMNS_SQL + """,
+        page.TotalCount
+    FROM (
+        SELECT tx.TransactionID, tx.CreatedAt, COUNT(*) OVER() AS TotalCount
+        FROM InventoryTransaction tx
+        WHERE tx.HouseholdID = %s
+          AND tx.TransactionType != 'transfer_in'
+        ORDER BY tx.CreatedAt DESC, tx.TransactionID DESC
+        LIMIT %s OFFSET %s
+    ) page
+    INNER JOIN InventoryTransaction tx ON tx.TransactionID = page.TransactionID
+""" + HISTORY_JOINS_SQL + """
+    ORDER BY page.CreatedAt DESC, page.TransactionID DESC
+""", (1, 5, 0))
+
+HISTORY_AFTER_SQL = register_query_plan(
+    'transactions.history_after', HISTORY_SELECT_SQL + HISTORY_KEYSET_SQL,
+    (1, '2100-01-01 00:00:00', '2100-01-01 00:00:00', 1, 5),
+)
+
+# The same pages across both tables, each read through its
+# (HouseholdID, CreatedAt, TransactionID) index; params repeat per table.
+HISTORY_LEDGER_SQL = """
+    SELECT tx.TransactionID, tx.FoodItemID, tx.LocationID, tx.UserID,
+           tx.QtyInBaseUnits, tx.TransactionType, tx.CreatedAt, tx.TransferGroupID
+    FROM {table} tx
+    WHERE tx.HouseholdID = %s
+      AND tx.TransactionType != 'transfer_in'
+"""
+
+
+def _history_ledger(suffix=''):
+    return ' UNION ALL '.join(
+        '(' + HISTORY_LEDGER_SQL.format(table=table) + suffix + ')'
+        for table in ('InventoryTransaction', 'InventoryTransactionArchive')
+    )
+
+
+HISTORY_ARCHIVE_PAGE_SQL = register_query_plan('transactions.history_archive_page', HISTORY_COLUMNS_SQL + """,
+        tx.TotalCount
+    FROM (
+        SELECT ledger.*, COUNT(*) OVER() AS TotalCount
+        FROM (""" + _history_ledger() + """) ledger
+        ORDER BY ledger.CreatedAt DESC, ledger.TransactionID DESC
+        LIMIT %s OFFSET %s
+    ) tx
+""" + HISTORY_ARCHIVE_JOINS_SQL + """
+    ORDER BY tx.CreatedAt DESC, tx.TransactionID DESC
+""", (1, 1, 5, 0))
+
+# Each table contributes at most one page, so the merge sorts 2 * limit rows.
+HISTORY_ARCHIVE_AFTER_SQL = register_query_plan('transactions.history_archive_after', HISTORY_COLUMNS_SQL + """
+    FROM (""" + _history_ledger(HISTORY_KEYSET_SQL) + """) tx
+""" + HISTORY_ARCHIVE_JOINS_SQL + """
+    ORDER BY tx.CreatedAt DESC, tx.TransactionID DESC
+    LIMIT %s
+""", (1, '2100-01-01 00:00:00', '2100-01-01 00:00:00', 1, 5) * 2 + (5,))
+
+MAX_PAGE_LIMIT = 100
+
+MAX_BATCH_OPERATIONS = 200
+BATCH_MODES = ('all_or_nothing', 'best_effort')
+# Transfers need both legs, so they go through /inventory/transfer instead
+BATCH_TRANSACTION_TYPES = ('add', 'purchase', 'remove', 'expire')
+
+EXPIRING_WINDOW_DAYS = 13
+MAX_EXPIRING_WINDOW_DAYS = 365
+
+# Open lots expiring after today and within the window, one row per item,
+# location and date. idx_lot_location_expiration makes this a range scan.
+# The page query carries the total as COUNT(*) OVER(); the count query is
+# only needed for pages past the end.
+EXPIRING_COUNT_SQL = register_query_plan('transactions.expiring_count', """
+    SELECT COUNT(*) AS total
+    FROM (
+        SELECT 1
+        FROM StockLot lot
+        INNER JOIN Location l ON lot.LocationID = l.LocationID
+        WHERE l.HouseholdID = %s
+          AND lot.ExpirationDate > CURDATE()
+          AND lot.ExpirationDate <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+        GROUP BY lot.FoodItemID, lot.LocationID, lot.ExpirationDate
+    ) expiring
+""", (1, EXPIRING_WINDOW_DAYS))
+
+EXPIRING_PAGE_SQL = register_query_plan('transactions.expiring_page', """
+    SELECT 
+        fi.Name AS FoodName,
+        SUM(lot.RemainingQty) AS QtyInTotal,
+        p.BaseUnitAmt AS QtyPerPackage,
+        lot.ExpirationDate,
+        l.LocationName,
+        bu.Abbreviation AS BaseUnitAbbr,
+        p.Label AS PackageLabel,
+        GetCurrentStock(lot.FoodItemID) AS CurrentStock,
+        COUNT(*) OVER() AS TotalCount
+    FROM StockLot lot
+    INNER JOIN Location l ON lot.LocationID = l.LocationID
+    INNER JOIN FoodItem fi ON lot.FoodItemID = fi.FoodItemID
+    INNER JOIN BaseUnit bu ON fi.BaseUnitID = bu.UnitID
+    INNER JOIN Package p ON fi.PreferredPackageID = p.PackageID
+    WHERE l.HouseholdID = %s
+      AND lot.ExpirationDate > CURDATE()
+      AND lot.ExpirationDate <= DATE_ADD(CURDATE(), INTERVAL %s DAY)
+    GROUP BY 
+        lot.FoodItemID,
+        lot.LocationID,
+        lot.ExpirationDate,
+        fi.Name,
+        l.LocationName,
+        bu.Abbreviation,
+        p.Label,
+        p.BaseUnitAmt
+    ORDER BY lot.ExpirationDate, lot.FoodItemID, lot.LocationID
+    LIMIT %s OFFSET %s
+""", (1, EXPIRING_WINDOW_DAYS, 5, 0))
+
+NEXT_EXPIRATION_SQL = register_query_plan('transactions.next_expiration', """
+    SELECT ExpirationDate
+    FROM StockLot
+    WHERE FoodItemID = %s
+      AND ExpirationDate > CURDATE()
+    ORDER BY ExpirationDate ASC, LotID ASC
+    LIMIT 1
+""", (1,))
+
+
 
 def _ensure_household_access(target_household_id: int):
     user = getattr(g, 'current_user', None)
@@ -22,20 +247,23 @@ def _ensure_household_access(target_household_id: int):
 
 
 def _location_belongs_to_household(location_id: int, household_id: int) -> bool:
-    with db_cursor() as cursor:
-        cursor.execute(
-            "SELECT HouseholdID FROM Location WHERE LocationID=%s LIMIT 1",
-            (location_id,),
-        )
-        row = cursor.fetchone()
-    if not row:
+    return _locations_belong_to_household([location_id], household_id)
+
+
+def _locations_belong_to_household(location_ids, household_id: int) -> bool:
+    location_ids = {int(location_id) for location_id in location_ids}
+    if not location_ids:
         return False
-    location_household_id = row.get("HouseholdID")
-    return (
-        location_household_id is not None
-        and household_id is not None
-        and location_household_id == household_id
-    )
+    return location_ids <= _household_location_ids(location_ids, household_id)
+
+
+def _household_location_ids(location_ids, household_id: int) -> set:
+    """Subset of location_ids that belong to household_id."""
+    location_ids = {int(location_id) for location_id in location_ids}
+    if not location_ids or household_id is None:
+        return set()
+    missing, foreign = check_ownership(household_id, location_ids=location_ids)
+    return {location_id for location_id in location_ids if (LOCATION, location_id) not in missing | foreign}
 
 
 def _ensure_location_access(household_id: int, location_id: int):
@@ -49,78 +277,95 @@ def _ensure_location_access(household_id: int, location_id: int):
     return None
 
 
-def _ensure_location_access_for_current_user(location_id: int):
+def _ensure_location_access_for_current_user(*location_ids: int, food_item_ids=()):
     user = getattr(g, 'current_user', None)
     if not user:
         return jsonify({"error": "Not authenticated"}), 401
     household_id = user.get("HouseholdID")
     if household_id is None:
         return jsonify({"error": "Forbidden"}), 403
-    if not _location_belongs_to_household(location_id, household_id):
+    missing, foreign = check_ownership(household_id, food_item_ids=food_item_ids, location_ids=location_ids)
+    if missing or foreign:
         return jsonify({"error": "Forbidden"}), 403
 
     return None
 
-@document_api_route(bp, 'get', '/<int:household_id>', 'Get transactions by household and page', 'Returns a list of transactions (paged)')
+def _read_history(cursor, household_id, count, offset, after, archived_through):
+    """
+    Up to count history rows, newest first, and whether the archive was read.
+    The hot ledger is tried first: archived rows are never newer than
+    archived_through, so when it fills the page with rows newer than that
+    none of them can belong on it.
+    """
+    if after:
+        branch = (household_id, after[0], after[0], after[1], count)
+        cursor.execute(HISTORY_AFTER_SQL, branch)
+    else:
+        cursor.execute(HISTORY_PAGE_SQL, (household_id, count, offset))
+    results = cursor.fetchall()
+    if archived_through is None or (len(results) == count and results[-1]['CreatedAt'] > archived_through):
+        return results, False
+
+    if after:
+        cursor.execute(HISTORY_ARCHIVE_AFTER_SQL, branch * 2 + (count,))
+    else:
+        cursor.execute(HISTORY_ARCHIVE_PAGE_SQL, (household_id, household_id, count, offset))
+    return cursor.fetchall(), True
+
+@document_api_route(bp, 'get', '/<int:household_id>', 'Get transactions by household and page', 'Returns a list of transactions, paged by ?page= or by an opaque ?after= cursor')
 @handle_db_error
+@household_etag()
 def db_get_transactions_paged(household_id):
     unauthorized = _ensure_household_access(household_id)
     if unauthorized:
         return unauthorized
+    limit = min(max(int(request.args.get('limit', 5)), 1), MAX_PAGE_LIMIT)
+
+    # ?after=<cursor> switches to keyset paging ("after=" alone is the first
+    # page). The exact total is then opt-in since it scans the whole history.
+    keyset = 'after' in request.args
+    include_total = request.args.get('include_total', '0' if keyset else '1') == '1'
     page = int(request.args.get('page', 0))
-    limit = int(request.args.get('limit', 5))
-    offset = page * limit
-    
-    with db_cursor() as cursor:
-        # Get total count
-        count_query = """
-            SELECT COUNT(*) as total
-            FROM InventoryTransaction tx
-            INNER JOIN Users u ON tx.UserID = u.UserID
-            WHERE u.HouseholdID = %s
-              AND tx.TransactionType != 'transfer_in'
-        """
-        cursor.execute(count_query, (household_id,))
-        total = cursor.fetchone()['total']
-
-        # Get paged data
-        query = """
-            SELECT 
-                fi.Name AS FoodName,
-                u.DisplayName AS DisplayName,
-                tx.QtyInBaseUnits AS QtyInTotal,
-                p.BaseUnitAmt AS QtyPerPackage,
-                tx.TransactionType,
-                tx.CreatedAt,
-                l.LocationName,
-                CASE
-                    WHEN tx.TransactionType = 'transfer_out' THEN l_pair.LocationName
-                    ELSE NULL
-                END AS CounterLocationName,
-                bu.Abbreviation AS BaseUnitAbbr,
-                p.Label AS PackageLabel
-            FROM InventoryTransaction tx
-            INNER JOIN FoodItem fi ON tx.FoodItemID = fi.FoodItemID
-            INNER JOIN Users u ON tx.UserID = u.UserID
-            INNER JOIN Location l ON tx.LocationID = l.LocationID
-            INNER JOIN BaseUnit bu ON fi.BaseUnitID = bu.UnitID
-            INNER JOIN Package p ON fi.PreferredPackageID = p.PackageID
-            LEFT JOIN InventoryTransaction tx_pair
-                ON tx.TransactionType = 'transfer_out'
-                AND tx_pair.TransactionType = 'transfer_in'
-                AND tx_pair.UserID = tx.UserID
-                AND tx_pair.FoodItemID = tx.FoodItemID
-                AND tx_pair.QtyInBaseUnits = tx.QtyInBaseUnits
-                AND tx_pair.CreatedAt BETWEEN tx.CreatedAt AND DATE_ADD(tx.CreatedAt, INTERVAL 5 SECOND)
-            LEFT JOIN Location l_pair ON tx_pair.LocationID = l_pair.LocationID
-            WHERE u.HouseholdID = %s
-              AND tx.TransactionType != 'transfer_in'
-            ORDER BY tx.CreatedAt DESC
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(query, (household_id, limit, offset))
-        results = cursor.fetchall()
-        
+
+    after = None
+    if keyset and request.args.get('after'):
+        try:
+            created_at, transaction_id = decode_cursor(request.args['after'])
+            after = (datetime.strptime(created_at, CURSOR_DATETIME_FORMAT), int(transaction_id))
+        except (ValueError, TypeError):
+            return jsonify({'error': 'Invalid cursor'}), 400
+
+    with read_snapshot() as cursor:
+        cursor.execute(HISTORY_HORIZON_SQL, (household_id,))
+        horizon = cursor.fetchone() or {}
+        archived_rows = horizon.get('ArchivedHistoryRows') or 0
+
+        # One extra row tells us whether another page exists
+        offset = 0 if keyset else page * limit
+        results, read_archive = _read_history(
+            cursor, household_id, limit + 1, offset, after, horizon.get('ArchivedThrough')
+        )
+
+        total = None
+        if include_total:
+            if results and 'TotalCount' in results[0]:
+                total = results[0]['TotalCount']
+                if not read_archive:
+                    total += archived_rows
+            else:
+                # Keyset pages and pages past the end carry no window total
+                cursor.execute(HISTORY_COUNT_SQL, (household_id,))
+                total = cursor.fetchone()['total'] + archived_rows
+        for row in results:
+            row.pop('TotalCount', None)
+
+        has_more = len(results) > limit
+        results = results[:limit]
+        next_cursor = None
+        if has_more:
+            last = results[-1]
+            next_cursor = encode_cursor(last['CreatedAt'].strftime(CURSOR_DATETIME_FORMAT), last['TransactionID'])
+
         # set New York Time Zone
         tz = pytz.timezone("America/New_York")
         for row in results:
@@ -143,15 +388,19 @@ def db_get_transactions_paged(household_id):
             
             row['FormattedPackages'] = _format_packages(whole_packages, remainder, package_label, base_unit, total_qty)
 
-        return jsonify({
+        response = {
             'data': results,
             'total': total,
-            'page': page,
-            'limit': limit
-        }), 200
-
-@document_api_route(bp,'get','/expiring/<int:household_id>','Get transactions expiring in 7 days by household','Returns a list of expiring transactions (paged)')
+            'limit': limit,
+            'next_cursor': next_cursor,
+        }
+        if not keyset:
+            response['page'] = page
+        return jsonify(response), 200
+
+@document_api_route(bp,'get','/expiring/<int:household_id>','Get stock expiring soon by household','Returns open stock lots expiring within ?days= (default 13), paged')
 @handle_db_error
+@household_etag()
 def db_get_expiring_transactions(household_id):
     unauthorized = _ensure_household_access(household_id)
     if unauthorized:
@@ -159,93 +408,20 @@ def db_get_expiring_transactions(household_id):
     page = int(request.args.get('page', 0))
     limit = int(request.args.get('limit', 5))
     offset = page * limit
+    days = min(max(int(request.args.get('days', EXPIRING_WINDOW_DAYS)), 1), MAX_EXPIRING_WINDOW_DAYS)
 
-    with db_cursor() as cursor:
-        # Get total count
-        count_query = f"""
-            WITH LatestExpiring AS (
-                SELECT 
-                    tx.FoodItemID,
-                    MAX(tx.ExpirationDate) AS LatestExpiration
-                FROM InventoryTransaction tx
-                INNER JOIN Location l ON tx.LocationID = l.LocationID
-                WHERE 
-                    l.HouseholdID = %s
-                    AND tx.TransactionType IN ('add', 'purchase', 'transfer_in')
-                    AND tx.ExpirationDate IS NOT NULL
-                GROUP BY tx.FoodItemID
-            )
-            SELECT COUNT(*) as total
-            FROM LatestExpiring le
-            INNER JOIN InventoryTransaction tx 
-                ON tx.FoodItemID = le.FoodItemID 
-                AND tx.ExpirationDate = le.LatestExpiration
-            INNER JOIN FoodItem fi ON tx.FoodItemID = fi.FoodItemID
-            INNER JOIN Location l ON tx.LocationID = l.LocationID
-            WHERE 
-                l.HouseholdID = %s AND
-                getCurrentStock(fi.FoodItemID) > 0 AND
-                DATE(tx.ExpirationDate) > CURDATE() AND 
-                DATE(tx.ExpirationDate) <= DATE_ADD(CURDATE(), INTERVAL 7 DAY)
-        """
-        cursor.execute(count_query, (household_id, household_id))
-        total = cursor.fetchone()['total']
-
-        # Get paged data
-        query = f"""
-            WITH LatestExpiring AS (
-                SELECT 
-                    tx.FoodItemID,
-                    MAX(tx.ExpirationDate) AS LatestExpiration
-                FROM InventoryTransaction tx
-                INNER JOIN Location l ON tx.LocationID = l.LocationID
-                WHERE 
-                    l.HouseholdID = %s
-                    AND tx.TransactionType IN ('add', 'purchase', 'transfer_in')
-                    AND tx.ExpirationDate IS NOT NULL
-                GROUP BY tx.FoodItemID
-            )
-            SELECT 
-                fi.Name AS FoodName,
-                LEAST(SUM(tx.QtyInBaseUnits), MAX(getCurrentStock(fi.FoodItemID))) AS QtyInTotal,
-                p.BaseUnitAmt AS QtyPerPackage,
-                tx.ExpirationDate,
-                l.LocationName,
-                bu.Abbreviation AS BaseUnitAbbr,
-                p.Label AS PackageLabel,
-                MAX(getCurrentStock(fi.FoodItemID)) AS CurrentStock
-            FROM LatestExpiring le
-            INNER JOIN InventoryTransaction tx 
-                ON tx.FoodItemID = le.FoodItemID 
-                AND (
-                    tx.ExpirationDate = le.LatestExpiration
-                    OR (tx.ExpirationDate IS NULL AND le.LatestExpiration IS NOT NULL)
-                )
-                AND tx.TransactionType IN ('add', 'purchase', 'transfer_in')
-            INNER JOIN FoodItem fi ON tx.FoodItemID = fi.FoodItemID
-            INNER JOIN Location l ON tx.LocationID = l.LocationID
-            INNER JOIN BaseUnit bu ON fi.BaseUnitID = bu.UnitID
-            INNER JOIN Package p ON fi.PreferredPackageID = p.PackageID
-            WHERE 
-                l.HouseholdID = %s
-                AND getCurrentStock(fi.FoodItemID) > 0
-                AND DATE(tx.ExpirationDate) > CURDATE()
-                AND DATE(tx.ExpirationDate) <= DATE_ADD(CURDATE(), INTERVAL 13 DAY)
-            GROUP BY 
-                fi.Name,
-                tx.ExpirationDate,
-                l.LocationName,
-                bu.Abbreviation,
-                p.Label,
-                p.BaseUnitAmt,
-                fi.FoodItemID
-            HAVING QtyInTotal > 0
-            ORDER BY tx.ExpirationDate
-            LIMIT %s OFFSET %s
-        """
-        cursor.execute(query, (household_id, household_id, limit, offset))
+    with read_snapshot() as cursor:
+        cursor.execute(EXPIRING_PAGE_SQL, (household_id, days, limit, offset))
         results = cursor.fetchall()
 
+        if results:
+            total = results[0]['TotalCount']
+        else:
+            cursor.execute(EXPIRING_COUNT_SQL, (household_id, days))
+            total = cursor.fetchone()['total']
+        for row in results:
+            row.pop('TotalCount', None)
+
         # set New York Time Zone
         tz = pytz.timezone("America/New_York")
         for row in results:
@@ -283,6 +459,7 @@ def db_get_expiring_transactions(household_id):
                         'Get current inventory totals',
                         'Returns inventory totals for all food items in household')
 @handle_db_error
+@household_etag()
 def get_inventory_totals(household_id):
     unauthorized = _ensure_household_access(household_id)
     if unauthorized:
@@ -292,29 +469,17 @@ def get_inventory_totals(household_id):
     if search_query == '':
         search_query = None
     
-    with db_cursor() as cursor:
-        cursor.callproc('GetHouseholdInventory', (household_id, search_query))
-        results = []
-        for result in cursor.stored_results():
-            results = result.fetchall()
-            break
-        
-        for item in results:
-            total_qty = float(item['TotalQtyInBaseUnits'])
-            whole_packages = int(item['WholePackages']) if item['WholePackages'] else 0
-            remainder = float(item['Remainder']) if item['Remainder'] else 0
-            package_label = item['PackageLabel']
-            base_unit = item['BaseUnitAbbr']
-            
-            item['FormattedBaseUnits'] = f"{round(total_qty)}{base_unit}"
-            item['FormattedPackages'] = _format_packages(whole_packages, remainder, package_label, base_unit, total_qty)
-        
-        return jsonify(results), 200
+    results = cached_household_read(
+        household_id, 'inventory', (search_query,),
+        lambda cursor: _read_inventory(cursor, 'GetHouseholdInventory', (household_id, search_query)),
+    )
+    return jsonify(results), 200
 
 @document_api_route(bp, 'get', '/inventory/<int:household_id>/location/<int:location_id>', 
                         'Get inventory by location', 
                         'Returns food items filtered by location')
 @handle_db_error
+@household_etag()
 def get_inventory_by_location(household_id, location_id):
     unauthorized = _ensure_location_access(household_id, location_id)
     if unauthorized:
@@ -324,24 +489,31 @@ def get_inventory_by_location(household_id, location_id):
     if search_query == '':
         search_query = None
     
-    with db_cursor() as cursor:
-        cursor.callproc('GetInventoryByLocation', (household_id, location_id, search_query))
-        results = []
-        for result in cursor.stored_results():
-            results = result.fetchall()
-            break
-        
-        for item in results:
-            total_qty = float(item['TotalQtyInBaseUnits'])
-            whole_packages = int(item['WholePackages']) if item['WholePackages'] else 0
-            remainder = float(item['Remainder']) if item['Remainder'] else 0
-            package_label = item['PackageLabel']
-            base_unit = item['BaseUnitAbbr']
-            
-            item['FormattedBaseUnits'] = f"{round(total_qty)}{base_unit}"
-            item['FormattedPackages'] = _format_packages(whole_packages, remainder, package_label, base_unit, total_qty)
-        
-        return jsonify(results), 200
+    results = cached_household_read(
+        household_id, 'inventory_by_location', (location_id, search_query),
+        lambda cursor: _read_inventory(cursor, 'GetInventoryByLocation', (household_id, location_id, search_query)),
+    )
+    return jsonify(results), 200
+
+
+def _read_inventory(cursor, procedure, args):
+    cursor.callproc(procedure, args)
+    results = []
+    for result in cursor.stored_results():
+        results = result.fetchall()
+        break
+
+    for item in results:
+        total_qty = float(item['TotalQtyInBaseUnits'])
+        whole_packages = int(item['WholePackages']) if item['WholePackages'] else 0
+        remainder = float(item['Remainder']) if item['Remainder'] else 0
+        package_label = item['PackageLabel']
+        base_unit = item['BaseUnitAbbr']
+
+        item['FormattedBaseUnits'] = f"{round(total_qty)}{base_unit}"
+        item['FormattedPackages'] = _format_packages(whole_packages, remainder, package_label, base_unit, total_qty)
+
+    return results
 
 
 @document_api_route(bp, 'post', '/inventory/transaction', 
@@ -365,15 +537,14 @@ def create_inventory_transaction():
     if transaction_type not in ('add', 'purchase', 'transfer_in'):
         expiration_date = None
     
-    unauthorized = _ensure_location_access_for_current_user(location_id)
+    unauthorized = _ensure_location_access_for_current_user(location_id, food_item_ids=[food_item_id])
     if unauthorized:
         return unauthorized
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-    
-    try:
-        cursor.callproc('AddRemoveExistingFoodItem', (
+    with db_cursor() as cursor:
+        # Runs in the request's transaction with the access check and the
+        # shopping-list refresh; init_request_db commits or rolls back.
+        cursor.callproc('ApplyInventoryOperation', (
             food_item_id,
             location_id,
             user_id,
@@ -381,34 +552,240 @@ def create_inventory_transaction():
             quantity,
             expiration_date
         ))
-        cursor.fetchall() 
+        for result in cursor.stored_results():
+            result.fetchall()
+        mark_stock_touched(food_item_id, location_id)
+        mark_household_changed(g.current_user.get("HouseholdID"))
 
-        conn.commit()
-        
         return jsonify({
             'message': 'Transaction created successfully',
             'food_item_id': food_item_id,
             'transaction_type': transaction_type,
             'quantity': quantity
         }), 201
-    finally:
-        cursor.close()
-        conn.close()
+
+
+@document_api_route(bp, 'post', '/inventory/transfer',
+                        'Transfer inventory between locations',
+                        'Moves stock from one location to another as a single atomic transfer')
+@handle_db_error
+def create_inventory_transfer():
+    data = request.get_json() or {}
+
+    required_fields = ['food_item_id', 'from_location_id', 'to_location_id', 'user_id', 'quantity']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({'error': f'Missing required field: {field}'}), 400
+
+    food_item_id = data['food_item_id']
+    from_location_id = data['from_location_id']
+    to_location_id = data['to_location_id']
+    user_id = data['user_id']
+    quantity = float(data['quantity'])
+    expiration_date = data.get('expiration_date')
+
+    if str(from_location_id) == str(to_location_id):
+        return jsonify({'error': 'Source and destination locations must differ'}), 400
+    if quantity <= 0:
+        return jsonify({'error': 'Quantity must be greater than zero'}), 400
+
+    unauthorized = _ensure_location_access_for_current_user(
+        from_location_id, to_location_id, food_item_ids=[food_item_id]
+    )
+    if unauthorized:
+        return unauthorized
+
+    with db_cursor() as cursor:
+        cursor.callproc('TransferFoodItem', (
+            food_item_id,
+            from_location_id,
+            to_location_id,
+            user_id,
+            quantity,
+            expiration_date
+        ))
+        transfer_group_id = None
+        for result in cursor.stored_results():
+            row = result.fetchone()
+            if row:
+                transfer_group_id = row['TransferGroupID']
+        mark_stock_touched(food_item_id, from_location_id)
+        mark_stock_touched(food_item_id, to_location_id)
+        mark_household_changed(g.current_user.get("HouseholdID"))
+
+        return jsonify({
+            'message': 'Transfer created successfully',
+            'food_item_id': food_item_id,
+            'transfer_group_id': transfer_group_id,
+            'from_location_id': from_location_id,
+            'to_location_id': to_location_id,
+            'quantity': quantity
+        }), 201
+
+
+def _parse_batch_operation(operation, default_user_id):
+    """Returns (operation, error) for one entry of a batch request."""
+    if not isinstance(operation, dict):
+        return None, 'Operation must be an object'
+    for field in ('food_item_id', 'location_id', 'transaction_type', 'quantity'):
+        if field not in operation:
+            return None, f'Missing required field: {field}'
+
+    user_id = operation.get('user_id', default_user_id)
+    if user_id is None:
+        return None, 'Missing required field: user_id'
+
+    transaction_type = operation['transaction_type']
+    if transaction_type not in BATCH_TRANSACTION_TYPES:
+        return None, f'Unsupported transaction_type: {transaction_type}'
+
+    try:
+        food_item_id = int(operation['food_item_id'])
+        location_id = int(operation['location_id'])
+        quantity = float(operation['quantity'])
+    except (TypeError, ValueError):
+        return None, 'food_item_id, location_id and quantity must be numbers'
+    if quantity <= 0:
+        return None, 'Quantity must be greater than zero'
+
+    expiration_date = operation.get('expiration_date')
+    if transaction_type not in ('add', 'purchase'):
+        expiration_date = None
+
+    return {
+        'food_item_id': food_item_id,
+        'location_id': location_id,
+        'user_id': user_id,
+        'transaction_type': transaction_type,
+        'quantity': quantity,
+        'expiration_date': expiration_date,
+    }, None
+
+
+def _batch_result(index, status, operation=None, error=None):
+    result = {'index': index, 'status': status}
+    if operation:
+        result['food_item_id'] = operation['food_item_id']
+        result['transaction_type'] = operation['transaction_type']
+        result['quantity'] = operation['quantity']
+    if error:
+        result['error'] = error
+    return result
+
+
+@document_api_route(bp, 'post', '/inventory/transactions:batch',
+                        'Create inventory transactions in bulk',
+                        'Applies a list of add/purchase/remove/expire operations in one database transaction. '
+                        'mode=all_or_nothing (default) rolls everything back on the first failure, '
+                        'mode=best_effort keeps the operations that succeeded, unless a deadlock rolls the whole batch back')
+@handle_db_error
+def create_inventory_transactions_batch():
+    data = request.get_json() or {}
+
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > MAX_BATCH_OPERATIONS:
+        return jsonify({'error': f'At most {MAX_BATCH_OPERATIONS} operations per batch'}), 400
+
+    mode = data.get('mode', 'all_or_nothing')
+    if mode not in BATCH_MODES:
+        return jsonify({'error': f"mode must be one of: {', '.join(BATCH_MODES)}"}), 400
+
+    user = getattr(g, 'current_user', None)
+    if not user:
+        return jsonify({"error": "Not authenticated"}), 401
+    household_id = user.get("HouseholdID")
+    if household_id is None:
+        return jsonify({"error": "Forbidden"}), 403
+
+    results = [None] * len(operations)
+    parsed = []
+    for index, operation in enumerate(operations):
+        operation, error = _parse_batch_operation(operation, data.get('user_id'))
+        if error:
+            results[index] = _batch_result(index, 'error', error=error)
+        else:
+            parsed.append((index, operation))
+
+    # One ownership check for every item and location in the batch
+    missing, foreign = check_ownership(
+        household_id,
+        food_item_ids=[operation['food_item_id'] for _, operation in parsed],
+        location_ids=[operation['location_id'] for _, operation in parsed],
+    )
+    not_owned = missing | foreign
+    pending = []
+    for index, operation in parsed:
+        if ((FOOD_ITEM, operation['food_item_id']) in not_owned
+                or (LOCATION, operation['location_id']) in not_owned):
+            results[index] = _batch_result(index, 'error', operation, 'Forbidden')
+        else:
+            pending.append((index, operation))
+
+    if mode == 'all_or_nothing' and len(pending) < len(operations):
+        for index, operation in pending:
+            results[index] = _batch_result(index, 'skipped', operation)
+        return jsonify({'mode': mode, 'applied': 0, 'failed': len(operations) - len(pending),
+                        'results': results}), 400
+
+    # Take the StockBalance locks in food item order so two batches touching
+    # the same items can't deadlock. The sort is stable, so operations on one
+    # item still run in the order they were sent.
+    pending.sort(key=lambda entry: entry[1]['food_item_id'])
+
+    with db_cursor() as cursor:
+        for position, (index, operation) in enumerate(pending):
+            if mode == 'best_effort':
+                cursor.execute("SAVEPOINT batch_operation")
+            try:
+                cursor.callproc('ApplyInventoryOperation', (
+                    operation['food_item_id'],
+                    operation['location_id'],
+                    operation['user_id'],
+                    operation['transaction_type'],
+                    operation['quantity'],
+                    operation['expiration_date']
+                ))
+            except mysql.connector.Error as e:
+                results[index] = _batch_result(index, 'error', operation, e.msg)
+                # A deadlock has already rolled back the whole transaction,
+                # savepoint included, so best_effort can't carry on after it
+                # any more than after a failed savepoint rollback.
+                if mode == 'best_effort' and e.errno != errorcode.ER_LOCK_DEADLOCK:
+                    try:
+                        cursor.execute("ROLLBACK TO SAVEPOINT batch_operation")
+                    except mysql.connector.Error:
+                        pass
+                    else:
+                        continue
+                get_db().rollback()
+                for applied_index, applied_operation in pending[:position]:
+                    if results[applied_index]['status'] == 'applied':
+                        results[applied_index] = _batch_result(applied_index, 'rolled_back', applied_operation)
+                for skipped_index, skipped_operation in pending[position + 1:]:
+                    results[skipped_index] = _batch_result(skipped_index, 'skipped', skipped_operation)
+                failed = sum(1 for result in results if result['status'] == 'error')
+                return jsonify({'mode': mode, 'applied': 0, 'failed': failed, 'results': results}), 409
+            results[index] = _batch_result(index, 'applied', operation)
+            mark_stock_touched(operation['food_item_id'], operation['location_id'])
+            mark_household_changed(household_id)
+
+    applied = sum(1 for result in results if result['status'] == 'applied')
+    return jsonify({
+        'mode': mode,
+        'applied': applied,
+        'failed': len(results) - applied,
+        'results': results
+    }), 200
 
 
 @document_api_route(bp, 'get', '/food-item/<int:food_item_id>/latest-expiration', 'Get latest upcoming expiration', 'Returns the latest non-expired expiration date for a food item')
 @handle_db_error
+@household_etag(FOOD_ITEM_GENERATION_SQL, 'food_item_id')
 def get_latest_expiration(food_item_id):
     with db_cursor() as cursor:
-        cursor.execute("""
-            SELECT ExpirationDate
-            FROM InventoryTransaction
-            WHERE FoodItemID = %s
-              AND ExpirationDate IS NOT NULL
-              AND DATE(ExpirationDate) > CURDATE()
-            ORDER BY ExpirationDate ASC, CreatedAt ASC
-            LIMIT 1
-        """, (food_item_id,))
+        cursor.execute(NEXT_EXPIRATION_SQL, (food_item_id,))
         row = cursor.fetchone()
         latest = row.get('ExpirationDate') if row else None
 
@@ -433,46 +810,38 @@ def update_latest_expiration(food_item_id):
     except ValueError:
         return jsonify({'error': 'expiration_date must be in YYYY-MM-DD format'}), 400
 
-    conn = get_db()
-    cursor = conn.cursor(dictionary=True)
-
-    try:
-        cursor.execute("""
-            SELECT ExpirationDate
-            FROM InventoryTransaction
-            WHERE FoodItemID = %s
-              AND ExpirationDate IS NOT NULL
-              AND DATE(ExpirationDate) > CURDATE()
-            ORDER BY ExpirationDate ASC, CreatedAt ASC
-            LIMIT 1
-        """, (food_item_id,))
+    with db_cursor() as cursor:
+        cursor.execute(NEXT_EXPIRATION_SQL, (food_item_id,))
         row = cursor.fetchone()
         latest_expiration = row.get('ExpirationDate') if row else None
 
+        # Only the open lot(s) carrying that date change; the ledger keeps
+        # the dates that were recorded at the time.
         if not latest_expiration:
             cursor.execute("""
-                UPDATE InventoryTransaction
+                UPDATE StockLot
                 SET ExpirationDate = %s
                 WHERE FoodItemID = %s
                   AND ExpirationDate IS NULL
             """, (new_expiration_date, food_item_id))
         else:
             cursor.execute("""
-                UPDATE InventoryTransaction
+                UPDATE StockLot
                 SET ExpirationDate = %s
                 WHERE FoodItemID = %s
                   AND ExpirationDate = %s
             """, (new_expiration_date, food_item_id, latest_expiration))
-        conn.commit()
+
+        cursor.execute(FOOD_ITEM_GENERATION_SQL, (food_item_id,))
+        owner = cursor.fetchone()
+        if owner:
+            mark_household_changed(owner['HouseholdID'])
 
         return jsonify({
             'message': 'Expiration dates updated',
             'previous_expiration_date': latest_expiration.isoformat() if latest_expiration and hasattr(latest_expiration, 'isoformat') else str(latest_expiration) if latest_expiration else None,
             'expiration_date': new_expiration_date.isoformat()
         }), 200
-    finally:
-        cursor.close()
-        conn.close()
 
 
 def _format_packages(whole_packages, remainder, package_label, base_unit, total_qty):
@@ -0,0 +1,129 @@
+"""
+App-side replacement for the update_shoppinglist_event trigger. Handlers queue
+every (FoodItemID, LocationID) they write with mark_stock_touched(), and
+flush_touched_stock() reconciles the active lists for the whole set right
+before the request commits, instead of once per ledger row.
+"""
+from flask import g
+
+REFRESH_CHUNK_SIZE = 500
+
+HOUSEHOLD_PAIRS_SQL = """
+    SELECT sb.FoodItemID, sb.LocationID
+    FROM StockBalance sb
+    JOIN Location l ON l.LocationID = sb.LocationID
+    WHERE l.HouseholdID = %s
+"""
+
+ENSURE_ACTIVE_LIST_SQL = """
+    INSERT INTO ShoppingList (HouseholdID, Status, LastUpdated)
+    SELECT DISTINCT l.HouseholdID, 'active', NOW()
+    FROM ({pairs}) touched
+    JOIN Location l ON l.LocationID = touched.LocationID
+    WHERE NOT EXISTS (
+        SELECT 1 FROM ShoppingList sl
+        WHERE sl.HouseholdID = l.HouseholdID AND sl.Status = 'active'
+    )
+"""
+
+DESIRED_ITEMS_SQL = """
+    SELECT
+        touched.FoodItemID,
+        touched.LocationID,
+        (
+            SELECT MAX(sl.ShoppingListID)
+            FROM ShoppingList sl
+            WHERE sl.HouseholdID = l.HouseholdID AND sl.Status = 'active'
+        ) AS ShoppingListID,
+        COALESCE(
+            fi.PreferredPackageID,
+            (SELECT MAX(p.PackageID) FROM Package p WHERE p.FoodItemID = touched.FoodItemID)
+        ) AS PackageID,
+        GREATEST(st.TargetLevel - COALESCE(sb.Qty, 0), 0) AS NeededQty
+    FROM (SELECT DISTINCT FoodItemID, LocationID FROM ({pairs}) pairs) touched
+    JOIN Location l ON l.LocationID = touched.LocationID
+    JOIN StockLevel st ON st.FoodItemID = touched.FoodItemID AND st.TargetLevel IS NOT NULL
+    JOIN FoodItem fi ON fi.FoodItemID = touched.FoodItemID
+    LEFT JOIN StockBalance sb
+        ON sb.FoodItemID = touched.FoodItemID
+        AND sb.LocationID = touched.LocationID
+"""
+
+DELETE_STOCKED_ITEMS_SQL = """
+    DELETE s
+    FROM ShoppingListItem s
+    JOIN ({desired}) d
+        ON s.ShoppingListID = d.ShoppingListID
+        AND s.FoodItemID = d.FoodItemID
+        AND s.LocationID = d.LocationID
+    WHERE d.NeededQty = 0
+      AND s.Status = 'active'
+"""
+
+UPDATE_NEEDED_ITEMS_SQL = """
+    UPDATE ShoppingListItem s
+    JOIN ({desired}) d
+        ON s.ShoppingListID = d.ShoppingListID
+        AND s.FoodItemID = d.FoodItemID
+        AND s.LocationID = d.LocationID
+    SET s.NeededQty = d.NeededQty,
+        s.Status = 'active',
+        s.PackageID = COALESCE(d.PackageID, s.PackageID)
+    WHERE d.NeededQty > 0
+"""
+
+INSERT_NEEDED_ITEMS_SQL = """
+    INSERT INTO ShoppingListItem (ShoppingListID, FoodItemID, LocationID, PackageID, NeededQty, Status)
+    SELECT d.ShoppingListID, d.FoodItemID, d.LocationID, d.PackageID, d.NeededQty, 'active'
+    FROM ({desired}) d
+    WHERE d.NeededQty > 0
+      AND NOT EXISTS (
+        SELECT 1 FROM ShoppingListItem s
+        WHERE s.ShoppingListID = d.ShoppingListID
+          AND s.FoodItemID = d.FoodItemID
+          AND s.LocationID = d.LocationID
+      )
+"""
+
+
+def mark_stock_touched(food_item_id, location_id):
+    """Queue a (FoodItemID, LocationID) pair for this request's list refresh."""
+    if food_item_id is None or location_id is None:
+        return
+    touched = g.setdefault('touched_stock', set())
+    touched.add((int(food_item_id), int(location_id)))
+
+
+def flush_touched_stock(conn):
+    """before_commit hook for init_request_db: refresh everything queued."""
+    touched = g.pop('touched_stock', None)
+    if not touched:
+        return
+    cursor = conn.cursor(dictionary=True, buffered=True)
+    try:
+        refresh_pairs(cursor, touched)
+    finally:
+        cursor.close()
+
+
+def refresh_pairs(cursor, pairs):
+    pairs = sorted(set(pairs))
+    for start in range(0, len(pairs), REFRESH_CHUNK_SIZE):
+        chunk = pairs[start:start + REFRESH_CHUNK_SIZE]
+        pairs_sql = ' UNION ALL '.join(['SELECT %s AS FoodItemID, %s AS LocationID'] * len(chunk))
+        params = tuple(value for pair in chunk for value in pair)
+        _reconcile(cursor, pairs_sql, params)
+
+
+def refresh_household(cursor, household_id):
+    """Full recompute for every item/location the household holds stock in."""
+    _reconcile(cursor, HOUSEHOLD_PAIRS_SQL, (household_id,))
+
+
+def _reconcile(cursor, pairs_sql, params):
+    cursor.execute(ENSURE_ACTIVE_LIST_SQL.format(pairs=pairs_sql), params)
+    desired = DESIRED_ITEMS_SQL.format(pairs=pairs_sql)
+    # Update before insert so freshly inserted rows aren't touched twice.
+    cursor.execute(DELETE_STOCKED_ITEMS_SQL.format(desired=desired), params)
+    cursor.execute(UPDATE_NEEDED_ITEMS_SQL.format(desired=desired), params)
+    cursor.execute(INSERT_NEEDED_ITEMS_SQL.format(desired=desired), params)
@@ -0,0 +1,99 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from extensions import db_pool  # noqa: E402
+
+USER = {'UserID': 1, 'HouseholdID': 1, 'UserName': 'smoke', 'RoleName': 'owner'}
+
+# One row that answers every lookup the handlers make
+ROW = {
+    'ShoppingListID': 1,
+    'HouseholdID': 1,
+    'Version': 0,
+    'TotalCost': 0,
+    'Total': 0,
+    'affected_rows': 1,
+    'CacheGeneration': 0,
+}
+
+
+class FakeCursor:
+    """Records statements and answers every query with ROW."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lastrowid = 1
+        self.rowcount = 1
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append(sql)
+
+    def executemany(self, sql, params):
+        self.conn.statements.append(sql)
+
+    def callproc(self, name, args=()):
+        self.conn.statements.append(f'CALL {name}')
+        return args
+
+    def stored_results(self):
+        return []
+
+    def fetchone(self):
+        return dict(ROW)
+
+    def fetchall(self):
+        return [dict(ROW)]
+
+    def fetchmany(self, size=None):
+        return []
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    in_transaction = False
+
+    def __init__(self):
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        pass
+
+    def start_transaction(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def conn(monkeypatch):
+    connection = FakeConnection()
+    monkeypatch.setattr(db_pool, 'connect', lambda: connection)
+    return connection
+
+
+@pytest.fixture
+def client(conn, monkeypatch):
+    def authorize_request():
+        from flask import g
+        g.current_user = dict(USER)
+
+    monkeypatch.setattr(app_module, 'authorize_request', authorize_request)
+    app = app_module.create_app()
+    app.config['TESTING'] = True
+    return app.test_client()
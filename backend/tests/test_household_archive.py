@@ -0,0 +1,184 @@
+import os
+import re
+import time
+from contextlib import contextmanager
+
+import pytest
+
+import household_archive
+from household_archive import ArchiveError, ArchiveJobRunner, _Loader
+
+INSERT_RE = re.compile(r'INSERT INTO (\w+)\s*\(([^)]*)\)\s*VALUES', re.S)
+
+# An exported household: one item in one package, moved between two
+# locations, on a shopping list.
+ARCHIVE = [
+    ('BaseUnit', {'UnitID': 3, 'MeasurementType': 'weight', 'Abbreviation': 'g'}),
+    ('Users', {'UserID': 50, 'DisplayName': 'Sam'}),
+    ('Location', {'LocationID': 10, 'LocationName': 'Pantry', 'IsArchived': 0}),
+    ('Location', {'LocationID': 11, 'LocationName': 'Fridge', 'IsArchived': 0}),
+    ('FoodItem', {'FoodItemID': 20, 'BaseUnitID': 3, 'Name': 'Rice', 'Type': '', 'Category': 'Grains',
+                  'PreferredPackageID': 30, 'IsArchived': 0}),
+    ('Package', {'PackageID': 30, 'FoodItemID': 20, 'Label': 'Bag', 'BaseUnitAmt': '500.00', 'IsArchived': 0}),
+    ('PriceLog', {'PackageID': 30, 'PriceTotal': '2.50', 'Store': 'corner', 'CreatedAt': '2025-01-01 10:00:00'}),
+    ('InventoryTransaction', {'TransactionID': 100, 'FoodItemID': 20, 'LocationID': 10, 'UserID': 50,
+                              'QtyInBaseUnits': '1000.00', 'TransactionType': 'add',
+                              'CreatedAt': '2025-01-01 10:00:00', 'ExpirationDate': None, 'TransferGroupID': None}),
+    ('InventoryTransaction', {'TransactionID': 101, 'FoodItemID': 20, 'LocationID': 10, 'UserID': 50,
+                              'QtyInBaseUnits': '500.00', 'TransactionType': 'transfer_out',
+                              'CreatedAt': '2025-01-02 10:00:00', 'ExpirationDate': None, 'TransferGroupID': 101}),
+    ('InventoryTransaction', {'TransactionID': 102, 'FoodItemID': 20, 'LocationID': 11, 'UserID': 50,
+                              'QtyInBaseUnits': '500.00', 'TransactionType': 'transfer_in',
+                              'CreatedAt': '2025-01-02 10:00:00', 'ExpirationDate': None, 'TransferGroupID': 101}),
+    ('StockBalance', {'FoodItemID': 20, 'LocationID': 11, 'Qty': '500.00'}),
+    ('ShoppingList', {'ShoppingListID': 40, 'Status': 'active', 'LastUpdated': '2025-01-03 10:00:00',
+                      'TotalCost': '2.50', 'Version': 3}),
+    ('ShoppingListItem', {'ShoppingListID': 40, 'FoodItemID': 20, 'LocationID': 10, 'PackageID': 30,
+                          'NeededQty': '1.00', 'PurchasedQty': 0, 'TotalPrice': '2.50', 'Status': 'active'}),
+]
+
+
+class RecordingCursor:
+    """Keeps inserted rows per table and hands out IDs with gaps, as InnoDB may."""
+
+    def __init__(self):
+        self.tables = {}
+        self.lastrowid = None
+        self._next_id = 1000
+        self._result = None
+
+    def execute(self, sql, params=()):
+        params = list(params)
+        insert = INSERT_RE.search(sql)
+        if insert:
+            table = insert.group(1)
+            columns = [column.strip() for column in insert.group(2).split(',')]
+            rows = self.tables.setdefault(table, [])
+            first_id = None
+            for start in range(0, len(params), len(columns)):
+                self._next_id += 7
+                first_id = first_id or self._next_id
+                rows.append(dict(zip(columns, params[start:start + len(columns)]), _id=self._next_id))
+            self.lastrowid = first_id
+        elif sql.startswith('UPDATE InventoryTransaction SET TransferGroupID = TransactionID'):
+            for row in self.tables['InventoryTransaction']:
+                if row['_id'] == params[0]:
+                    row['TransferGroupID'] = row['_id']
+        elif 'FROM BaseUnit' in sql:
+            self._result = {'UnitID': 7}
+            return
+        self._result = None
+
+    def executemany(self, sql, seq_params):
+        assert sql.startswith('UPDATE FoodItem SET PreferredPackageID')
+        for package_id, food_item_id in seq_params:
+            for row in self.tables['FoodItem']:
+                if row['_id'] == food_item_id:
+                    row['PreferredPackageID'] = package_id
+
+    def fetchone(self):
+        return self._result
+
+
+@pytest.fixture
+def loaded(monkeypatch):
+    monkeypatch.setattr(household_archive, 'placeholder_password_hash', lambda: 'placeholder')
+    cursor = RecordingCursor()
+    loader = _Loader(cursor, {'HouseholdName': 'Restored'})
+    for table, row in ARCHIVE:
+        loader.add(table, dict(row))
+    loader.finish()
+    return loader, cursor.tables
+
+
+def _one(tables, table, **match):
+    rows = [row for row in tables[table] if all(row.get(k) == v for k, v in match.items())]
+    assert len(rows) == 1, rows
+    return rows[0]
+
+
+def test_ids_are_remapped(loaded):
+    loader, tables = loaded
+    household_id = tables['Household'][0]['_id']
+    assert loader.household_id == household_id
+
+    user = _one(tables, 'Users', DisplayName='Sam')
+    pantry = _one(tables, 'Location', LocationName='Pantry')
+    fridge = _one(tables, 'Location', LocationName='Fridge')
+    food = _one(tables, 'FoodItem', Name='Rice')
+    package = _one(tables, 'Package', Label='Bag')
+    shopping_list = _one(tables, 'ShoppingList', Status='active')
+
+    assert user['HouseholdID'] == household_id and user['IsArchived'] == 1
+    assert {pantry['HouseholdID'], fridge['HouseholdID'], food['HouseholdID']} == {household_id}
+    assert food['BaseUnitID'] == 7
+    assert package['FoodItemID'] == food['_id']
+    assert food['PreferredPackageID'] == package['_id']
+    assert _one(tables, 'PriceLog')['PackageID'] == package['_id']
+    assert _one(tables, 'StockBalance')['LocationID'] == fridge['_id']
+
+    item = _one(tables, 'ShoppingListItem')
+    assert (item['ShoppingListID'], item['FoodItemID'], item['LocationID'], item['PackageID']) == (
+        shopping_list['_id'], food['_id'], pantry['_id'], package['_id'])
+
+    for row in tables['InventoryTransaction']:
+        assert (row['HouseholdID'], row['UserID'], row['FoodItemID']) == (household_id, user['_id'], food['_id'])
+
+
+def test_transfer_group_is_rewritten(loaded):
+    _, tables = loaded
+    added = _one(tables, 'InventoryTransaction', TransactionType='add')
+    transfer_out = _one(tables, 'InventoryTransaction', TransactionType='transfer_out')
+    transfer_in = _one(tables, 'InventoryTransaction', TransactionType='transfer_in')
+
+    assert added['TransferGroupID'] is None
+    assert transfer_out['TransferGroupID'] == transfer_out['_id']
+    assert transfer_in['TransferGroupID'] == transfer_out['_id']
+    assert transfer_in['LocationID'] != transfer_out['LocationID']
+
+
+class _NoProgress:
+    rows_total = None
+
+    def update(self, *args, **kwargs):
+        pass
+
+
+def test_failed_export_removes_partial_file(tmp_path, monkeypatch):
+    class EmptyCursor:
+        def execute(self, sql, params=()):
+            pass
+
+        def fetchall(self):
+            return []
+
+    @contextmanager
+    def read_snapshot(buffered=True):
+        yield EmptyCursor()
+
+    monkeypatch.setattr(household_archive, 'read_snapshot', read_snapshot)
+    path = str(tmp_path / 'household_job_1.ndjson.gz')
+    with pytest.raises(ArchiveError):
+        household_archive.export_household(1, path, _NoProgress())
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_prune_removes_only_old_archive_files(tmp_path):
+    runner = ArchiveJobRunner()
+    runner.directory = str(tmp_path)
+    old = time.time() - 48 * 3600
+    for name, mtime in [
+        ('household_job_1.ndjson.gz', old),
+        ('household_job_2.upload.ndjson.gz', old),
+        ('household_job_3.ndjson.gz.part', old),
+        ('household_job_4.ndjson.gz', None),
+        ('notes.txt', old),
+    ]:
+        path = tmp_path / name
+        path.write_bytes(b'')
+        if mtime:
+            os.utime(path, (mtime, mtime))
+
+    assert runner.prune(24) == 3
+    assert sorted(os.listdir(tmp_path)) == ['household_job_4.ndjson.gz', 'notes.txt']
@@ -0,0 +1,20 @@
+from conftest import ROW
+
+PATH = '/api/shopping-lists/1/items'
+
+
+def test_own_household_revalidates(client):
+    first = client.get(PATH)
+    assert first.status_code == 200 and first.headers['ETag']
+
+    second = client.get(PATH, headers={'If-None-Match': first.headers['ETag']})
+    assert second.status_code == 304
+
+
+def test_foreign_household_is_forbidden_before_etag_check(client, monkeypatch):
+    etag = client.get(PATH).headers['ETag']
+    monkeypatch.setitem(ROW, 'HouseholdID', 2)
+
+    assert client.get(PATH).status_code == 403
+    assert client.get(PATH, headers={'If-None-Match': etag}).status_code == 403
+    assert client.get(PATH, headers={'If-None-Match': '*'}).status_code == 403
@@ -0,0 +1,105 @@
+import mysql.connector
+import pytest
+from mysql.connector import errorcode
+
+import routes.transactions as transactions
+from conftest import FakeCursor
+from ownership import FOOD_ITEM
+
+PATH = '/api/transactions/inventory/transactions:batch'
+
+
+def _operation(food_item_id, transaction_type='add'):
+    return {'food_item_id': food_item_id, 'location_id': 1, 'user_id': 1,
+            'transaction_type': transaction_type, 'quantity': 1}
+
+
+@pytest.fixture
+def owned(monkeypatch):
+    """Every ID is owned by the household except food item 9."""
+    def check_ownership(household_id, food_item_ids=(), location_ids=()):
+        return set(), {(FOOD_ITEM, i) for i in food_item_ids if i == 9}
+    monkeypatch.setattr(transactions, 'check_ownership', check_ownership)
+
+
+@pytest.fixture
+def fail_on(monkeypatch):
+    """Makes ApplyInventoryOperation raise errno for the given food item."""
+    failures = {}
+
+    def callproc(self, name, args=()):
+        self.conn.statements.append(f'CALL {name}')
+        if args[0] in failures:
+            raise mysql.connector.Error(msg='Operation failed', errno=failures[args[0]])
+        return args
+
+    monkeypatch.setattr(FakeCursor, 'callproc', callproc)
+    return failures
+
+
+def _statuses(response):
+    return [result['status'] for result in response.get_json()['results']]
+
+
+def test_all_or_nothing_rolls_back_on_failure(client, conn, owned, fail_on):
+    fail_on[2] = errorcode.ER_SIGNAL_EXCEPTION
+    response = client.post(PATH, json={'operations': [_operation(1), _operation(2), _operation(3)]})
+
+    assert response.status_code == 409
+    assert _statuses(response) == ['rolled_back', 'error', 'skipped']
+    assert response.get_json()['applied'] == 0
+    assert conn.commits == 0 and conn.rollbacks >= 1
+
+
+def test_best_effort_keeps_partial_results(client, conn, owned, fail_on):
+    fail_on[2] = errorcode.ER_SIGNAL_EXCEPTION
+    response = client.post(PATH, json={'mode': 'best_effort',
+                                       'operations': [_operation(1), _operation(2), _operation(3), _operation(9)]})
+
+    body = response.get_json()
+    assert response.status_code == 200, body
+    assert _statuses(response) == ['applied', 'error', 'applied', 'error']
+    assert (body['applied'], body['failed']) == (2, 2)
+    assert 'ROLLBACK TO SAVEPOINT batch_operation' in conn.statements
+    assert conn.commits == 1
+
+
+def test_best_effort_deadlock_returns_conflict(client, conn, owned, fail_on):
+    fail_on[2] = errorcode.ER_LOCK_DEADLOCK
+    response = client.post(PATH, json={'mode': 'best_effort',
+                                       'operations': [_operation(1), _operation(2), _operation(3)]})
+
+    assert response.status_code == 409
+    assert _statuses(response) == ['rolled_back', 'error', 'skipped']
+    assert 'ROLLBACK TO SAVEPOINT batch_operation' not in conn.statements
+    assert conn.commits == 0
+
+
+def test_best_effort_failed_savepoint_rollback_returns_conflict(client, conn, owned, fail_on, monkeypatch):
+    fail_on[1] = errorcode.ER_SIGNAL_EXCEPTION
+    execute = FakeCursor.execute
+
+    def failing_execute(self, sql, params=None):
+        if sql.startswith('ROLLBACK TO SAVEPOINT'):
+            raise mysql.connector.Error(msg='SAVEPOINT batch_operation does not exist', errno=1305)
+        execute(self, sql, params)
+
+    monkeypatch.setattr(FakeCursor, 'execute', failing_execute)
+    response = client.post(PATH, json={'mode': 'best_effort', 'operations': [_operation(1), _operation(2)]})
+
+    assert response.status_code == 409
+    assert _statuses(response) == ['error', 'skipped']
+    assert conn.commits == 0
+
+
+@pytest.mark.parametrize('operations', [
+    [_operation(1), {'food_item_id': 2, 'location_id': 1}],
+    [_operation(1), _operation(1, 'transfer_out')],
+    [_operation(1), _operation(9)],
+])
+def test_invalid_operations_are_rejected(client, conn, owned, operations):
+    response = client.post(PATH, json={'operations': operations})
+
+    assert response.status_code == 400
+    assert _statuses(response) == ['skipped', 'error']
+    assert 'CALL ApplyInventoryOperation' not in conn.statements
@@ -0,0 +1,35 @@
+from collections import OrderedDict
+
+import pytest
+
+import app as app_module
+from routes import auth
+
+
+@pytest.fixture
+def session_users(monkeypatch):
+    lookups = []
+
+    def get_user_by_id(user_id):
+        lookups.append(user_id)
+        return {'UserID': user_id, 'HouseholdID': 1}
+
+    monkeypatch.setattr(auth, '_session_users', OrderedDict())
+    monkeypatch.setattr(auth, 'SESSION_USER_CACHE_LIMIT', 2)
+    monkeypatch.setattr(auth, '_get_user_by_id', get_user_by_id)
+    app = app_module.create_app()
+    app.config['SESSION_USER_CACHE_TTL'] = 60
+    with app.app_context():
+        yield lookups
+
+
+def test_least_recently_used_user_is_evicted(session_users):
+    auth._get_session_user(1)
+    auth._get_session_user(2)
+    auth._get_session_user(1)
+    auth._get_session_user(3)
+
+    assert list(auth._session_users) == [1, 3]
+    auth._get_session_user(1)
+    auth._get_session_user(2)
+    assert session_users == [1, 2, 3, 2]
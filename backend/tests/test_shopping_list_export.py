@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+
+import pytest
+
+import routes.shopping_lists as shopping_lists
+from conftest import FakeCursor
+
+
+def _row(list_id, item_id, name, status='completed'):
+    return {
+        'ShoppingListID': list_id, 'HouseholdID': 1, 'LastUpdated': f'2025-01-0{list_id} 10:00:00',
+        'ListStatus': status, 'TotalCost': '4.50', 'ShoppingListItemID': item_id, 'FoodItemName': name,
+        'NeededQty': '1.00', 'PurchasedQty': '1.00', 'TotalPrice': '1.50' if item_id else None,
+        'Status': 'purchased' if item_id else None, 'LocationName': 'Pantry' if item_id else None,
+        'PackageLabel': 'Bag' if item_id else None,
+    }
+
+
+# Two lists with three items, then a list with none (the LEFT JOIN's NULL row)
+EXPORT_ROWS = [
+    _row(1, 10, 'Rice'),
+    _row(1, 11, 'Beans, dried'),
+    _row(2, 12, 'Oats'),
+    _row(3, None, None),
+]
+
+
+@pytest.fixture
+def export_rows(monkeypatch):
+    """Streams EXPORT_ROWS through fetchmany, two rows at a time, in small chunks."""
+    def fetchmany(self, size=None):
+        if not hasattr(self, 'pending'):
+            self.pending = [dict(row) for row in EXPORT_ROWS]
+        batch, self.pending = self.pending[:size], self.pending[size:]
+        return batch
+
+    monkeypatch.setattr(FakeCursor, 'fetchmany', fetchmany)
+    monkeypatch.setattr(shopping_lists, 'EXPORT_FETCH_ROWS', 2)
+    monkeypatch.setattr(shopping_lists, 'EXPORT_CHUNK_CHARS', 64)
+
+
+def _read(response):
+    """The whole streamed body, and how many chunks it came in."""
+    chunks = [chunk for chunk in response.response if chunk]
+    return b''.join(chunks).decode('utf-8'), len(chunks)
+
+
+def test_list_export_json(client, export_rows):
+    response = client.get('/api/shopping-lists/1/export')
+    body, chunks = _read(response)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/json'
+    assert chunks > 1
+    # One object per list, back to back
+    decoder, lists, offset = json.JSONDecoder(), [], 0
+    while offset < len(body):
+        value, offset = decoder.raw_decode(body, offset)
+        lists.append(value)
+    assert [entry['shopping_list']['ShoppingListID'] for entry in lists] == [1, 2, 3]
+    assert [item['FoodItemName'] for item in lists[0]['items']] == ['Rice', 'Beans, dried']
+    assert lists[2]['items'] == []
+
+
+def test_list_export_csv(client, export_rows):
+    response = client.get('/api/shopping-lists/1/export?format=csv')
+    body, chunks = _read(response)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=shopping_list_1.csv'
+    assert chunks > 1
+    rows = list(csv.DictReader(io.StringIO(body)))
+    assert [row['FoodItemName'] for row in rows] == ['Rice', 'Beans, dried', 'Oats', '']
+    assert list(rows[0]) == list(shopping_lists.EXPORT_CSV_COLUMNS)
+
+
+def test_list_export_html(client, export_rows):
+    response = client.get('/api/shopping-lists/1/export?format=html')
+    body, chunks = _read(response)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/html'
+    assert chunks > 1
+    assert body.rstrip().endswith('</html>')
+    for text in ('Shopping List #1', 'Shopping List #3', 'Beans, dried', 'Oats'):
+        assert text in body
+
+
+def test_list_export_rejects_unknown_format(client, export_rows):
+    response = client.get('/api/shopping-lists/1/export?format=xml')
+
+    assert response.status_code == 400
+
+
+def test_household_export(client, export_rows):
+    response = client.get('/api/shopping-lists/export?household_id=1&from=2025-01-01&to=2025-01-31')
+    body, chunks = _read(response)
+
+    assert response.status_code == 200
+    assert chunks > 1
+    assert response.headers['Content-Disposition'] == (
+        'attachment; filename=shopping_lists_1_2025-01-01_2025-01-31.json')
+    export = json.loads(body)
+    assert (export['household_id'], export['from'], export['to']) == (1, '2025-01-01', '2025-01-31')
+    assert [entry['shopping_list']['ShoppingListID'] for entry in export['shopping_lists']] == [1, 2, 3]
+    assert sum(len(entry['items']) for entry in export['shopping_lists']) == 3
+
+
+def test_household_export_csv(client, export_rows):
+    response = client.get('/api/shopping-lists/export?household_id=1&format=csv')
+    body, _ = _read(response)
+
+    assert response.status_code == 200
+    assert len(list(csv.DictReader(io.StringIO(body)))) == len(EXPORT_ROWS)
+
+
+@pytest.mark.parametrize('query, status', [
+    ('from=2025-13-01', 400),
+    ('to=yesterday', 400),
+    ('from=2025-02-01&to=2025-01-01', 400),
+    ('from=2025-01-01&to=2025-01-01', 200),
+])
+def test_household_export_date_range(client, export_rows, query, status):
+    response = client.get(f'/api/shopping-lists/export?household_id=1&{query}')
+    body, _ = _read(response)
+
+    assert response.status_code == status, body
+    if status == 400:
+        assert json.loads(body)['error']
+
+
+def test_household_export_other_household(client, export_rows):
+    response = client.get('/api/shopping-lists/export?household_id=2')
+
+    assert response.status_code == 403
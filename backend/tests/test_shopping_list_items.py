@@ -0,0 +1,18 @@
+import pytest
+
+ITEM = {'FoodItemID': 1, 'LocationID': 1, 'PackageID': 1, 'NeededQty': 1, 'PurchasedQty': 0, 'TotalPrice': 0}
+
+
+@pytest.mark.parametrize('method, path, body', [
+    ('post', '/api/shopping-lists/1/items', {'items': [ITEM]}),
+    ('put', '/api/shopping-lists/active/items', {'household_id': 1, 'items': [ITEM]}),
+    ('put', '/api/shopping-lists/1/items', {'items': [ITEM]}),
+    ('patch', '/api/shopping-lists/active/items', {'household_id': 1, 'version': 0, 'upserts': [ITEM]}),
+    ('patch', '/api/shopping-lists/1/items', {'version': 0, 'upserts': [ITEM], 'deletes': []}),
+])
+def test_item_endpoints_commit(client, conn, method, path, body):
+    response = getattr(client, method)(path, json=body)
+
+    assert response.status_code < 400, response.get_json()
+    assert response.get_json()['version'] == 0
+    assert conn.commits == 1 and conn.rollbacks == 0
@@ -17,7 +17,7 @@ import { dispatchTransactionCompleted } from '../../../../utils/transactionEvent
 import { useFormData } from '../AddFoodItemModal/useFormData';
 import { LeftColumnFields, RightColumnFields } from '../AddFoodItemModal/FormFields';
 import { validateForm } from '../AddFoodItemModal/validation';
-import { updateFoodItem, createInventoryTransaction, archiveFoodItem } from '../api';
+import { updateFoodItem, createInventoryTransaction, createInventoryTransfer, archiveFoodItem } from '../api';
 import { useFoodItemDetails, useInventoryAdjustment } from './hooks';
 
 const EditFoodItemModal = ({ open, onClose, item, onItemUpdated }) => {
@@ -193,18 +193,11 @@ const EditFoodItemModal = ({ open, onClose, item, onItemUpdated }) => {
         const qtyToMove = Math.max(currentBaseUnits, 0);
 
         if (qtyToMove > 0 && originalLocationId) {
-          await createInventoryTransaction({
-            food_item_id: item.FoodItemID,
-            location_id: originalLocationId,
-            user_id: userId,
-            transaction_type: 'transfer_out',
-            quantity: qtyToMove,
-          }, { notify: false });
-          await createInventoryTransaction({
+          await createInventoryTransfer({
             food_item_id: item.FoodItemID,
-            location_id: targetLocationId,
+            from_location_id: originalLocationId,
+            to_location_id: targetLocationId,
             user_id: userId,
-            transaction_type: 'transfer_in',
             quantity: qtyToMove,
           }, { notify: false });
         } else {
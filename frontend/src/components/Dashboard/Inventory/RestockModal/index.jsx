@@ -10,7 +10,7 @@ import IconButton from '@mui/material/IconButton';
 import CloseIcon from '@mui/icons-material/Close';
 import { useCurrentUser } from '../../../../hooks/useCurrentUser';
 import { dispatchTransactionCompleted } from '../../../../utils/transactionEvents';
-import { createInventoryTransaction, updateFoodItem } from '../api';
+import { createInventoryTransaction, createInventoryTransfer, updateFoodItem } from '../api';
 import { packagesToBaseUnits } from '../utils';
 
 const RestockModal = ({ open, onClose, item, onRestocked, locations = [] }) => {
@@ -140,19 +140,11 @@ const RestockModal = ({ open, onClose, item, onRestocked, locations = [] }) => {
         }
 
         manualNotify = true;
-        await createInventoryTransaction({
-          food_item_id: item.FoodItemID,
-          location_id: sourceLocationId,
-          user_id: userId,
-          transaction_type: 'transfer_out',
-          quantity: quantityBaseUnits,
-        }, { notify: false });
-
-        await createInventoryTransaction({
+        await createInventoryTransfer({
           food_item_id: item.FoodItemID,
-          location_id: destinationLocationId,
+          from_location_id: sourceLocationId,
+          to_location_id: destinationLocationId,
           user_id: userId,
-          transaction_type: 'transfer_in',
           quantity: quantityBaseUnits,
         }, { notify: false });
       } else {
@@ -42,6 +42,30 @@ export const createInventoryTransaction = async (payload, { notify = true } = {}
   return data;
 };
 
+export const createInventoryTransfer = async (payload, { notify = true } = {}) => {
+  const response = await fetch('/api/transactions/inventory/transfer', {
+    method: 'POST',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    credentials: 'include',
+    body: JSON.stringify(payload),
+  });
+
+  if (!response.ok) {
+    const errData = await response.json().catch(() => ({}));
+    throw new Error(errData.error || 'Failed to transfer item');
+  }
+
+  const data = await response.json();
+
+  if (notify) {
+    dispatchTransactionCompleted({ payload, data });
+  }
+
+  return data;
+};
+
 export const archiveFoodItem = async (foodItemId) => {
   const response = await fetch(`/api/food-items/${foodItemId}`, {
     method: 'DELETE',
@@ -5,9 +5,30 @@ import Button from '@mui/material/Button';
 import useShoppingListStore from '../../../../stores/useShoppingListStore';
 import { useCurrentUser } from '../../../../hooks/useCurrentUser';
 import { useActiveShoppingList } from '../../../../hooks/useShoppingLists';
+import { useShoppingListItems } from '../../../../hooks/useShoppingListItems';
 import { useUpdateShoppingListItems, useCompleteActiveShoppingList } from '../../../../hooks/useShoppingListMutations';
 import { packagesToBaseUnits } from '../../Inventory/utils';
 
+const cleanItem = (item) => {
+  const neededQtyPackages = parseFloat(item.NeededQty);
+  const packageBaseAmt = parseFloat(item.PackageBaseUnitAmt);
+  const packagesValue = Number.isFinite(neededQtyPackages) ? neededQtyPackages : 0;
+  const needsConversion = Number.isFinite(packageBaseAmt) && packageBaseAmt > 0;
+  const normalizedNeededQty = needsConversion
+    ? packagesToBaseUnits(packagesValue, packageBaseAmt)
+    : packagesValue;
+
+  return {
+    FoodItemID: item.FoodItemID,
+    LocationID: item.LocationID || null,
+    PackageID: item.PackageID || null,
+    NeededQuantity: normalizedNeededQty,
+    PurchasedQuantity: parseInt(item.PurchasedQty, 10) || 0,
+    TotalPrice: parseFloat(item.TotalPrice) || 0,
+    Status: item.Status || 'active',
+  };
+};
+
 const SaveModal = () => {
   const { householdId, user } = useCurrentUser();
   const { closeModal, tempCreateListBelowThresholdItems, isMiniModalOpen, setIsMiniModalOpen } = useShoppingListStore();
@@ -19,6 +40,7 @@ const SaveModal = () => {
     error: activeShoppingListError,
     isLoading: activeShoppingListLoading,
   } = useActiveShoppingList(householdId);
+  const { data: shoppingListItemsData } = useShoppingListItems(activeShoppingListData?.ShoppingListID);
 
   if (activeShoppingListLoading) return <div>Loading...</div>;
   if (activeShoppingListError) return <div>Error: {activeShoppingListError.message}</div>;
@@ -26,34 +48,24 @@ const SaveModal = () => {
 
   const handleUpdateActiveShoppingList = async () => {
     try {
-      const itemsToList = [...tempCreateListBelowThresholdItems];
-
-      if (itemsToList.length > 0) {
-        const cleanedItems = itemsToList.map((item) => {
-          const neededQtyPackages = parseFloat(item.NeededQty);
-          const packageBaseAmt = parseFloat(item.PackageBaseUnitAmt);
-          const packagesValue = Number.isFinite(neededQtyPackages) ? neededQtyPackages : 0;
-          const needsConversion = Number.isFinite(packageBaseAmt) && packageBaseAmt > 0;
-          const normalizedNeededQty = needsConversion
-            ? packagesToBaseUnits(packagesValue, packageBaseAmt)
-            : packagesValue;
-
-          return {
-            FoodItemID: item.FoodItemID,
-            LocationID: item.LocationID || null,
-            PackageID: item.PackageID || null,
-            NeededQuantity: normalizedNeededQty,
-            PurchasedQuantity: parseInt(item.PurchasedQty, 10) || 0,
-            TotalPrice: parseFloat(item.TotalPrice) || 0,
-            Status: item.Status || 'active',
-          };
-        });
+      const itemKey = (item) => `${item.FoodItemID}:${item.LocationID ?? ''}`;
+      const savedItems = new Map(
+        (shoppingListItemsData || []).map((item) => [itemKey(item), JSON.stringify(cleanItem(item))])
+      );
+      const editedItems = tempCreateListBelowThresholdItems.map(cleanItem);
+      const editedKeys = new Set(editedItems.map(itemKey));
 
-        // console.log('Sending items to update:', cleanedItems);
+      const upserts = editedItems.filter((item) => savedItems.get(itemKey(item)) !== JSON.stringify(item));
+      const deletes = (shoppingListItemsData || [])
+        .filter((item) => !editedKeys.has(itemKey(item)))
+        .map((item) => ({ FoodItemID: item.FoodItemID, LocationID: item.LocationID || null }));
 
+      if (upserts.length > 0 || deletes.length > 0) {
         await updateItemsMutation.mutateAsync({
           household_id: householdId,
-          items: cleanedItems,
+          version: activeShoppingListData.Version,
+          upserts,
+          deletes,
         });
       }
       // console.log('List updated successfully');
@@ -13,6 +13,7 @@ import DownloadIcon from '@mui/icons-material/Download';
 import Menu from '@mui/material/Menu';
 import MenuItem from '@mui/material/MenuItem';
 import { useShoppingLists } from '../../../../hooks/useShoppingLists';
+import { useCurrentUser } from '../../../../hooks/useCurrentUser';
 
 export default function ShoppingHistoryTable() {
   const { setIsListHistory, setActiveListId } = useShoppingListStore();
@@ -23,11 +24,18 @@ export default function ShoppingHistoryTable() {
   const [sortParam, setSortParam] = useState(0);
   const [sortOrder, setSortOrder] = useState('asc');
   // Shooping List Query
-  const { data, error, isLoading } = useShoppingLists({ param: sortParam, order: sortOrder });
+  const { householdId } = useCurrentUser();
+  const { data: pages, error, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useShoppingLists({
+    householdId,
+    param: sortParam,
+    order: sortOrder,
+  });
 
   if (isLoading) return <div>Loading...</div>;
   if (error) return <div>Error: {error.message}</div>;
-  if (!data) return <div>No data found</div>;
+  if (!pages) return <div>No data found</div>;
+
+  const data = pages.pages.flatMap((page) => page.data);
 
   const tableHeaders = [
     { label: 'ListID', align: 'left' },
@@ -149,9 +157,15 @@ export default function ShoppingHistoryTable() {
           ))}
         </TableBody>
       </Table>
+      {hasNextPage && (
+        <Button onClick={() => fetchNextPage()} disabled={isFetchingNextPage} sx={{ fontFamily: 'Balsamiq Sans' }}>
+          {isFetchingNextPage ? 'Loading...' : 'Load more'}
+        </Button>
+      )}
       <Menu anchorEl={anchorEl} open={Boolean(anchorEl)} onClose={handleCloseMenu}>
         <MenuItem onClick={() => handleDownload('json')}>Download as JSON</MenuItem>
         <MenuItem onClick={() => handleDownload('html')}>Download as HTML</MenuItem>
+        <MenuItem onClick={() => handleDownload('csv')}>Download as CSV</MenuItem>
       </Menu>
     </TableContainer>
   );
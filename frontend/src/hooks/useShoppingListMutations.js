@@ -1,16 +1,16 @@
 import { useMutation, useQueryClient } from '@tanstack/react-query';
 import { dispatchTransactionCompleted } from '../utils/transactionEvents';
 
-// update shopping list items without closing list 
+// update shopping list items without closing list; only changed items are sent
 export const useUpdateShoppingListItems = () => {
   const queryClient = useQueryClient();
 
   return useMutation({
-    mutationFn: async ({ household_id, items }) => {
+    mutationFn: async ({ household_id, version, upserts, deletes }) => {
       const res = await fetch(`/api/shopping-lists/active/items`, {
-        method: 'PUT',
+        method: 'PATCH',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ household_id, items }),
+        body: JSON.stringify({ household_id, version, upserts, deletes }),
       });
 
       if (!res.ok) {
@@ -1,4 +1,4 @@
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery, useQuery } from '@tanstack/react-query';
 
 // get active shopping list
 export const useActiveShoppingList = (householdId) => {
@@ -18,15 +18,19 @@ export const useActiveShoppingList = (householdId) => {
   });
 };
 
-// get shopping lists
-export const useShoppingLists = ({ param = 0, order = 'asc' } = {}) => {
-  return useQuery({
-    queryKey: ['shoppingLists', { param, order }],
-    queryFn: async () => {
+// get a household's shopping lists, one keyset page at a time
+export const useShoppingLists = ({ householdId, param = 0, order = 'asc' } = {}) => {
+  return useInfiniteQuery({
+    queryKey: ['shoppingLists', householdId, { param, order }],
+    queryFn: async ({ pageParam }) => {
       const queryParams = new URLSearchParams({
+        household_id: householdId.toString(),
         param: param.toString(),
         order,
       });
+      if (pageParam) {
+        queryParams.set('after', pageParam);
+      }
 
       const res = await fetch(`/api/shopping-lists?${queryParams}`);
 
@@ -36,6 +40,8 @@ export const useShoppingLists = ({ param = 0, order = 'asc' } = {}) => {
 
       return res.json();
     },
+    initialPageParam: null,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
+    enabled: !!householdId,
   });
 };
-